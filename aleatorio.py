@@ -0,0 +1,79 @@
+"""
+Generadores aleatorios de la aplicación.
+
+El código pide el generador de su flujo con obtener_rng('casino'),
+obtener_rng('cupones'), etc., en lugar de usar el módulo random global. Cada
+hilo tiene su propio generador por flujo, así que no hay estado compartido ni
+bloqueo entre peticiones concurrentes. Según la configuración:
+
+- ALEATORIO_MODO = 'sistema' (por defecto): generadores sembrados desde os.urandom.
+- ALEATORIO_MODO = 'semilla': sembrados con ALEATORIO_SEMILLA, el flujo y el
+  orden del hilo; las mismas peticiones dan los mismos resultados (pruebas y
+  benchmarks reproducibles).
+
+Los flujos de ALEATORIO_FLUJOS_SEGUROS (códigos de canje) usan siempre
+secrets.SystemRandom (CSPRNG), también en modo semilla.
+"""
+import itertools
+import random
+import secrets
+import threading
+from flask import current_app, has_app_context
+from config import Config
+
+
+class ProveedorAleatorio:
+    """Generadores por hilo y flujo (uno por aplicación)"""
+
+    def __init__(self, modo='sistema', semilla=0, flujos_seguros=()):
+        if modo not in ('sistema', 'semilla'):
+            raise ValueError(f'ALEATORIO_MODO no válido: {modo}')
+        self.modo = modo
+        self.semilla = semilla
+        self.flujos_seguros = frozenset(flujos_seguros)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._hilos = {}  # flujo -> contador de hilos que lo pidieron (modo semilla)
+
+    def _crear(self, flujo):
+        if flujo in self.flujos_seguros:
+            return secrets.SystemRandom()
+        if self.modo == 'semilla':
+            with self._lock:
+                orden = next(self._hilos.setdefault(flujo, itertools.count()))
+            return random.Random(f'{self.semilla}:{flujo}:{orden}')
+        return random.Random()
+
+    def generador(self, flujo):
+        """random.Random del flujo para el hilo actual"""
+        generadores = getattr(self._local, 'generadores', None)
+        if generadores is None:
+            generadores = self._local.generadores = {}
+        if flujo not in generadores:
+            generadores[flujo] = self._crear(flujo)
+        return generadores[flujo]
+
+    def reiniciar(self):
+        """Descarta los generadores: en modo semilla, la secuencia vuelve a empezar"""
+        with self._lock:
+            self._local = threading.local()
+            self._hilos = {}
+
+
+def crear_proveedor(config):
+    return ProveedorAleatorio(
+        modo=config.get('ALEATORIO_MODO', 'sistema'),
+        semilla=config.get('ALEATORIO_SEMILLA', 0),
+        flujos_seguros=config.get('ALEATORIO_FLUJOS_SEGUROS', ())
+    )
+
+
+# Proveedor para usar fuera de una aplicación (scripts, simulador)
+_POR_DEFECTO = ProveedorAleatorio(flujos_seguros=Config.ALEATORIO_FLUJOS_SEGUROS)
+
+
+def obtener_rng(flujo):
+    """Generador del flujo para el hilo actual, según la configuración de la app"""
+    if has_app_context() and 'aleatorio' in current_app.extensions:
+        return current_app.extensions['aleatorio'].generador(flujo)
+    return _POR_DEFECTO.generador(flujo)
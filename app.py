@@ -2,10 +2,15 @@ from flask import Flask, render_template, request, session
 from flask_babel import Babel
 from flask_login import LoginManager
 from flask_mail import Mail # Importación necesaria
-from config import Config
+from config import obtener_config
 from models import db, User
 from flask_migrate import Migrate 
-from utils import inject_csrf_token, obtener_nombre_carrera
+from utils import inject_csrf_token, obtener_nombre_carrera, estadisticas_globales, cargar_catalogo_misiones
+from cache import CacheTTL
+from ranking import ServicioRanking
+from progresion import cargar_niveles
+from saldos import MetricasSaldos
+from aleatorio import crear_proveedor
 import os
 import traceback
 
@@ -14,9 +19,11 @@ babel = Babel()
 migrate = Migrate()
 mail = Mail() # <--- IMPORTANTE: Inicializar globalmente aquí
 
-def create_app(config_class=Config):
+def create_app(config_class=None):
     """Factory para crear la aplicación Flask"""
     app = Flask(__name__)
+    if config_class is None:
+        config_class = obtener_config()
     app.config.from_object(config_class)
 
     # Configuración de Babel
@@ -33,6 +40,29 @@ def create_app(config_class=Config):
     migrate.init_app(app, db) 
     mail.init_app(app) # <--- IMPORTANTE: Vincular la instancia global a la app
     
+    # Cachés en memoria (una por aplicación)
+    app.extensions['cache_estadisticas'] = CacheTTL(
+        estadisticas_globales,
+        ttl=app.config['STATS_CACHE_TTL'],
+        stale=app.config['STATS_CACHE_STALE']
+    )
+    app.extensions['catalogo_misiones'] = CacheTTL(
+        cargar_catalogo_misiones,
+        ttl=app.config['MISIONES_CACHE_TTL'],
+        stale=0
+    )
+    app.extensions['niveles'] = CacheTTL(
+        cargar_niveles,
+        ttl=app.config['NIVELES_CACHE_TTL'],
+        stale=0
+    )
+    app.extensions['saldos'] = MetricasSaldos()
+    app.extensions['aleatorio'] = crear_proveedor(app.config)
+    app.extensions['ranking'] = ServicioRanking(
+        top_n=app.config['RANKING_TOP_N'],
+        ttl=app.config['RANKING_CACHE_TTL']
+    )
+    
     # Configurar Flask-Login
     login_manager = LoginManager()
     login_manager.init_app(app)
@@ -62,6 +92,14 @@ def create_app(config_class=Config):
     
     # Registrar procesadores de contexto
     app.context_processor(inject_csrf_token)
+    
+    # Despachador de eventos de dominio (misiones y logros)
+    from eventos import registrar_despachador
+    registrar_despachador(app)
+    
+    # Registrar comandos de mantenimiento
+    from commands import register_commands
+    register_commands(app)
    
     @app.context_processor
     def inject_utilities():
@@ -70,8 +108,10 @@ def create_app(config_class=Config):
             obtener_nombre_carrera=obtener_nombre_carrera 
         )
 
-    # Crear tablas si no existen
+    # Configurar motores y crear tablas si no existen
+    from database import configurar_motores
     with app.app_context():
+        configurar_motores(app)
         db.create_all()
     
     # Página de error 404
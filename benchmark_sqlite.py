@@ -0,0 +1,116 @@
+"""
+Benchmark de concurrencia sobre SQLite: compara el perfil por defecto con
+SQLiteProduccionConfig (WAL, busy_timeout, synchronous=NORMAL...).
+
+Cada hilo simula estudiantes que reciclan (escritura + commit) y miran su
+historial (lectura) sobre un archivo SQLite temporal.
+
+Uso: python benchmark_sqlite.py [--hilos 16] [--operaciones 200] [--semilla 1]
+"""
+import argparse
+import os
+import tempfile
+import threading
+import time
+from sqlalchemy.exc import OperationalError
+from aleatorio import obtener_rng
+from app import create_app
+from config import Config, SQLiteProduccionConfig
+from models import db, User, Transaction
+
+
+def preparar_app(config_base, ruta_db, usuarios, semilla=None):
+    class BenchConfig(config_base):
+        SQLALCHEMY_DATABASE_URI = f'sqlite:///{ruta_db}'
+        if semilla is not None:
+            ALEATORIO_MODO = 'semilla'
+            ALEATORIO_SEMILLA = semilla
+
+    app = create_app(BenchConfig)
+    with app.app_context():
+        for i in range(usuarios):
+            u = User(username=f'bench{i}', email=f'bench{i}@uca.edu.sv',
+                     nombre_completo=f'Bench {i}', password_hash='-')
+            db.session.add(u)
+        db.session.commit()
+    return app
+
+
+def trabajador(app, user_ids, operaciones, resultados, lock):
+    escrituras = lecturas = errores = 0
+    with app.app_context():
+        rng = obtener_rng('benchmark')
+        for _ in range(operaciones):
+            user_id = rng.choice(user_ids)
+            try:
+                user = db.session.get(User, user_id)
+                user.agregar_puntos(10, 'reciclaje', 'Reciclaje de benchmark')
+                db.session.commit()
+                escrituras += 1
+            except OperationalError:
+                db.session.rollback()
+                errores += 1
+
+            try:
+                Transaction.query.filter_by(user_id=user_id)\
+                    .order_by(Transaction.fecha.desc()).limit(5).all()
+                lecturas += 1
+            except OperationalError:
+                db.session.rollback()
+                errores += 1
+        db.session.remove()
+
+    with lock:
+        resultados['escrituras'] += escrituras
+        resultados['lecturas'] += lecturas
+        resultados['errores'] += errores
+
+
+def ejecutar(nombre, config_base, hilos, operaciones, usuarios, semilla=None):
+    with tempfile.TemporaryDirectory() as tmp:
+        app = preparar_app(config_base, os.path.join(tmp, 'bench.db'), usuarios, semilla)
+        with app.app_context():
+            user_ids = [u.id for u in User.query.all()]
+
+        resultados = {'escrituras': 0, 'lecturas': 0, 'errores': 0}
+        lock = threading.Lock()
+        workers = [
+            threading.Thread(target=trabajador, args=(app, user_ids, operaciones, resultados, lock))
+            for _ in range(hilos)
+        ]
+
+        inicio = time.perf_counter()
+        for w in workers:
+            w.start()
+        for w in workers:
+            w.join()
+        duracion = time.perf_counter() - inicio
+
+        with app.app_context():
+            db.engine.dispose()
+
+    ops = resultados['escrituras'] + resultados['lecturas']
+    print(f"{nombre:<22} {duracion:>8.2f}s {ops / duracion:>10.1f} ops/s "
+          f"{resultados['escrituras']:>10} {resultados['errores']:>8}")
+    return ops / duracion
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark de concurrencia SQLite')
+    parser.add_argument('--hilos', type=int, default=16)
+    parser.add_argument('--operaciones', type=int, default=200)
+    parser.add_argument('--usuarios', type=int, default=100)
+    parser.add_argument('--semilla', type=int, default=None,
+                        help='Elegir los usuarios de forma reproducible')
+    args = parser.parse_args()
+
+    print(f"🏁 {args.hilos} hilos x {args.operaciones} operaciones\n")
+    print(f"{'Perfil':<22} {'Tiempo':>9} {'Throughput':>14} {'Escrituras':>10} {'Errores':>8}")
+    base = ejecutar('Config (por defecto)', Config, args.hilos, args.operaciones, args.usuarios, args.semilla)
+    tuned = ejecutar('SQLiteProduccionConfig', SQLiteProduccionConfig,
+                     args.hilos, args.operaciones, args.usuarios, args.semilla)
+    print(f"\nMejora de throughput: x{tuned / base:.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+"""
+Caché en memoria con TTL, stale-while-revalidate y recálculo single-flight
+"""
+import threading
+import time
+from flask import current_app
+
+
+class CacheTTL:
+    """
+    Guarda el resultado de una función costosa.
+    - Dentro del TTL se sirve el valor guardado.
+    - Vencido el TTL pero dentro de la ventana 'stale' se sirve el valor
+      viejo y se recalcula en un hilo de fondo.
+    - Sin valor (o pasada la ventana) se recalcula en la petición.
+    Solo un hilo recalcula a la vez; el resto espera o sirve el valor viejo.
+    """
+
+    def __init__(self, calcular, ttl=60, stale=300):
+        self.calcular = calcular
+        self.ttl = ttl
+        self.stale = stale
+        self._valor = None
+        self._calculado_en = None
+        self._generacion = 0
+        self._lock = threading.Lock()
+
+    def _edad(self):
+        if self._calculado_en is None:
+            return None
+        return time.monotonic() - self._calculado_en
+
+    def _guardar(self, valor, generacion):
+        # Si se invalidó durante el cálculo, el resultado puede estar desactualizado
+        if generacion == self._generacion:
+            self._valor = valor
+            self._calculado_en = time.monotonic()
+
+    def obtener(self):
+        """Devuelve el valor cacheado, recalculándolo si hace falta"""
+        edad = self._edad()
+        if edad is not None:
+            if edad < self.ttl:
+                return self._valor
+            if edad < self.ttl + self.stale:
+                self._refrescar_en_segundo_plano()
+                return self._valor
+        return self._recalcular()
+
+    def _recalcular(self):
+        with self._lock:
+            # Otro hilo pudo haberlo recalculado mientras esperábamos
+            edad = self._edad()
+            if edad is not None and edad < self.ttl:
+                return self._valor
+            generacion = self._generacion
+            valor = self.calcular()
+            self._guardar(valor, generacion)
+            return valor
+
+    def _refrescar_en_segundo_plano(self):
+        if not self._lock.acquire(blocking=False):
+            return  # Ya hay un recálculo en curso
+        app = current_app._get_current_object()
+        generacion = self._generacion
+
+        def tarea():
+            try:
+                with app.app_context():
+                    self._guardar(self.calcular(), generacion)
+            finally:
+                self._lock.release()
+
+        try:
+            threading.Thread(target=tarea, daemon=True).start()
+        except RuntimeError:
+            self._lock.release()
+
+    def invalidar(self):
+        """Descarta el valor guardado; la próxima lectura lo recalcula"""
+        self._generacion += 1
+        self._calculado_en = None
@@ -0,0 +1,131 @@
+"""
+Comandos de línea (flask <comando>) para tareas de mantenimiento
+"""
+import time
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from database import sincronizar_replicas
+from eventos import procesar_pendientes, limpiar_procesados
+from logros import otorgar_en_bloque
+from models import db, Achievement
+from progresion import recalcular_niveles
+from utils import reconstruir_impactos, reconstruir_stats, reconstruir_casino, asignar_misiones_lote
+
+
+@click.command('reconstruir-impacto')
+@click.option('--user-id', type=int, default=None, help='Reconstruir solo este usuario.')
+@with_appcontext
+def reconstruir_impacto_command(user_id):
+    """Recalcula el impacto ambiental acumulado desde el historial de reciclaje."""
+    total = reconstruir_impactos(user_id)
+    click.echo(f'✅ Impacto ambiental recalculado para {total} usuarios.')
+
+
+@click.command('reconstruir-stats')
+@click.option('--user-id', type=int, default=None, help='Reconstruir solo este usuario.')
+@with_appcontext
+def reconstruir_stats_command(user_id):
+    """Recalcula los contadores de actividad (user_stats) desde el historial."""
+    total = reconstruir_stats(user_id)
+    click.echo(f'✅ Contadores de actividad recalculados para {total} usuarios.')
+
+
+@click.command('reconstruir-casino')
+@click.option('--user-id', type=int, default=None, help='Reconstruir solo este usuario.')
+@with_appcontext
+def reconstruir_casino_command(user_id):
+    """Recalcula los totales de casino (user_casino) desde el historial de juegos."""
+    total = reconstruir_casino(user_id)
+    click.echo(f'✅ Totales de casino recalculados para {total} usuarios.')
+
+
+@click.command('recalcular-niveles')
+@with_appcontext
+def recalcular_niveles_command():
+    """Reasigna el nivel de todos los usuarios tras cambiar los umbrales."""
+    total = recalcular_niveles()
+    click.echo(f'✅ Nivel actualizado para {total} usuarios.')
+
+
+@click.command('otorgar-logros')
+@click.option('--criterio', 'criterios', multiple=True,
+              help='Criterio a evaluar (repetible). Por defecto, todos.')
+@click.option('--lote', type=int, default=1000, help='Usuarios por INSERT y por commit.')
+@click.option('--dry-run', is_flag=True, help='Solo contar, sin otorgar.')
+@with_appcontext
+def otorgar_logros_command(criterios, lote, dry_run):
+    """Otorga en bloque los logros que ya cumplen los usuarios (requiere user_stats al día)."""
+    def al_avanzar(logro, hasta, max_id, n):
+        click.echo(f'   {logro.nombre}: usuarios hasta #{hasta} de {max_id} (+{n})')
+
+    resultado = otorgar_en_bloque(criterios or None, tamano_lote=lote, simular=dry_run, al_avanzar=al_avanzar)
+    verbo = 'se otorgarían' if dry_run else 'otorgados'
+    for logro_id, total in resultado.items():
+        click.echo(f'🏆 {db.session.get(Achievement, logro_id).nombre}: {total} {verbo}.')
+    if not resultado:
+        click.echo('No hay logros con reglas evaluables para esos criterios.')
+
+
+@click.command('asignar-misiones')
+@with_appcontext
+def asignar_misiones_command():
+    """Materializa en bloque las misiones del día y de la semana (opcional, para reportes)."""
+    creadas = asignar_misiones_lote()
+    db.session.commit()
+    click.echo(f'✅ {creadas} misiones asignadas.')
+
+
+@click.command('procesar-eventos')
+@click.option('--lote', type=int, default=100, help='Eventos por commit.')
+@click.option('--continuo', is_flag=True, help='Seguir atendiendo eventos nuevos (worker).')
+@click.option('--intervalo', type=float, default=1.0, help='Espera entre lotes vacíos, en segundos.')
+@with_appcontext
+def procesar_eventos_command(lote, continuo, intervalo):
+    """Procesa los eventos de dominio pendientes (misiones y logros)."""
+    while True:
+        resultados = procesar_pendientes(limite=lote)
+        if resultados:
+            click.echo(f'⚙️ {len(resultados)} eventos procesados.')
+        if not continuo:
+            break
+        if len(resultados) < lote:
+            time.sleep(intervalo)
+
+
+@click.command('limpiar-eventos')
+@click.option('--dias', type=int, default=None,
+              help='Conservar los eventos procesados en los últimos N días (por defecto EVENTOS_RETENCION_DIAS).')
+@click.option('--lote', type=int, default=10000, help='Filas por DELETE y por commit.')
+@with_appcontext
+def limpiar_eventos_command(dias, lote):
+    """Borra los eventos de dominio ya procesados más antiguos que la retención."""
+    total = limpiar_procesados(dias, lote)
+    click.echo(f'🧹 {total} eventos procesados eliminados.')
+
+
+@click.command('sincronizar-replica')
+@click.option('--intervalo', type=float, default=None,
+              help='Repetir cada N segundos (por defecto se copia una sola vez).')
+@with_appcontext
+def sincronizar_replica_command(intervalo):
+    """Copia la base SQLite primaria sobre las réplicas de solo lectura."""
+    while True:
+        for ruta in sincronizar_replicas(current_app):
+            click.echo(f'🔁 Réplica actualizada: {ruta}')
+        if intervalo is None:
+            break
+        time.sleep(intervalo)
+
+
+def register_commands(app):
+    """Registra los comandos de mantenimiento en la CLI de Flask"""
+    app.cli.add_command(reconstruir_impacto_command)
+    app.cli.add_command(reconstruir_stats_command)
+    app.cli.add_command(reconstruir_casino_command)
+    app.cli.add_command(recalcular_niveles_command)
+    app.cli.add_command(otorgar_logros_command)
+    app.cli.add_command(asignar_misiones_command)
+    app.cli.add_command(procesar_eventos_command)
+    app.cli.add_command(limpiar_eventos_command)
+    app.cli.add_command(sincronizar_replica_command)
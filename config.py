@@ -1,5 +1,11 @@
 import os
 
+
+def _replicas_desde_entorno():
+    urls = [u.strip() for u in (os.environ.get('DATABASE_REPLICA_URLS') or '').split(',') if u.strip()]
+    return {f'replica_{i}': url for i, url in enumerate(urls, 1)}
+
+
 class Config:
     """Configuración de la aplicación Flask"""
     
@@ -12,9 +18,45 @@ class Config:
     
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     
+    # Réplicas de solo lectura: DATABASE_REPLICA_URLS separadas por comas
+    SQLALCHEMY_BINDS = _replicas_desde_entorno()
+    DB_REPLICAS = list(SQLALCHEMY_BINDS)
+    # Segundos que un usuario lee de la primaria tras escribir (lee sus propias escrituras)
+    DB_REPLICA_LECTURA_PROPIA = int(os.environ.get('DB_REPLICA_LECTURA_PROPIA') or 10)
+    
+    # PRAGMA aplicados a cada conexión SQLite (None = valores por defecto)
+    SQLITE_PRAGMAS = None
+    
+    # Caché de estadísticas globales (segundos)
+    STATS_CACHE_TTL = int(os.environ.get('STATS_CACHE_TTL') or 60)
+    STATS_CACHE_STALE = int(os.environ.get('STATS_CACHE_STALE') or 300)
+    
+    # Eventos de dominio: 'peticion' los procesa al final de cada petición,
+    # 'worker' los deja a 'flask procesar-eventos' (la petición hace un solo commit)
+    EVENTOS_MODO = os.environ.get('EVENTOS_MODO') or 'peticion'
+    EVENTOS_MAX_INTENTOS = 5
+    EVENTOS_RETENCION_DIAS = int(os.environ.get('EVENTOS_RETENCION_DIAS') or 30)  # flask limpiar-eventos
+    
+    # Catálogo de misiones activas en memoria (segundos)
+    MISIONES_CACHE_TTL = int(os.environ.get('MISIONES_CACHE_TTL') or 300)
+    
+    # Rankings materializados en memoria
+    RANKING_TOP_N = 20
+    RANKING_CACHE_TTL = int(os.environ.get('RANKING_CACHE_TTL') or 300)
+    
+    # Generadores aleatorios (aleatorio.py): 'sistema' o 'semilla' (reproducible)
+    ALEATORIO_MODO = os.environ.get('ALEATORIO_MODO') or 'sistema'
+    ALEATORIO_SEMILLA = int(os.environ.get('ALEATORIO_SEMILLA') or 0)
+    ALEATORIO_FLUJOS_SEGUROS = ('cupones',)  # siempre CSPRNG
+    
+    # Configuración de reciclaje
+    RECICLAJE_MAX_CANTIDAD = 100  # unidades por línea
+    RECICLAJE_MAX_LINEAS = 20  # materiales por entrega
+    
     # Configuración de casino
     CASINO_MIN_BET = 10
     CASINO_MAX_BET_PERCENT = 0.30  # 30% del saldo
+    CASINO_AUTOPLAY_MAX_RONDAS = 100  # rondas por petición de autoplay
     
     # Configuración de niveles
     NIVELES = {
@@ -25,6 +67,8 @@ class Config:
         'Líder Sostenible': 1001,
         'Eco Maestro': 1501
     }
+    # Los umbrales de la tabla niveles (si tiene filas) se releen cada tantos segundos
+    NIVELES_CACHE_TTL = int(os.environ.get('NIVELES_CACHE_TTL') or 300)
     
     # Configuración de Correo (Asegúrese de usar variables de entorno en producción)
     MAIL_SERVER = os.environ.get('MAIL_SERVER') or 'smtp.googlemail.com'
@@ -76,4 +120,54 @@ class Config:
             ('teologia', 'Teología'),
             ('historia', 'Historia')
         ]
-    }
\ No newline at end of file
+    }
+
+
+class SQLiteProduccionConfig(Config):
+    """Perfil de producción para SQLite: WAL y esperas en vez de 'database is locked'"""
+    SQLITE_PRAGMAS = {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'busy_timeout': int(os.environ.get('SQLITE_BUSY_TIMEOUT') or 10000),  # ms
+        'mmap_size': 256 * 1024 * 1024,
+        'cache_size': -64000,  # ~64 MB
+        'temp_store': 'MEMORY',
+        'foreign_keys': 'ON'
+    }
+
+
+def _url_postgres():
+    # Heroku y otros proveedores entregan 'postgres://', que SQLAlchemy ya no acepta
+    url = os.environ.get('DATABASE_URL') or 'postgresql://localhost/uca_verde'
+    if url.startswith('postgres://'):
+        url = url.replace('postgres://', 'postgresql://', 1)
+    return url
+
+
+class PostgresConfig(Config):
+    """Perfil para PostgreSQL con pool de conexiones configurable por entorno"""
+    SQLALCHEMY_DATABASE_URI = _url_postgres()
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        'pool_size': int(os.environ.get('DB_POOL_SIZE') or 10),
+        'max_overflow': int(os.environ.get('DB_MAX_OVERFLOW') or 20),
+        'pool_timeout': int(os.environ.get('DB_POOL_TIMEOUT') or 30),  # segundos
+        'pool_recycle': int(os.environ.get('DB_POOL_RECYCLE') or 1800),  # segundos
+        'pool_pre_ping': True,
+        'connect_args': {
+            'options': '-c statement_timeout=%d' % int(os.environ.get('DB_STATEMENT_TIMEOUT') or 5000)  # ms
+        }
+    }
+
+
+# Perfiles seleccionables con la variable de entorno APP_CONFIG
+CONFIGURACIONES = {
+    'default': Config,
+    'sqlite_produccion': SQLiteProduccionConfig,
+    'postgres': PostgresConfig
+}
+
+
+def obtener_config(nombre=None):
+    """Devuelve la clase de configuración por nombre (o desde APP_CONFIG)"""
+    nombre = nombre or os.environ.get('APP_CONFIG') or 'default'
+    return CONFIGURACIONES[nombre]
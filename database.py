@@ -0,0 +1,124 @@
+"""
+Configuración de los motores de base de datos: pragmas de SQLite por conexión
+y enrutamiento de lecturas hacia réplicas de solo lectura.
+"""
+import sqlite3
+import time
+from contextlib import contextmanager
+from functools import wraps
+from flask import current_app, g, has_app_context, session
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+from aleatorio import obtener_rng
+
+# Clave de la sesión de Flask con el instante hasta el que el usuario lee de la primaria
+CLAVE_LECTURA_PROPIA = '_leer_primaria_hasta'
+
+
+class SesionEnrutada(Session):
+    """Sesión que envía las lecturas de las vistas marcadas con @solo_lectura a una
+    réplica y todo lo demás (escrituras, flush, SELECT ... FOR UPDATE) a la primaria"""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and has_app_context():
+            if self._flushing or getattr(clause, 'is_dml', False):
+                g.hubo_escritura = True
+            elif g.get('replica') and _es_lectura(clause):
+                return self._db.engines[g.replica]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def _es_lectura(clause):
+    if clause is None:
+        return True
+    return getattr(clause, 'is_select', False) and getattr(clause, '_for_update_arg', None) is None
+
+
+def solo_lectura(f):
+    """Decorator: las consultas de la vista se leen de una réplica, salvo que el
+    usuario haya escrito hace poco (lee sus propias escrituras desde la primaria)"""
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        replicas = current_app.config.get('DB_REPLICAS')
+        if replicas and session.get(CLAVE_LECTURA_PROPIA, 0) < time.time():
+            g.replica = obtener_rng('replicas').choice(replicas)
+        return f(*args, **kwargs)
+    return decorated_function
+
+
+@contextmanager
+def leer_de_primaria():
+    """Fuerza la lectura desde la primaria dentro del bloque (p. ej. al llenar cachés)"""
+    if not has_app_context():
+        yield
+        return
+    replica = g.pop('replica', None)
+    try:
+        yield
+    finally:
+        if replica is not None:
+            g.replica = replica
+
+
+def _marcar_lectura_propia(response):
+    if g.get('hubo_escritura'):
+        session[CLAVE_LECTURA_PROPIA] = time.time() + current_app.config['DB_REPLICA_LECTURA_PROPIA']
+    return response
+
+
+def aplicar_pragmas_sqlite(engine, pragmas):
+    """Ejecuta los PRAGMA indicados en cada conexión nueva del motor"""
+    @event.listens_for(engine, 'connect')
+    def _al_conectar(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for nombre, valor in pragmas.items():
+            cursor.execute(f'PRAGMA {nombre}={valor}')
+        cursor.close()
+
+
+def configurar_motores(app):
+    """Aplica la configuración por conexión a todos los motores de la app"""
+    from models import db
+    pragmas = app.config.get('SQLITE_PRAGMAS') or {}
+    replicas = app.config.get('DB_REPLICAS') or []
+    for clave, engine in db.engines.items():
+        if engine.dialect.name != 'sqlite':
+            continue
+        pragmas_motor = dict(pragmas)
+        if clave in replicas:
+            # Una réplica nunca debe recibir escrituras por error
+            pragmas_motor['query_only'] = 'ON'
+        if pragmas_motor:
+            aplicar_pragmas_sqlite(engine, pragmas_motor)
+
+    if replicas:
+        app.after_request(_marcar_lectura_propia)
+
+
+def sincronizar_replicas(app):
+    """Copia la base SQLite primaria sobre cada réplica SQLite (API de backup de sqlite3).
+
+    Devuelve la lista de rutas actualizadas. Las réplicas de otros motores se
+    sincronizan con la replicación propia del servidor y se ignoran aquí.
+    """
+    from models import db
+    primaria = db.engines[None].url
+    if primaria.get_backend_name() != 'sqlite' or primaria.database in (None, '', ':memory:'):
+        raise ValueError('La sincronización de réplicas requiere una base SQLite en archivo.')
+
+    actualizadas = []
+    origen = sqlite3.connect(primaria.database)
+    try:
+        for clave in app.config.get('DB_REPLICAS') or []:
+            url = db.engines[clave].url
+            if url.get_backend_name() != 'sqlite':
+                continue
+            destino = sqlite3.connect(url.database)
+            try:
+                origen.backup(destino)
+            finally:
+                destino.close()
+            actualizadas.append(url.database)
+    finally:
+        origen.close()
+    return actualizadas
@@ -0,0 +1,136 @@
+"""
+Eventos de dominio con bandeja de salida (outbox).
+
+Las rutas solo registran el evento dentro de su propia transacción (p. ej.
+User.agregar_puntos). Un despachador aplica después el progreso de misiones
+y los logros, en lote al final de la petición (EVENTOS_MODO='peticion') o en
+un worker aparte (EVENTOS_MODO='worker', flask procesar-eventos).
+"""
+import json
+from datetime import timedelta
+from flask import current_app, flash, g, has_request_context
+from flask_babel import gettext as _
+from flask_login import current_user
+from models import db, EventoDominio, User, get_current_time
+from logros import verificar_logros
+from utils import actualizar_progreso_mision
+
+
+def emitir_evento(user_id, tipo, cantidad=1, datos=None):
+    """Agrega el evento a la sesión actual; se guarda con el mismo commit que lo originó"""
+    db.session.add(EventoDominio(
+        user_id=user_id,
+        tipo=tipo,
+        cantidad=cantidad,
+        datos_json=json.dumps(datos) if datos else None
+    ))
+    if has_request_context():
+        g.setdefault('usuarios_con_eventos', set()).add(user_id)
+
+
+def procesar_evento(evento):
+    """Aplica un evento: avanza misiones y verifica logros. Devuelve (misiones, logros)"""
+    user = db.session.get(User, evento.user_id)
+    misiones = actualizar_progreso_mision(user, evento.tipo, evento.cantidad, commit=False)
+    logros = verificar_logros(user, evento.tipo)
+    return misiones, logros
+
+
+def procesar_pendientes(user_id=None, limite=100):
+    """
+    Procesa en orden los eventos pendientes (de un usuario o de todos) y hace
+    un único commit. Entrega al menos una vez: si el proceso cae antes del
+    commit, los eventos siguen pendientes y se reintentan. Los eventos que
+    nacen al procesar (p. ej. la recompensa de una misión) se atienden en la
+    misma llamada. Devuelve una lista de (evento, misiones, logros).
+    """
+    max_intentos = current_app.config['EVENTOS_MAX_INTENTOS']
+    resultados = []
+    ultimo_id = 0
+    procesados = 0
+
+    while procesados < limite:
+        consulta = EventoDominio.query.filter(
+            EventoDominio.procesado == False,
+            EventoDominio.intentos < max_intentos,
+            EventoDominio.id > ultimo_id
+        )
+        if user_id is not None:
+            consulta = consulta.filter(EventoDominio.user_id == user_id)
+        eventos = consulta.order_by(EventoDominio.id)\
+            .limit(limite - procesados)\
+            .with_for_update(skip_locked=True)\
+            .all()
+        if not eventos:
+            break
+
+        for evento in eventos:
+            ultimo_id = evento.id
+            procesados += 1
+            evento.intentos += 1
+            try:
+                with db.session.begin_nested():
+                    misiones, logros = procesar_evento(evento)
+            except Exception as e:
+                evento.error = str(e)[:500]
+                current_app.logger.exception('Error al procesar el evento %s', evento.id)
+                continue
+            evento.procesado = True
+            evento.fecha_procesado = get_current_time()
+            resultados.append((evento, misiones, logros))
+
+    db.session.commit()
+    return resultados
+
+
+def limpiar_procesados(dias=None, lote=10000):
+    """
+    Borra los eventos procesados hace más de 'dias' (por defecto
+    EVENTOS_RETENCION_DIAS), en lotes de 'lote' filas con un commit por lote.
+    Los pendientes y los fallidos se conservan. Devuelve la cantidad borrada.
+    """
+    if dias is None:
+        dias = current_app.config['EVENTOS_RETENCION_DIAS']
+    corte = get_current_time() - timedelta(days=dias)
+    borrados = 0
+    while True:
+        ids = [i for (i,) in db.session.query(EventoDominio.id).filter(
+            EventoDominio.procesado == True,
+            EventoDominio.fecha_procesado < corte
+        ).order_by(EventoDominio.id).limit(lote)]
+        if not ids:
+            return borrados
+        EventoDominio.query.filter(EventoDominio.id.in_(ids)).delete(synchronize_session='fetch')
+        db.session.commit()
+        borrados += len(ids)
+
+
+def _notificar(misiones, logros):
+    for mision in misiones:
+        flash(_('¡Misión cumplida: %(nombre)s! Recompensa: %(puntos)s puntos.',
+                nombre=mision.nombre, puntos=mision.recompensa_puntos), 'success')
+    for logro in logros:
+        flash(f'🏆 ¡Nuevo logro desbloqueado: {logro.nombre}!', 'success')
+
+
+def _despachar_al_final(response):
+    """after_request: procesa en lote los eventos emitidos durante la petición"""
+    usuarios = g.pop('usuarios_con_eventos', None)
+    if not usuarios:
+        return response
+    try:
+        for user_id in usuarios:
+            for _evento, misiones, logros in procesar_pendientes(user_id=user_id):
+                if current_user.is_authenticated and current_user.id == user_id:
+                    _notificar(misiones, logros)
+    except Exception:
+        # Los eventos quedan pendientes y se reintentan en la siguiente petición o en el worker
+        db.session.rollback()
+        current_app.logger.exception('No se pudieron procesar los eventos de la petición')
+    return response
+
+
+def registrar_despachador(app):
+    """Procesa los eventos al final de cada petición salvo que haya un worker dedicado"""
+    if app.config['EVENTOS_MODO'] == 'peticion':
+        app.after_request(_despachar_al_final)
@@ -1,5 +1,5 @@
 from app import create_app  # <--- IMPORTAMOS LA FÁBRICA, NO LA APP DIRECTAMENTE
-from models import db, User, Transaction, UserReward, UserAchievement, UserQuiz, UserMision, CasinoGame
+from models import db, User, Transaction, UserReward, UserAchievement, UserQuiz, UserMision, CasinoGame, UserImpact, UserStats, UserCasino, RecyclingEntry, EventoDominio
 
 # Inicializamos la app usando la fábrica
 app = create_app()
@@ -23,12 +23,17 @@ def limpiar_usuarios():
                 
                 try:
                     # 1. Borrar historial (Tablas hijas)
+                    RecyclingEntry.query.filter_by(user_id=u.id).delete()
                     Transaction.query.filter_by(user_id=u.id).delete()
                     UserReward.query.filter_by(user_id=u.id).delete()
                     UserAchievement.query.filter_by(user_id=u.id).delete()
                     UserQuiz.query.filter_by(user_id=u.id).delete()
                     UserMision.query.filter_by(user_id=u.id).delete()
                     CasinoGame.query.filter_by(user_id=u.id).delete()
+                    UserImpact.query.filter_by(user_id=u.id).delete()
+                    UserStats.query.filter_by(user_id=u.id).delete()
+                    UserCasino.query.filter_by(user_id=u.id).delete()
+                    EventoDominio.query.filter_by(user_id=u.id).delete()
                     
                     # 2. Borrar al usuario padre
                     db.session.delete(u)
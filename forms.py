@@ -1,5 +1,5 @@
 from flask_wtf import FlaskForm
-from wtforms import StringField, PasswordField, SubmitField, SelectField, IntegerField, TextAreaField
+from wtforms import Form, FieldList, FormField, StringField, PasswordField, SubmitField, SelectField, IntegerField, TextAreaField
 from wtforms.validators import DataRequired, Email, EqualTo, ValidationError, NumberRange, Length
 from models import User
 from flask_babel import lazy_gettext as _l
@@ -70,6 +70,18 @@ class ReciclajeForm(FlaskForm):
     submit = SubmitField(_l('Registrar Reciclaje'))
 
 
+class LineaReciclajeForm(Form):
+    """Una línea (material y cantidad) de una entrega de reciclaje"""
+    material_id = SelectField(_l('Material'), coerce=int, validators=[DataRequired()])
+    cantidad = IntegerField(_l('Cantidad'), validators=[DataRequired(), NumberRange(min=1, max=Config.RECICLAJE_MAX_CANTIDAD)])
+
+
+class ReciclajeLoteForm(FlaskForm):
+    """Formulario de Reciclaje con varios materiales en una entrega"""
+    lineas = FieldList(FormField(LineaReciclajeForm), min_entries=1, max_entries=Config.RECICLAJE_MAX_LINEAS)
+    submit = SubmitField(_l('Registrar Entrega'))
+
+
 class CanjeForm(FlaskForm):
     """Formulario de Canje de Recompensa"""
     submit = SubmitField(_l('Canjear'))
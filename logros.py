@@ -0,0 +1,151 @@
+"""
+Motor de logros basado en reglas.
+
+Cada regla se registra con @regla indicando su criterio (Achievement.criterio),
+los tipos de evento que pueden cambiar su resultado y los contadores que
+necesita. Al verificar solo se evalúan las reglas afectadas por el evento, con
+un número fijo de consultas: logros candidatos, logros ya obtenidos y la fila
+de contadores del usuario (user_stats) por clave primaria.
+
+Las reglas también declaran su condición en SQL (sobre User y UserStats) para
+otorgar un criterio a toda la base de usuarios de una vez (otorgar_en_bloque).
+"""
+from sqlalchemy import select, insert, func, literal, exists
+from models import db, Achievement, UserAchievement, UserStats, User, get_current_time
+
+# criterio -> Regla
+REGLAS = {}
+
+
+class Regla:
+    """Criterio de un logro y de qué depende"""
+    __slots__ = ('criterio', 'eventos', 'contadores', 'cumple', 'sql')
+
+    def __init__(self, criterio, eventos, contadores, cumple, sql=None):
+        self.criterio = criterio
+        self.eventos = frozenset(eventos) if eventos is not None else None  # None = cualquier evento
+        self.contadores = tuple(contadores)
+        self.cumple = cumple
+        self.sql = sql  # función sin argumentos -> condición SQL equivalente a cumple
+
+    def afectada_por(self, tipo_evento):
+        return tipo_evento is None or self.eventos is None or tipo_evento in self.eventos
+
+
+def regla(criterio, eventos=None, contadores=(), sql=None):
+    """Decorator: registra una función cumple(user, contadores) -> bool para un criterio"""
+    def registrar(cumple):
+        REGLAS[criterio] = Regla(criterio, eventos, contadores, cumple, sql)
+        return cumple
+    return registrar
+
+
+@regla('reciclaje_1', eventos={'reciclaje'}, contadores=('reciclajes',),
+       sql=lambda: UserStats.reciclajes >= 1)
+def _primer_reciclaje(user, c):
+    return c['reciclajes'] >= 1
+
+
+@regla('reciclaje_100', eventos={'reciclaje'}, contadores=('reciclajes',),
+       sql=lambda: UserStats.reciclajes >= 100)
+def _cien_reciclajes(user, c):
+    return c['reciclajes'] >= 100
+
+
+@regla('quiz_perfect_5', eventos={'quiz'}, contadores=('quizzes',),
+       sql=lambda: UserStats.quizzes >= 5)
+def _cinco_quizzes(user, c):
+    # Solo se otorgan puntos de quiz con puntaje perfecto, así que cada transacción cuenta
+    return c['quizzes'] >= 5
+
+
+@regla('racha_7', sql=lambda: User.racha_actual >= 7)
+def _racha_semanal(user, c):
+    # La racha se actualiza con cualquier acción que otorgue puntos
+    return (user.racha_actual or 0) >= 7
+
+
+def cargar_contadores(user_id, nombres):
+    """Lee los contadores pedidos (columnas de UserStats) con una búsqueda por clave primaria"""
+    nombres = set(nombres)
+    if not nombres:
+        return {}
+    db.session.flush()  # aplica los incrementos pendientes antes de leer
+    stats = db.session.get(UserStats, user_id)
+    return {n: (getattr(stats, n) or 0) if stats else 0 for n in nombres}
+
+
+def verificar_logros(user, tipo_evento=None):
+    """
+    Otorga los logros cuyas reglas se cumplen. Con tipo_evento solo se evalúan
+    las reglas que dependen de ese evento; sin él, todas. No hace commit.
+    """
+    criterios = [c for c, r in REGLAS.items() if r.afectada_por(tipo_evento)]
+    if not criterios:
+        return []
+
+    candidatos = Achievement.query.filter(Achievement.criterio.in_(criterios)).all()
+    if not candidatos:
+        return []
+
+    obtenidos = {aid for aid, in db.session.query(UserAchievement.achievement_id)
+                 .filter(UserAchievement.user_id == user.id)}
+    pendientes = [logro for logro in candidatos if logro.id not in obtenidos]
+    if not pendientes:
+        return []
+
+    contadores = cargar_contadores(
+        user.id, (n for logro in pendientes for n in REGLAS[logro.criterio].contadores))
+
+    logros_obtenidos = []
+    for logro in pendientes:
+        if REGLAS[logro.criterio].cumple(user, contadores):
+            db.session.add(UserAchievement(user_id=user.id, achievement_id=logro.id, progreso=100))
+            logros_obtenidos.append(logro)
+    return logros_obtenidos
+
+
+def _candidatos(logro, desde, hasta):
+    """SELECT de los usuarios en (desde, hasta] que cumplen la regla y aún no tienen el logro"""
+    ya_tiene = exists().where(
+        UserAchievement.user_id == User.id,
+        UserAchievement.achievement_id == logro.id
+    )
+    return select(User.id)\
+        .outerjoin(UserStats, UserStats.user_id == User.id)\
+        .where(REGLAS[logro.criterio].sql(), ~ya_tiene, User.id > desde, User.id <= hasta)
+
+
+def otorgar_en_bloque(criterios=None, tamano_lote=1000, simular=False, al_avanzar=None):
+    """
+    Otorga logros a toda la base de usuarios con SQL por conjuntos: por cada
+    logro, un INSERT ... SELECT por ventana de tamano_lote ids de usuario y un
+    commit por ventana. Con simular=True solo cuenta. al_avanzar(logro, hasta,
+    max_id, n) se llama tras cada ventana. Devuelve {id del logro: otorgados}.
+    Requiere user_stats al día (flask reconstruir-stats).
+    """
+    consulta = Achievement.query.order_by(Achievement.id)
+    if criterios:
+        consulta = consulta.filter(Achievement.criterio.in_(criterios))
+    logros = [l for l in consulta if l.criterio in REGLAS and REGLAS[l.criterio].sql is not None]
+
+    max_id = db.session.query(func.max(User.id)).scalar() or 0
+    resultado = {}
+    for logro in logros:
+        otorgados = 0
+        for desde in range(0, max_id, tamano_lote):
+            hasta = desde + tamano_lote
+            candidatos = _candidatos(logro, desde, hasta)
+            if simular:
+                n = db.session.execute(select(func.count()).select_from(candidatos.subquery())).scalar()
+            else:
+                seleccion = candidatos.with_only_columns(
+                    User.id, literal(logro.id), literal(100), literal(get_current_time()))
+                n = db.session.execute(insert(UserAchievement).from_select(
+                    ['user_id', 'achievement_id', 'progreso', 'fecha_obtencion'], seleccion)).rowcount
+                db.session.commit()
+            otorgados += n
+            if al_avanzar:
+                al_avanzar(logro, min(hasta, max_id), max_id, n)
+        resultado[logro.id] = otorgados
+    return resultado
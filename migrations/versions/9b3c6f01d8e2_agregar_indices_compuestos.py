@@ -0,0 +1,41 @@
+"""Agregar indices compuestos para las consultas frecuentes
+
+Revision ID: 9b3c6f01d8e2
+Revises: 5d7e2b90a1f4
+Create Date: 2026-10-18 14:21:09.552731
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '9b3c6f01d8e2'
+down_revision = '5d7e2b90a1f4'
+branch_labels = None
+depends_on = None
+
+# (nombre, tabla, columnas)
+INDICES = [
+    ('ix_users_is_admin_puntos_historicos', 'users', ['is_admin', 'puntos_historicos']),
+    ('ix_users_is_admin_fecha_registro', 'users', ['is_admin', 'fecha_registro']),
+    ('ix_transactions_user_id_tipo_fecha', 'transactions', ['user_id', 'tipo', 'fecha']),
+    ('ix_transactions_user_id_fecha', 'transactions', ['user_id', 'fecha']),
+    ('ix_transactions_fecha', 'transactions', ['fecha']),
+    ('ix_user_rewards_user_id_fecha_canje', 'user_rewards', ['user_id', 'fecha_canje']),
+    ('ix_user_rewards_fecha_canje', 'user_rewards', ['fecha_canje']),
+    ('ix_user_achievements_user_id_achievement_id', 'user_achievements', ['user_id', 'achievement_id']),
+    ('ix_casino_games_user_id_fecha', 'casino_games', ['user_id', 'fecha']),
+    ('ix_user_quizzes_user_id_quiz_id', 'user_quizzes', ['user_id', 'quiz_id']),
+    ('ix_user_misiones_user_id_completada_fecha', 'user_misiones', ['user_id', 'completada', 'fecha_asignacion']),
+]
+
+
+def upgrade():
+    # Los índices pueden existir ya si db.create_all() creó la tabla
+    for nombre, tabla, columnas in INDICES:
+        op.create_index(nombre, tabla, columnas, unique=False, if_not_exists=True)
+
+
+def downgrade():
+    for nombre, tabla, _ in reversed(INDICES):
+        op.drop_index(nombre, table_name=tabla, if_exists=True)
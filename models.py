@@ -1,18 +1,71 @@
-from datetime import datetime, timezone
+import json
+from datetime import datetime, timedelta, timezone
 from flask import current_app
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import UserMixin
 from werkzeug.security import generate_password_hash, check_password_hash
 from itsdangerous import URLSafeTimedSerializer as Serializer
+from sqlalchemy import inspect, update, case, or_, func, insert, literal, select
+from sqlalchemy.sql import ClauseElement
+from database import SesionEnrutada
 
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={'class_': SesionEnrutada})
 
 def get_current_time():
     return datetime.now(timezone.utc)
 
+
+def sumar_en_sql(objeto, campo, delta):
+    """Incrementa un contador como 'campo = campo + delta' en SQL (sin perder
+    escrituras concurrentes). Se acumula con otro incremento aún no guardado y
+    en objetos nuevos suma en Python."""
+    if not inspect(objeto).persistent:
+        setattr(objeto, campo, (getattr(objeto, campo) or 0) + delta)
+        return
+    pendiente = objeto.__dict__.get(campo)
+    base = pendiente if isinstance(pendiente, ClauseElement) else getattr(type(objeto), campo)
+    setattr(objeto, campo, base + delta)
+
+
+def maximo_en_sql(objeto, campo, valor):
+    """Como sumar_en_sql, pero deja el mayor entre el valor guardado y 'valor'
+    ('campo = CASE WHEN campo < valor THEN valor ELSE campo END')"""
+    if not inspect(objeto).persistent:
+        setattr(objeto, campo, max(getattr(objeto, campo) or 0, valor))
+        return
+    pendiente = objeto.__dict__.get(campo)
+    base = pendiente if isinstance(pendiente, ClauseElement) else getattr(type(objeto), campo)
+    setattr(objeto, campo, case((base < valor, valor), else_=base))
+
+
+def insertar_si_no_existe(modelo):
+    """INSERT que no hace nada si la clave ya existe (ON CONFLICT DO NOTHING en
+    SQLite y PostgreSQL), para crear filas de resumen sin chocar con otra petición"""
+    dialecto = db.session.get_bind().dialect.name
+    if dialecto == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert as insert_dialecto
+    elif dialecto == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert as insert_dialecto
+    else:
+        return insert(modelo).prefix_with('IGNORE')  # MySQL / MariaDB
+    return insert_dialecto(modelo).on_conflict_do_nothing()
+
+
+# Contador de UserStats que incrementa cada tipo de transacción
+CONTADOR_POR_TIPO = {
+    'reciclaje': 'reciclajes',
+    'quiz': 'quizzes',
+    'evento': 'eventos',
+    'canje': 'canjes',
+}
+
 class User(UserMixin, db.Model):
     """Modelo de Usuario"""
     __tablename__ = 'users'
+    __table_args__ = (
+        db.Index('ix_users_is_admin_puntos_historicos', 'is_admin', 'puntos_historicos'),
+        db.Index('ix_users_is_admin_fecha_registro', 'is_admin', 'fecha_registro'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     username = db.Column(db.String(80), unique=True, nullable=False)
@@ -39,6 +92,9 @@ class User(UserMixin, db.Model):
     juegos_casino = db.relationship('CasinoGame', backref='jugador', lazy='dynamic')
     quizzes_completados = db.relationship('UserQuiz', backref='estudiante', lazy='dynamic')
     misiones = db.relationship('UserMision', backref='usuario', lazy='dynamic')
+    impacto = db.relationship('UserImpact', backref='usuario', uselist=False)
+    stats = db.relationship('UserStats', backref='usuario', uselist=False)
+    casino = db.relationship('UserCasino', backref='usuario', uselist=False)
     
     @property
     def is_active(self):
@@ -68,11 +124,8 @@ class User(UserMixin, db.Model):
     
     def actualizar_nivel(self):
         """Actualizar nivel según puntos"""
-        from config import Config
-        for nivel, puntos_min in sorted(Config.NIVELES.items(), key=lambda x: x[1], reverse=True):
-            if self.puntos_totales >= puntos_min:
-                self.nivel = nivel
-                break
+        from progresion import obtener_niveles
+        self.nivel = obtener_niveles().nivel(self.puntos_totales)
     
     def actualizar_racha(self):
         """Actualizar racha de días consecutivos"""
@@ -95,34 +148,162 @@ class User(UserMixin, db.Model):
         
         self.ultima_actividad = get_current_time()
     
-    def agregar_puntos(self, cantidad, tipo, descripcion):
-        """Agregar puntos y registrar transacción"""
-        self.puntos_totales += cantidad
+    def registrar_actividad(self):
+        """
+        Actualiza la racha en páginas de solo lectura: como máximo un UPDATE
+        condicional por usuario y día, sin ensuciar el objeto. Devuelve True si
+        escribió (el llamador hace commit).
+        """
+        ahora = get_current_time()
+        if self.ultima_actividad and self.ultima_actividad.date() == ahora.date():
+            return False
+        inicio_hoy = ahora.replace(hour=0, minute=0, second=0, microsecond=0)
+        resultado = db.session.execute(
+            update(User)
+            .where(User.id == self.id,
+                   or_(User.ultima_actividad.is_(None), User.ultima_actividad < inicio_hoy))
+            .values(
+                racha_actual=case(
+                    (User.ultima_actividad >= inicio_hoy - timedelta(days=1),
+                     func.coalesce(User.racha_actual, 0) + 1),
+                    else_=1
+                ),
+                ultima_actividad=ahora
+            )
+            .execution_options(synchronize_session=False)
+        )
+        # Se releen al usarse; si otra petición ganó la carrera, también
+        db.session.expire(self, ['racha_actual', 'ultima_actividad'])
+        return resultado.rowcount > 0
+    
+    def registrar_impacto(self, material, cantidad):
+        """Acumular el impacto ambiental de un reciclaje en el resumen del usuario"""
+        co2 = (material.impacto_co2 or 0) * cantidad
+        agua = (material.impacto_agua or 0) * cantidad
+        
+        if self.impacto is None:
+            self.impacto = UserImpact(
+                co2_evitado=co2,
+                agua_ahorrada=agua,
+                items_reciclados=cantidad
+            )
+        else:
+            # Incrementos en SQL para no perder actualizaciones concurrentes
+            sumar_en_sql(self.impacto, 'co2_evitado', co2)
+            sumar_en_sql(self.impacto, 'agua_ahorrada', agua)
+            sumar_en_sql(self.impacto, 'items_reciclados', cantidad)
+            self.impacto.fecha_actualizacion = get_current_time()
+    
+    def incrementar_stats(self, **deltas):
+        """Incrementa los contadores de actividad (user_stats) en la misma transacción"""
+        if self.stats is None:
+            self.stats = UserStats()
+        for campo, delta in deltas.items():
+            if delta:
+                sumar_en_sql(self.stats, campo, delta)
+        self.stats.fecha_actualizacion = get_current_time()
+    
+    def registrar_casino(self, tipo_juego, apostado, ganancias):
+        """Acumula jugadas de casino en el resumen (user_casino) y los contadores
+        (user_stats) en la misma transacción. apostado: total apostado;
+        ganancias: ganancia neta de cada ronda"""
+        ganancias = list(ganancias)
+        if not ganancias:
+            return
+        self.incrementar_stats(apuestas_casino=len(ganancias),
+                               victorias_casino=sum(1 for g in ganancias if g > 0))
+        
+        if self.casino is None and inspect(self).persistent:
+            # Primera jugada: crea la fila desde el historial (si otra petición la
+            # creó antes, no hace nada) y luego suma esta jugada en SQL.
+            # Llamar antes de guardar los CasinoGame de la jugada.
+            seleccion = select(literal(self.id), *agregados_casino(), literal(get_current_time()))\
+                .where(CasinoGame.user_id == self.id)
+            db.session.execute(insertar_si_no_existe(UserCasino).from_select(
+                ['user_id', *COLUMNAS_RESUMEN_CASINO, 'fecha_actualizacion'], seleccion))
+            db.session.expire(self, ['casino'])
+        if self.casino is None:
+            self.casino = UserCasino()
+        sumar_en_sql(self.casino, f'juegos_{tipo_juego}', len(ganancias))
+        sumar_en_sql(self.casino, 'total_apostado', apostado)
+        sumar_en_sql(self.casino, 'ganancia_neta', sum(ganancias))
+        if max(ganancias) > 0:
+            maximo_en_sql(self.casino, 'mayor_ganancia', max(ganancias))
+        self.casino.fecha_actualizacion = get_current_time()
+    
+    def agregar_puntos(self, cantidad, tipo, descripcion, cantidad_evento=1, datos_evento=None,
+                       metadata=None):
+        """Agregar puntos, registrar transacción y emitir el evento de dominio
+        (cantidad_evento: unidades que cuentan para misiones, p. ej. ítems reciclados;
+        metadata: dict que se guarda en metadata_json). Devuelve la transacción."""
+        return self.agregar_puntos_lote([dict(
+            cantidad=cantidad,
+            tipo=tipo,
+            descripcion=descripcion,
+            cantidad_evento=cantidad_evento,
+            datos_evento=datos_evento,
+            metadata=metadata
+        )])[0]
+    
+    def agregar_puntos_lote(self, premios):
+        """
+        Registra varios premios (dicts con los argumentos de agregar_puntos)
+        actualizando puntos, nivel, racha y contadores del usuario una sola vez.
+        Devuelve las transacciones en el mismo orden.
+        """
+        from eventos import emitir_evento
+        from saldos import mover_saldo
+        premios = [{'cantidad_evento': 1, 'datos_evento': None, 'metadata': None, **p} for p in premios]
+        total = sum(p['cantidad'] for p in premios)
+        ganados = sum(p['cantidad'] for p in premios if p['cantidad'] > 0)
+        
+        # Crédito en SQL: no pisa débitos concurrentes (casino, canjes)
+        mover_saldo(self, total)
         self.actualizar_nivel()
         self.actualizar_racha()
-        if cantidad > 0:
-            self.puntos_historicos += cantidad
-        transaccion = Transaction(
-            user_id=self.id,
-            tipo=tipo,
-            puntos=cantidad,
-            descripcion=descripcion
-        )
-        db.session.add(transaccion)
-    
-    def restar_puntos(self, cantidad, tipo, descripcion):
-        """Restar puntos y registrar transacción"""
-        if self.puntos_totales >= cantidad:
-            self.puntos_totales -= cantidad
+        if ganados:
+            self.puntos_historicos += ganados
+            from ranking import registrar_cambio_puntos
+            registrar_cambio_puntos(self, ganados)
+        
+        transacciones = []
+        deltas = {}
+        for p in premios:
+            transacciones.append(Transaction(
+                user_id=self.id,
+                tipo=p['tipo'],
+                puntos=p['cantidad'],
+                descripcion=p['descripcion'],
+                metadata_json=json.dumps(p['metadata']) if p['metadata'] else None
+            ))
+            contador = CONTADOR_POR_TIPO.get(p['tipo'])
+            if contador:
+                deltas[contador] = deltas.get(contador, 0) + 1
+                if p['tipo'] == 'reciclaje':
+                    deltas['items_reciclados'] = deltas.get('items_reciclados', 0) + p['cantidad_evento']
+            emitir_evento(self.id, p['tipo'], p['cantidad_evento'], p['datos_evento'])
+        db.session.add_all(transacciones)
+        if deltas:
+            self.incrementar_stats(**deltas)
+        return transacciones
+    
+    def restar_puntos(self, cantidad, tipo, descripcion, metadata=None):
+        """Restar puntos y registrar transacción. Devuelve la transacción, o None
+        si no alcanza el saldo (comprobado en el mismo UPDATE que descuenta)."""
+        from saldos import debitar
+        if debitar(self, cantidad) is not None:
             transaccion = Transaction(
                 user_id=self.id,
                 tipo=tipo,
                 puntos=-cantidad,
-                descripcion=descripcion
+                descripcion=descripcion,
+                metadata_json=json.dumps(metadata) if metadata else None
             )
             db.session.add(transaccion)
-            return True
-        return False
+            if tipo in CONTADOR_POR_TIPO:
+                self.incrementar_stats(**{CONTADOR_POR_TIPO[tipo]: 1})
+            return transaccion
+        return None
     
     def __repr__(self):
         return f'<User {self.username}>'
@@ -148,6 +329,11 @@ class Material(db.Model):
 class Transaction(db.Model):
     """Modelo de Transacción"""
     __tablename__ = 'transactions'
+    __table_args__ = (
+        db.Index('ix_transactions_user_id_tipo_fecha', 'user_id', 'tipo', 'fecha'),
+        db.Index('ix_transactions_user_id_fecha', 'user_id', 'fecha'),
+        db.Index('ix_transactions_fecha', 'fecha'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
@@ -157,10 +343,101 @@ class Transaction(db.Model):
     fecha = db.Column(db.DateTime, default=get_current_time)
     metadata_json = db.Column(db.Text)  # JSON para datos adicionales
     
+    # Relación
+    entradas_reciclaje = db.relationship('RecyclingEntry', backref='transaccion', lazy='dynamic')
+    
     def __repr__(self):
         return f'<Transaction {self.tipo} - {self.puntos} pts>'
 
 
+class RecyclingEntry(db.Model):
+    """Modelo de Línea de Reciclaje (material y cantidad de una entrega)"""
+    __tablename__ = 'recycling_entries'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    transaction_id = db.Column(db.Integer, db.ForeignKey('transactions.id'), nullable=False, index=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
+    material_id = db.Column(db.Integer, db.ForeignKey('materials.id'), nullable=False, index=True)
+    cantidad = db.Column(db.Integer, nullable=False)
+    puntos = db.Column(db.Integer, nullable=False)
+    fecha = db.Column(db.DateTime, default=get_current_time)
+    
+    material = db.relationship('Material')
+    
+    def __repr__(self):
+        return f'<RecyclingEntry material={self.material_id} x{self.cantidad}>'
+
+
+class UserImpact(db.Model):
+    """Modelo de Impacto Ambiental acumulado por Usuario"""
+    __tablename__ = 'user_impacts'
+    
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True)
+    co2_evitado = db.Column(db.Float, default=0.0, nullable=False)  # kg de CO2
+    agua_ahorrada = db.Column(db.Float, default=0.0, nullable=False)  # litros
+    items_reciclados = db.Column(db.Integer, default=0, nullable=False)
+    fecha_actualizacion = db.Column(db.DateTime, default=get_current_time)
+    
+    @property
+    def arboles_salvados(self):
+        # 1 árbol absorbe aprox 22kg CO2/año
+        return round((self.co2_evitado or 0) / 22, 2)
+    
+    def __repr__(self):
+        return f'<UserImpact user={self.user_id} co2={self.co2_evitado}>'
+
+
+class UserStats(db.Model):
+    """Contadores de actividad por usuario, actualizados junto con cada transacción"""
+    __tablename__ = 'user_stats'
+    
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True)
+    reciclajes = db.Column(db.Integer, default=0, nullable=False)
+    items_reciclados = db.Column(db.Integer, default=0, nullable=False)
+    quizzes = db.Column(db.Integer, default=0, nullable=False)  # quizzes aprobados
+    canjes = db.Column(db.Integer, default=0, nullable=False)
+    eventos = db.Column(db.Integer, default=0, nullable=False)  # eventos a los que asistió
+    apuestas_casino = db.Column(db.Integer, default=0, nullable=False)
+    victorias_casino = db.Column(db.Integer, default=0, nullable=False)
+    fecha_actualizacion = db.Column(db.DateTime, default=get_current_time)
+    
+    def __repr__(self):
+        return f'<UserStats user={self.user_id} reciclajes={self.reciclajes}>'
+
+
+class UserCasino(db.Model):
+    """Totales de casino por usuario, actualizados con cada jugada"""
+    __tablename__ = 'user_casino'
+    
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True)
+    juegos_ruleta = db.Column(db.Integer, default=0, nullable=False)
+    juegos_slots = db.Column(db.Integer, default=0, nullable=False)
+    juegos_dados = db.Column(db.Integer, default=0, nullable=False)
+    total_apostado = db.Column(db.Integer, default=0, nullable=False)
+    ganancia_neta = db.Column(db.Integer, default=0, nullable=False)  # suma de CasinoGame.ganancia
+    mayor_ganancia = db.Column(db.Integer, default=0, nullable=False)  # mayor ganancia neta de una jugada
+    fecha_actualizacion = db.Column(db.DateTime, default=get_current_time)
+    
+    @property
+    def juegos(self):
+        return self.juegos_ruleta + self.juegos_slots + self.juegos_dados
+    
+    def __repr__(self):
+        return f'<UserCasino user={self.user_id} neto={self.ganancia_neta}>'
+
+
+class Nivel(db.Model):
+    """Umbral de nivel; si la tabla está vacía se usa Config.NIVELES"""
+    __tablename__ = 'niveles'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    nombre = db.Column(db.String(50), unique=True, nullable=False)
+    puntos_min = db.Column(db.Integer, unique=True, nullable=False)
+    
+    def __repr__(self):
+        return f'<Nivel {self.nombre} {self.puntos_min}>'
+
+
 class Reward(db.Model):
     """Modelo de Recompensa"""
     __tablename__ = 'rewards'
@@ -184,6 +461,10 @@ class Reward(db.Model):
 class UserReward(db.Model):
     """Modelo de Canje de Recompensa"""
     __tablename__ = 'user_rewards'
+    __table_args__ = (
+        db.Index('ix_user_rewards_user_id_fecha_canje', 'user_id', 'fecha_canje'),
+        db.Index('ix_user_rewards_fecha_canje', 'fecha_canje'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
@@ -217,6 +498,9 @@ class Achievement(db.Model):
 class UserAchievement(db.Model):
     """Modelo de Logro de Usuario"""
     __tablename__ = 'user_achievements'
+    __table_args__ = (
+        db.Index('ix_user_achievements_user_id_achievement_id', 'user_id', 'achievement_id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
@@ -231,6 +515,9 @@ class UserAchievement(db.Model):
 class CasinoGame(db.Model):
     """Modelo de Juego de Casino"""
     __tablename__ = 'casino_games'
+    __table_args__ = (
+        db.Index('ix_casino_games_user_id_fecha', 'user_id', 'fecha'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
@@ -245,6 +532,22 @@ class CasinoGame(db.Model):
         return f'<CasinoGame {self.tipo_juego} - {self.ganancia} pts>'
 
 
+# Columnas de UserCasino que se calculan desde CasinoGame, en el orden de agregados_casino()
+COLUMNAS_RESUMEN_CASINO = ['juegos_ruleta', 'juegos_slots', 'juegos_dados',
+                           'total_apostado', 'ganancia_neta', 'mayor_ganancia']
+
+def agregados_casino():
+    """Expresiones SUM/MAX sobre CasinoGame para cada columna de COLUMNAS_RESUMEN_CASINO"""
+    mayor = func.max(CasinoGame.ganancia)
+    return [
+        *(func.coalesce(func.sum(case((CasinoGame.tipo_juego == tipo, 1), else_=0)), 0)
+          for tipo in ('ruleta', 'slots', 'dados')),
+        func.coalesce(func.sum(CasinoGame.apuesta), 0),
+        func.coalesce(func.sum(CasinoGame.ganancia), 0),
+        case((mayor > 0, mayor), else_=0)
+    ]
+
+
 class Quiz(db.Model):
     """Modelo de Quiz"""
     __tablename__ = 'quizzes'
@@ -281,6 +584,9 @@ class QuizQuestion(db.Model):
 class UserQuiz(db.Model):
     """Modelo de Quiz Completado por Usuario"""
     __tablename__ = 'user_quizzes'
+    __table_args__ = (
+        db.Index('ix_user_quizzes_user_id_quiz_id', 'user_id', 'quiz_id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
@@ -313,6 +619,9 @@ class Mision(db.Model):
 class UserMision(db.Model):
     """Modelo de Progreso de Misión de Usuario"""
     __tablename__ = 'user_misiones'
+    __table_args__ = (
+        db.Index('ix_user_misiones_user_id_completada_fecha', 'user_id', 'completada', 'fecha_asignacion'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
@@ -326,3 +635,26 @@ class UserMision(db.Model):
     def __repr__(self):
         return f'<UserMision user={self.user_id} mision={self.mision_id}>'
 
+
+
+class EventoDominio(db.Model):
+    """Evento de dominio en la bandeja de salida (outbox) para misiones y logros"""
+    __tablename__ = 'eventos_dominio'
+    __table_args__ = (
+        db.Index('ix_eventos_dominio_procesado_id', 'procesado', 'id'),
+        db.Index('ix_eventos_dominio_user_id_procesado', 'user_id', 'procesado'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    tipo = db.Column(db.String(50), nullable=False)  # reciclaje, quiz, evento, login, mision, ...
+    cantidad = db.Column(db.Integer, default=1, nullable=False)  # unidades para el progreso de misiones
+    datos_json = db.Column(db.Text)  # JSON con detalles (material, quiz, ...)
+    fecha = db.Column(db.DateTime, default=get_current_time)
+    procesado = db.Column(db.Boolean, default=False, nullable=False)
+    fecha_procesado = db.Column(db.DateTime)
+    intentos = db.Column(db.Integer, default=0, nullable=False)
+    error = db.Column(db.Text)
+    
+    def __repr__(self):
+        return f'<EventoDominio {self.tipo} user={self.user_id}>'
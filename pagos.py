@@ -0,0 +1,77 @@
+"""
+Tablas de pago del casino.
+
+Única definición de qué gana cada apuesta y cuánto paga. La usan las funciones
+de juego (utils.jugar_ruleta, jugar_slots, jugar_dados) y el simulador
+vectorizado (simulador_casino.py). Las condiciones solo usan comparaciones,
+aritmética y & / |, así que valen igual para enteros de Python que para
+arreglos de NumPy con todos los resultados de una vez.
+"""
+
+RULETA_NUMEROS = 37  # 0-36
+
+SLOTS_SIMBOLOS = ['🌱', '🌿', '🍃', '♻️', '🌍', '💚', '🌳', '🌲']
+SLOTS_JACKPOT = SLOTS_SIMBOLOS.index('♻️')
+
+DADOS_CARAS = 6
+# Multiplicadores de la apuesta a una suma, según su probabilidad
+DADOS_MULTIPLICADORES_SUMA = {2: 30, 3: 15, 4: 10, 5: 8, 6: 6, 7: 5, 8: 6, 9: 8, 10: 10, 11: 15, 12: 30}
+
+
+class Apuesta:
+    """Condición de victoria sobre el resultado y multiplicador que paga"""
+    __slots__ = ('condicion', 'pago', 'valores')
+
+    def __init__(self, condicion, pago, valores=None):
+        self.condicion = condicion  # condicion(*resultado, valor_apostado) -> bool o arreglo de bool
+        self.pago = pago  # entero, o función del valor apostado
+        self.valores = valores  # valores que se pueden apostar, o None si la apuesta no usa valor
+
+    def acepta(self, valor):
+        """Indica si el valor apostado es válido para esta apuesta"""
+        if self.valores is None:
+            return True
+        return isinstance(valor, int) and not isinstance(valor, bool) and valor in self.valores
+
+    def gana(self, *resultado, valor=None):
+        return self.condicion(*resultado, valor)
+
+    def multiplicador(self, valor=None):
+        return self.pago(valor) if callable(self.pago) else self.pago
+
+
+# tipo_apuesta -> Apuesta, sobre el número ganador n
+RULETA = {
+    'numero': Apuesta(lambda n, v: n == v, 35, valores=range(RULETA_NUMEROS)),
+    'par': Apuesta(lambda n, v: (n != 0) & (n % 2 == 0), 2),
+    'impar': Apuesta(lambda n, v: n % 2 == 1, 2),
+    'alto': Apuesta(lambda n, v: n >= 19, 2),
+    'bajo': Apuesta(lambda n, v: (n >= 1) & (n <= 18), 2),
+    'docena': Apuesta(lambda n, v: (n > 0) & ((n - 1) // 12 == v), 3, valores=range(3)),
+}
+
+# Sobre los índices de símbolo (a, b, c) de los rodillos; gana la primera que se cumple
+SLOTS = [
+    Apuesta(lambda a, b, c, v: (a == SLOTS_JACKPOT) & (b == SLOTS_JACKPOT) & (c == SLOTS_JACKPOT), 50),
+    Apuesta(lambda a, b, c, v: (a == b) & (b == c), 10),
+    Apuesta(lambda a, b, c, v: (a == b) | (b == c) | (a == c), 3),
+]
+
+# tipo_apuesta -> Apuesta, sobre los dados d1 y d2
+DADOS = {
+    'suma': Apuesta(lambda d1, d2, v: d1 + d2 == v, lambda v: DADOS_MULTIPLICADORES_SUMA.get(v, 5),
+                    valores=range(2, 2 * DADOS_CARAS + 1)),
+    'par': Apuesta(lambda d1, d2, v: (d1 + d2) % 2 == 0, 2),
+    'impar': Apuesta(lambda d1, d2, v: (d1 + d2) % 2 == 1, 2),
+    'mayor7': Apuesta(lambda d1, d2, v: d1 + d2 > 7, 2),
+    'menor7': Apuesta(lambda d1, d2, v: d1 + d2 < 7, 2),
+    'dobles': Apuesta(lambda d1, d2, v: d1 == d2, 8),
+}
+
+
+def pago_slots(a, b, c):
+    """Multiplicador de una tirada de slots (0 si no gana)"""
+    for apuesta in SLOTS:
+        if apuesta.gana(a, b, c):
+            return apuesta.multiplicador()
+    return 0
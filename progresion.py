@@ -0,0 +1,99 @@
+"""
+Motor de niveles.
+
+Los umbrales (tabla niveles o, si está vacía, Config.NIVELES) se compilan una
+vez en una TablaNiveles con los puntos mínimos ordenados, de modo que el nivel,
+el siguiente nivel y el progreso se obtienen con una búsqueda binaria. La tabla
+compilada vive en una CacheTTL por aplicación (app.extensions['niveles']).
+"""
+from bisect import bisect_right
+from flask import current_app, has_app_context
+from sqlalchemy import case, literal, or_, update
+from config import Config
+from models import db, Nivel, User
+
+
+class TablaNiveles:
+    """Umbrales de nivel ordenados por puntos mínimos"""
+    __slots__ = ('nombres', 'umbrales')
+
+    def __init__(self, niveles):
+        # niveles: iterable de (nombre, puntos_min)
+        ordenados = sorted(niveles, key=lambda n: n[1])
+        self.nombres = tuple(nombre for nombre, _ in ordenados)
+        self.umbrales = tuple(puntos_min for _, puntos_min in ordenados)
+
+    def __len__(self):
+        return len(self.umbrales)
+
+    def _indice(self, puntos):
+        # Por debajo del primer umbral se queda en el primer nivel
+        return max(bisect_right(self.umbrales, puntos or 0) - 1, 0)
+
+    def nivel(self, puntos):
+        """Nombre del nivel que corresponde a esos puntos"""
+        return self.nombres[self._indice(puntos)]
+
+    def siguiente(self, puntos):
+        """(nombre, puntos_min) del siguiente nivel, o None si ya está en el último"""
+        i = self._indice(puntos) + 1
+        if i >= len(self.umbrales):
+            return None
+        return self.nombres[i], self.umbrales[i]
+
+    def progreso(self, puntos):
+        """Porcentaje (0-100) recorrido entre el nivel actual y el siguiente"""
+        i = self._indice(puntos)
+        if i + 1 >= len(self.umbrales):
+            return 100
+        desde, hasta = self.umbrales[i], self.umbrales[i + 1]
+        return min(max((puntos or 0) - desde, 0) * 100 / (hasta - desde), 100)
+
+    def expresion_sql(self, columna):
+        """CASE equivalente a nivel() sobre una columna de puntos"""
+        ramas = [(columna >= umbral, nombre)
+                 for nombre, umbral in zip(reversed(self.nombres), reversed(self.umbrales))]
+        if len(ramas) == 1:
+            return literal(ramas[0][1])
+        return case(*ramas[:-1], else_=ramas[-1][1])
+
+
+# Tabla por defecto, para usar fuera de una aplicación
+_POR_DEFECTO = TablaNiveles(Config.NIVELES.items())
+
+
+def cargar_niveles():
+    """TablaNiveles desde la tabla niveles; si está vacía, desde la configuración"""
+    filas = db.session.query(Nivel.nombre, Nivel.puntos_min).all()
+    if not filas:
+        return TablaNiveles(current_app.config['NIVELES'].items())
+    return TablaNiveles(filas)
+
+
+def obtener_niveles():
+    """Tabla de niveles compilada desde la caché de la aplicación"""
+    if has_app_context() and 'niveles' in current_app.extensions:
+        return current_app.extensions['niveles'].obtener()
+    return _POR_DEFECTO
+
+
+def invalidar_niveles():
+    """Descarta la tabla en caché (llamar tras editar los niveles)"""
+    current_app.extensions['niveles'].invalidar()
+
+
+def recalcular_niveles():
+    """
+    Reasigna el nivel de todos los usuarios con un único UPDATE ... CASE sobre
+    puntos_totales. Usar tras cambiar los umbrales. Devuelve las filas cambiadas.
+    """
+    invalidar_niveles()
+    nuevo = obtener_niveles().expresion_sql(User.puntos_totales)
+    resultado = db.session.execute(
+        update(User)
+        .where(or_(User.nivel.is_(None), User.nivel != nuevo))
+        .values(nivel=nuevo)
+        .execution_options(synchronize_session=False)
+    )
+    db.session.commit()
+    return resultado.rowcount
@@ -0,0 +1,233 @@
+"""
+Servicio de rankings materializados en memoria.
+Las listas se calculan con las consultas de utils y luego se mantienen
+al día con los cambios de puntos_historicos confirmados en cada commit.
+"""
+import threading
+import time
+from flask import current_app, has_app_context
+from sqlalchemy import event
+from sortedcontainers import SortedList
+from models import db, User
+from database import leer_de_primaria
+from utils import obtener_ranking_estudiantes, obtener_ranking_facultades, obtener_ranking_carreras
+
+
+class EntradaRanking:
+    """Copia ligera de un usuario para servir el ranking sin tocar la BD"""
+    __slots__ = ('id', 'username', 'nombre_completo', 'facultad', 'carrera',
+                 'nivel', 'racha_actual', 'puntos_historicos')
+
+    def __init__(self, user):
+        for campo in self.__slots__:
+            setattr(self, campo, getattr(user, campo))
+        self.puntos_historicos = self.puntos_historicos or 0
+
+    def __repr__(self):
+        return f'<EntradaRanking {self.username} {self.puntos_historicos}>'
+
+
+class ServicioRanking:
+    """Top de estudiantes, facultades y carreras servido desde memoria"""
+
+    def __init__(self, top_n=20, ttl=300, limite_carreras=20):
+        self.top_n = top_n
+        self.ttl = ttl
+        self.limite_carreras = limite_carreras
+        self._lock = threading.Lock()
+        self._estudiantes = []
+        self._facultades = []
+        self._carreras = []
+        # Estadístico de orden: (-puntos_historicos, id) de todos los estudiantes.
+        # SortedList inserta, borra y busca por posición en O(log n)
+        self._puntajes = SortedList()
+        self._puntos_por_id = {}
+        self._refrescado_en = None
+        self._actualizado_en = None
+        # Métricas
+        self.aciertos = 0
+        self.fallos = 0
+        self.refrescos = 0
+        self.actualizaciones = 0
+
+    def _vigente(self):
+        return self._refrescado_en is not None and \
+            time.monotonic() - self._refrescado_en < self.ttl
+
+    def _asegurar(self):
+        if self._vigente():
+            self.aciertos += 1
+            return
+        with self._lock:
+            if self._vigente():
+                self.aciertos += 1
+                return
+            self.fallos += 1
+            self._refrescar()
+
+    def _refrescar(self):
+        # La foto se toma de la primaria: una réplica atrasada perdería cambios ya aplicados
+        with leer_de_primaria():
+            self._cargar()
+        self._refrescado_en = self._actualizado_en = time.monotonic()
+        self.refrescos += 1
+
+    def _cargar(self):
+        self._estudiantes = [EntradaRanking(u) for u in obtener_ranking_estudiantes(self.top_n)]
+        self._facultades = obtener_ranking_facultades()
+        # Se guardan todas las carreras para poder reordenarlas sin consultar
+        self._carreras = obtener_ranking_carreras(limite=None)
+        filas = db.session.query(User.id, User.puntos_historicos)\
+            .filter(User.is_admin == False).all()
+        self._puntos_por_id = {uid: puntos or 0 for uid, puntos in filas}
+        self._puntajes = SortedList((-puntos, uid) for uid, puntos in self._puntos_por_id.items())
+
+    def estudiantes(self, limite=10):
+        self._asegurar()
+        return self._estudiantes[:limite]
+
+    def facultades(self):
+        self._asegurar()
+        return self._facultades
+
+    def carreras(self):
+        self._asegurar()
+        return self._carreras[:self.limite_carreras]
+
+    def posicion(self, user):
+        """Devuelve (posición, total de estudiantes) de un usuario en O(log n)"""
+        if user.is_admin:
+            return None, None
+        self._asegurar()
+        with self._lock:
+            posicion = self._puntajes.bisect_left(_clave(user)) + 1
+            total = len(self._puntajes) + (0 if user.id in self._puntos_por_id else 1)
+        return posicion, total
+
+    def vecinos(self, user, n=5):
+        """Devuelve los n estudiantes justo arriba y abajo como listas de (posición, usuario)"""
+        if user.is_admin:
+            return [], []
+        self._asegurar()
+        with self._lock:
+            i = self._puntajes.bisect_left(_clave(user))
+            arriba = [uid for _, uid in self._puntajes[max(0, i - n):i]]
+            abajo = [uid for _, uid in self._puntajes[i:i + n + 1] if uid != user.id][:n]
+
+        usuarios = {u.id: u for u in User.query.filter(User.id.in_(arriba + abajo))}
+        inicio_arriba = i - len(arriba) + 1
+        return (
+            [(inicio_arriba + k, usuarios[uid]) for k, uid in enumerate(arriba) if uid in usuarios],
+            [(i + 2 + k, usuarios[uid]) for k, uid in enumerate(abajo) if uid in usuarios]
+        )
+
+    def invalidar(self):
+        """Fuerza un recálculo completo en la próxima lectura"""
+        self._refrescado_en = None
+
+    def aplicar_cambio(self, entrada, delta):
+        """Aplica un aumento de puntos_historicos de un estudiante a las listas
+        (O(log n) en el estadístico de orden)"""
+        with self._lock:
+            if self._refrescado_en is None:
+                return
+
+            estudiantes = [e for e in self._estudiantes if e.id != entrada.id]
+            if len(estudiantes) < self.top_n or \
+                    entrada.puntos_historicos > estudiantes[-1].puntos_historicos:
+                estudiantes.append(entrada)
+                estudiantes.sort(key=lambda e: e.puntos_historicos, reverse=True)
+            self._estudiantes = estudiantes[:self.top_n]
+
+            previo = self._puntos_por_id.get(entrada.id)
+            if previo is not None:
+                self._puntajes.discard((-previo, entrada.id))
+            self._puntajes.add((-entrada.puntos_historicos, entrada.id))
+            self._puntos_por_id[entrada.id] = entrada.puntos_historicos
+
+            if entrada.facultad is not None:
+                facultades = _sumar_a_grupo(self._facultades, delta, facultad=entrada.facultad)
+                if facultades is None:
+                    # Facultad nueva en el ranking: recalcular en la próxima lectura
+                    self._refrescado_en = None
+                    return
+                self._facultades = facultades
+
+                if entrada.carrera is not None:
+                    carreras = _sumar_a_grupo(self._carreras, delta,
+                                              carrera=entrada.carrera, facultad=entrada.facultad)
+                    if carreras is None:
+                        self._refrescado_en = None
+                        return
+                    self._carreras = carreras
+
+            self._actualizado_en = time.monotonic()
+            self.actualizaciones += 1
+
+    def metricas(self):
+        """Ratio de aciertos y antigüedad de los datos servidos"""
+        lecturas = self.aciertos + self.fallos
+        ahora = time.monotonic()
+        return {
+            'aciertos': self.aciertos,
+            'fallos': self.fallos,
+            'ratio_aciertos': round(self.aciertos / lecturas, 4) if lecturas else None,
+            'refrescos_completos': self.refrescos,
+            'actualizaciones_incrementales': self.actualizaciones,
+            'segundos_desde_refresco': round(ahora - self._refrescado_en, 1) if self._refrescado_en else None,
+            'segundos_desde_actualizacion': round(ahora - self._actualizado_en, 1) if self._actualizado_en else None
+        }
+
+
+def _clave(user):
+    # Mayor puntaje primero; a igualdad de puntos, el id menor va antes
+    return (-(user.puntos_historicos or 0), user.id)
+
+
+def _sumar_a_grupo(grupos, delta, **clave):
+    """Devuelve una copia reordenada de grupos con delta sumado, o None si no existe"""
+    encontrado = False
+    nuevos = []
+    for grupo in grupos:
+        if all(grupo[k] == v for k, v in clave.items()):
+            grupo = dict(grupo, puntos=(grupo['puntos'] or 0) + delta)
+            encontrado = True
+        nuevos.append(grupo)
+    if not encontrado:
+        return None
+    nuevos.sort(key=lambda g: g['puntos'] or 0, reverse=True)
+    return nuevos
+
+
+def obtener_servicio_ranking():
+    """Devuelve el servicio de ranking de la aplicación actual"""
+    return current_app.extensions['ranking']
+
+
+# --- Actualización incremental tras cada commit ---
+
+def registrar_cambio_puntos(user, delta):
+    """Anota un aumento de puntos_historicos para aplicarlo al ranking tras el commit"""
+    if user.is_admin or delta <= 0:
+        return
+    pendientes = db.session.info.setdefault('ranking_pendiente', {})
+    previo = pendientes.get(user.id)
+    acumulado = delta + (previo[1] if previo else 0)
+    pendientes[user.id] = (EntradaRanking(user), acumulado)
+
+
+@event.listens_for(db.session, 'after_commit')
+def _aplicar_cambios_pendientes(session):
+    pendientes = session.info.pop('ranking_pendiente', None)
+    if not pendientes or not has_app_context():
+        return
+    servicio = current_app.extensions.get('ranking')
+    if servicio is None:
+        return
+    for entrada, delta in pendientes.values():
+        servicio.aplicar_cambio(entrada, delta)
+
+
+@event.listens_for(db.session, 'after_rollback')
+def _descartar_cambios_pendientes(session):
+    session.info.pop('ranking_pendiente', None)
@@ -0,0 +1,131 @@
+"""
+Reporte de planes de consulta (EXPLAIN) para las consultas frecuentes
+de utils.py y routes/*.py.
+
+Uso:
+    python reporte_planes.py                  # SQLite en memoria creada desde los modelos
+    python reporte_planes.py --database-url postgresql://...
+
+Termina con código 1 si alguna consulta recorre una tabla completa.
+En PostgreSQL ejecute ANALYZE con datos representativos antes del reporte:
+con tablas vacías el planificador prefiere Seq Scan aunque exista el índice.
+"""
+import argparse
+import sys
+from datetime import date, timedelta
+from sqlalchemy import select, func
+from app import create_app
+from config import Config
+from models import (db, User, Transaction, UserMision, Mision, CasinoGame, UserCasino, UserReward, Reward,
+                    UserAchievement, UserQuiz, RecyclingEntry)
+
+
+def consultas_frecuentes():
+    """Lista de (nombre, origen, sentencia) a analizar"""
+    user_id = 1
+    hoy = date.today()
+    inicio_semana = hoy - timedelta(days=hoy.weekday())
+
+    return [
+        ('Últimas transacciones del usuario', 'routes/main.py:dashboard',
+         select(Transaction).filter_by(user_id=user_id)
+         .order_by(Transaction.fecha.desc()).limit(5)),
+        ('Historial de reciclaje', 'routes/recycle.py:index',
+         select(Transaction).filter_by(user_id=user_id, tipo='reciclaje')
+         .order_by(Transaction.fecha.desc()).limit(10)),
+        ('Conteo de transacciones por tipo', 'routes/main.py:profile',
+         select(func.count()).select_from(Transaction)
+         .filter_by(user_id=user_id, tipo='quiz')),
+        ('Transacciones recientes', 'routes/admin.py:dashboard',
+         select(Transaction).order_by(Transaction.fecha.desc()).limit(15)),
+        ('Misiones activas', 'routes/main.py:dashboard',
+         select(UserMision).filter(
+             UserMision.user_id == user_id,
+             UserMision.completada == False,
+             UserMision.fecha_asignacion >= inicio_semana
+         ).order_by(UserMision.fecha_asignacion.desc())),
+        ('Progreso de misiones', 'utils.py:actualizar_progreso_mision',
+         select(UserMision).join(Mision).filter(
+             UserMision.user_id == user_id,
+             UserMision.completada == False,
+             Mision.tipo == 'reciclaje'
+         )),
+        ('Ranking de estudiantes', 'utils.py:obtener_ranking_estudiantes',
+         select(User).filter_by(is_admin=False)
+         .order_by(User.puntos_historicos.desc()).limit(10)),
+        ('Usuarios recientes', 'routes/admin.py:dashboard',
+         select(User).filter_by(is_admin=False)
+         .order_by(User.fecha_registro.desc()).limit(10)),
+        ('Últimos juegos de casino', 'routes/casino.py:index',
+         select(CasinoGame).filter_by(user_id=user_id)
+         .order_by(CasinoGame.fecha.desc(), CasinoGame.id.desc()).limit(10)),
+        ('Totales de casino', 'routes/casino.py:index',
+         select(UserCasino).filter_by(user_id=user_id)),
+        ('Mis recompensas', 'routes/rewards.py:mis_recompensas',
+         select(UserReward).filter_by(user_id=user_id)
+         .order_by(UserReward.fecha_canje.desc())),
+        ('Listado de cupones', 'routes/admin.py:cupones',
+         select(UserReward).join(User).join(Reward)
+         .order_by(UserReward.fecha_canje.desc()).limit(50)),
+        ('Logros ya obtenidos', 'logros.py:verificar_logros',
+         select(UserAchievement.achievement_id).filter_by(user_id=user_id)),
+        ('Contadores de logros', 'logros.py:cargar_contadores',
+         select(func.count(Transaction.id)).filter(Transaction.user_id == user_id)),
+        ('Quiz ya completado', 'routes/recycle.py:quiz',
+         select(UserQuiz).filter_by(user_id=user_id, quiz_id=1).limit(1)),
+        ('Material en uso', 'utils.py:material_en_uso',
+         select(RecyclingEntry.query.filter_by(material_id=1).exists())),
+    ]
+
+
+def explicar(conn, sentencia):
+    """Devuelve las líneas del plan de ejecución de una sentencia"""
+    compilada = sentencia.compile(dialect=conn.dialect)
+    params = compilada.construct_params()
+    if compilada.positional:
+        params = tuple(params[k] for k in compilada.positiontup)
+
+    if conn.dialect.name == 'sqlite':
+        filas = conn.exec_driver_sql('EXPLAIN QUERY PLAN ' + str(compilada), params).fetchall()
+        return [fila[-1] for fila in filas]
+    filas = conn.exec_driver_sql('EXPLAIN ' + str(compilada), params).fetchall()
+    return [fila[0] for fila in filas]
+
+
+def recorre_tabla(linea):
+    """Indica si una línea del plan es un recorrido completo de tabla"""
+    if linea.startswith('SCAN ') and ' USING ' not in linea and 'CONSTANT ROW' not in linea:
+        return True
+    return 'Seq Scan' in linea
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--database-url', default='sqlite:///:memory:')
+    args = parser.parse_args()
+
+    class ReporteConfig(Config):
+        SQLALCHEMY_DATABASE_URI = args.database_url
+
+    app = create_app(ReporteConfig)
+    problemas = 0
+
+    with app.app_context():
+        conn = db.session.connection()
+        print(f"📋 Planes de consulta ({conn.dialect.name})\n")
+
+        for nombre, origen, sentencia in consultas_frecuentes():
+            plan = explicar(conn, sentencia)
+            escaneos = [linea for linea in plan if recorre_tabla(linea)]
+            problemas += bool(escaneos)
+
+            print(f"{'❌' if escaneos else '✅'} {nombre}  [{origen}]")
+            for linea in plan:
+                print(f"      {linea}")
+
+    print(f"\n{problemas} consulta(s) con recorrido completo de tabla.")
+    return 1 if problemas else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
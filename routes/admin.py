@@ -1,12 +1,17 @@
-from flask import Blueprint, render_template, redirect, url_for, flash, request
+from flask import Blueprint, render_template, redirect, url_for, flash, request, jsonify
 from flask_login import login_required, current_user
 from functools import wraps
+from sqlalchemy import func
+from sqlalchemy.orm import joinedload, contains_eager
+from database import solo_lectura
 from models import db, Material, Reward, User, Transaction
-from utils import estadisticas_globales
+from utils import obtener_estadisticas_globales, invalidar_estadisticas, material_en_uso
+from ranking import obtener_servicio_ranking
+from saldos import obtener_metricas_saldos
 from forms import AjustarPuntosForm # Asegúrate de importar el nuevo form
 from models import User, Transaction # Asegúrate de importar User y Transaction
 # routes/admin.py
-from models import db, Material, Reward, User, Transaction, UserReward  # <--- Agregamos UserReward
+from models import db, Material, Reward, User, Transaction, UserReward, RecyclingEntry  # <--- Agregamos UserReward
 admin_bp = Blueprint('admin', __name__, url_prefix='/admin')
 
 def admin_required(f):
@@ -23,9 +28,10 @@ def admin_required(f):
 @admin_bp.route('/')
 @login_required
 @admin_required
+@solo_lectura
 def dashboard():
     """Dashboard de administrador"""
-    stats = estadisticas_globales()
+    stats = obtener_estadisticas_globales()
     
     # Usuarios recientes
     usuarios_recientes = User.query.filter_by(is_admin=False)\
@@ -35,6 +41,7 @@ def dashboard():
     
     # Transacciones recientes
     transacciones_recientes = Transaction.query\
+        .options(joinedload(Transaction.usuario))\
         .order_by(Transaction.fecha.desc())\
         .limit(15)\
         .all()
@@ -45,6 +52,17 @@ def dashboard():
                          transacciones_recientes=transacciones_recientes)
 
 
+@admin_bp.route('/metricas')
+@login_required
+@admin_required
+def metricas():
+    """Métricas de las cachés en memoria y de contención de saldos (JSON)"""
+    return jsonify({
+        'ranking': obtener_servicio_ranking().metricas(),
+        'saldos': obtener_metricas_saldos().metricas()
+    })
+
+
 # ==================== GESTIÓN DE MATERIALES ====================
 
 @admin_bp.route('/materiales')
@@ -54,19 +72,11 @@ def materiales():
     """Get all materials and check which have been used"""
     materiales = Material.query.all()
     
-    # Identificar materiales que ya han sido usados en transacciones
-    materiales_usados = set()
-    transacciones_reciclaje = Transaction.query.filter_by(tipo='reciclaje').all()
-    
-    import json
-    for trans in transacciones_reciclaje:
-        if trans.metadata_json:
-            try:
-                data = json.loads(trans.metadata_json)
-                if 'material_id' in data:
-                    materiales_usados.add(data['material_id'])
-            except:
-                pass
+    # Identificar materiales que ya han sido usados en entregas
+    materiales_usados = {
+        material_id for (material_id,) in
+        db.session.query(RecyclingEntry.material_id).distinct()
+    }
                 
     return render_template('admin/materials.html', 
                          materiales=materiales, 
@@ -91,6 +101,7 @@ def crear_material():
         
         db.session.add(nuevo_material)
         db.session.commit()
+        invalidar_estadisticas()
         
         flash(f'Material "{nuevo_material.nombre}" creado exitosamente.', 'success')
     except Exception as e:
@@ -122,18 +133,7 @@ def editar_material(material_id):
     material = Material.query.get_or_404(material_id)
     
     # Verificar si el material ha sido usado
-    transacciones_reciclaje = Transaction.query.filter_by(tipo='reciclaje').all()
-    usado = False
-    import json
-    for trans in transacciones_reciclaje:
-        if trans.metadata_json:
-            try:
-                data = json.loads(trans.metadata_json)
-                if 'material_id' in data and data['material_id'] == material.id:
-                    usado = True
-                    break
-            except:
-                pass
+    usado = material_en_uso(material.id)
     
     if usado:
         flash('No se puede editar este material porque ya existen entregas asociadas.', 'danger')
@@ -149,6 +149,7 @@ def editar_material(material_id):
             material.impacto_agua = float(request.form.get('agua'))
             
             db.session.commit()
+            invalidar_estadisticas()
             flash(f'Material "{material.nombre}" actualizado exitosamente.', 'success')
             return redirect(url_for('admin.materiales'))
         except Exception as e:
@@ -166,22 +167,15 @@ def eliminar_material(material_id):
     material = Material.query.get_or_404(material_id)
     
     # Verificar si el material ha sido usado
-    transacciones_reciclaje = Transaction.query.filter_by(tipo='reciclaje').all()
-    import json
-    for trans in transacciones_reciclaje:
-        if trans.metadata_json:
-            try:
-                data = json.loads(trans.metadata_json)
-                if 'material_id' in data and data['material_id'] == material.id:
-                    flash(f'No se puede eliminar "{material.nombre}" porque ya existen entregas asociadas.', 'danger')
-                    return redirect(url_for('admin.materiales'))
-            except:
-                pass
+    if material_en_uso(material.id):
+        flash(f'No se puede eliminar "{material.nombre}" porque ya existen entregas asociadas.', 'danger')
+        return redirect(url_for('admin.materiales'))
     
     try:
         nombre = material.nombre
         db.session.delete(material)
         db.session.commit()
+        invalidar_estadisticas()
         flash(f'Material "{nombre}" eliminado exitosamente.', 'success')
     except Exception as e:
         db.session.rollback()
@@ -197,7 +191,12 @@ def eliminar_material(material_id):
 @admin_required
 def recompensas():
     """Gestión de recompensas"""
-    recompensas = Reward.query.all()
+    # Cada recompensa con su número de canjes en una sola consulta
+    recompensas = db.session.query(Reward, func.count(UserReward.id))\
+        .outerjoin(UserReward, UserReward.reward_id == Reward.id)\
+        .group_by(Reward.id)\
+        .order_by(Reward.id)\
+        .all()
     return render_template('admin/rewards.html', recompensas=recompensas)
 
 
@@ -295,6 +294,7 @@ def eliminar_recompensa(recompensa_id):
 @admin_bp.route('/usuarios')
 @login_required
 @admin_required
+@solo_lectura
 def usuarios():
     """Gestión de usuarios (Lista)"""
     # Listamos todos los usuarios no administradores
@@ -372,7 +372,9 @@ def cupones():
     search_query = request.args.get('q', '').strip()
     
     # Query base optimizada con Joins
-    query = UserReward.query.join(User).join(Reward).order_by(UserReward.fecha_canje.desc())
+    query = UserReward.query.join(User).join(Reward)\
+        .options(contains_eager(UserReward.usuario), contains_eager(UserReward.recompensa))\
+        .order_by(UserReward.fecha_canje.desc())
     
     if search_query:
         # Búsqueda flexible: Código, Usuario o Nombre
@@ -3,7 +3,7 @@ from flask_login import login_user, logout_user, current_user
 from models import db, User
 from flask_babel import gettext as _
 from forms import RegistroForm, LoginForm, RequestResetForm, ResetPasswordForm
-from utils import actualizar_progreso_mision
+from eventos import emitir_evento
 from flask_mail import Message 
 from app import mail # Importar la instancia global 'mail'
 
@@ -77,11 +77,9 @@ def login():
                 flash(_('Tu cuenta está desactivada. Contacta al administrador.'), 'warning')
                 return redirect(url_for('auth.login'))
             login_user(user)
-            # Actualizar misiones de tipo 'login'
-            misiones_completadas = actualizar_progreso_mision(user, 'login')
-            for mision in misiones_completadas:
-                flash(_('¡Misión cumplida: %(nombre)s! Recompensa: %(puntos)s puntos.', 
-                        nombre=mision.nombre, puntos=mision.recompensa_puntos), 'success')
+            # Las misiones de tipo 'login' avanzan con el evento
+            emitir_evento(user.id, 'login')
+            db.session.commit()
             
             next_page = request.args.get('next')
             flash(_('¡Bienvenido de vuelta, %(nombre)s! 🌿', nombre=user.nombre_completo), 'success')
@@ -1,32 +1,68 @@
-from flask import Blueprint, render_template, redirect, url_for, flash, request, jsonify
+from flask import Blueprint, render_template, redirect, url_for, flash, request, jsonify, abort
 from flask_login import login_required, current_user
-from models import db, CasinoGame
+from sqlalchemy import insert
+from models import db, CasinoGame, get_current_time
 from config import Config
-from utils import jugar_ruleta, jugar_slots, jugar_dados
+from utils import jugar_ruleta, jugar_slots, jugar_dados, es_entero
+from saldos import mover_saldo
+import pagos
 import json
 
 casino_bp = Blueprint('casino', __name__, url_prefix='/casino')
 
+# tipo_juego -> (jugar(datos de la apuesta) -> resultado, texto guardado en CasinoGame.resultado)
+JUEGOS = {
+    'ruleta': (
+        lambda datos: jugar_ruleta(numero_apostado=datos.get('valor'), tipo_apuesta=datos.get('tipo', 'numero')),
+        lambda resultado: str(resultado['numero'])
+    ),
+    'slots': (
+        lambda datos: jugar_slots(),
+        lambda resultado: ''.join(resultado['rodillos'])
+    ),
+    'dados': (
+        lambda datos: jugar_dados(tipo_apuesta=datos.get('tipo', 'suma'), valor_apostado=datos.get('valor', 7)),
+        lambda resultado: f"{resultado['dado1']}+{resultado['dado2']}={resultado['suma']}"
+    ),
+}
+
+# tipo_juego -> (tabla de pagos, tipo y valor apostados por defecto) de los juegos con tipo de apuesta
+APUESTAS = {
+    'ruleta': (pagos.RULETA, 'numero', None),
+    'dados': (pagos.DADOS, 'suma', 7),
+}
+
+
+def _apuesta_valida(juego, datos):
+    """Comprueba el tipo y el valor apostados antes de jugar"""
+    if juego not in APUESTAS:
+        return True
+    tabla, tipo, valor = APUESTAS[juego]
+    tipo = datos.get('tipo', tipo)
+    if not isinstance(tipo, str) or tipo not in tabla:
+        return False
+    return tabla[tipo].acepta(datos.get('valor', valor))
+
+
 @casino_bp.route('/')
 @login_required
 def index():
     """Página principal del casino"""
     # Estadísticas del usuario
+    # El autoplay inserta sus rondas con la misma fecha: el id desempata
     juegos = CasinoGame.query.filter_by(user_id=current_user.id)\
-        .order_by(CasinoGame.fecha.desc())\
+        .order_by(CasinoGame.fecha.desc(), CasinoGame.id.desc())\
         .limit(10)\
         .all()
     
-    total_apostado = db.session.query(db.func.sum(CasinoGame.apuesta))\
-        .filter_by(user_id=current_user.id).scalar() or 0
-    
-    total_ganado = db.session.query(db.func.sum(CasinoGame.ganancia))\
-        .filter_by(user_id=current_user.id).scalar() or 0
+    # Totales acumulados en user_casino (una fila por usuario, sin recorrer el historial)
+    resumen = current_user.casino
     
     return render_template('casino/casino.html',
                          juegos=juegos,
-                         total_apostado=total_apostado,
-                         total_ganado=total_ganado)
+                         total_apostado=resumen.total_apostado if resumen else 0,
+                         total_ganado=resumen.ganancia_neta if resumen else 0,
+                         mayor_ganancia=resumen.mayor_ganancia if resumen else 0)
 
 
 @casino_bp.route('/ruleta')
@@ -66,8 +102,13 @@ def jugar_ruleta_post():
     
     ganancia_neta = ganancia - apuesta
     
-    # Actualizar puntos
-    current_user.puntos_totales += ganancia_neta
+    # Apuesta y premio en un solo UPDATE condicional: otra petición paralela
+    # del mismo usuario no puede hacer que apueste puntos que ya no tiene
+    saldo = mover_saldo(current_user, ganancia_neta, minimo=apuesta)
+    if saldo is None:
+        db.session.rollback()
+        return jsonify({'error': 'No tienes suficientes puntos'}), 400
+    current_user.registrar_casino('ruleta', apuesta, [ganancia_neta])
     
     # Registrar juego
     juego = CasinoGame(
@@ -87,7 +128,7 @@ def jugar_ruleta_post():
         'resultado': resultado,
         'ganancia': ganancia,
         'ganancia_neta': ganancia_neta,
-        'puntos_actuales': current_user.puntos_totales
+        'puntos_actuales': saldo
     })
 
 
@@ -125,8 +166,13 @@ def jugar_slots_post():
     
     ganancia_neta = ganancia - apuesta
     
-    # Actualizar puntos
-    current_user.puntos_totales += ganancia_neta
+    # Apuesta y premio en un solo UPDATE condicional: otra petición paralela
+    # del mismo usuario no puede hacer que apueste puntos que ya no tiene
+    saldo = mover_saldo(current_user, ganancia_neta, minimo=apuesta)
+    if saldo is None:
+        db.session.rollback()
+        return jsonify({'error': 'No tienes suficientes puntos'}), 400
+    current_user.registrar_casino('slots', apuesta, [ganancia_neta])
     
     # Registrar juego
     juego = CasinoGame(
@@ -146,7 +192,7 @@ def jugar_slots_post():
         'resultado': resultado,
         'ganancia': ganancia,
         'ganancia_neta': ganancia_neta,
-        'puntos_actuales': current_user.puntos_totales
+        'puntos_actuales': saldo
     })
 
 
@@ -187,8 +233,13 @@ def jugar_dados_post():
     
     ganancia_neta = ganancia - apuesta
     
-    # Actualizar puntos
-    current_user.puntos_totales += ganancia_neta
+    # Apuesta y premio en un solo UPDATE condicional: otra petición paralela
+    # del mismo usuario no puede hacer que apueste puntos que ya no tiene
+    saldo = mover_saldo(current_user, ganancia_neta, minimo=apuesta)
+    if saldo is None:
+        db.session.rollback()
+        return jsonify({'error': 'No tienes suficientes puntos'}), 400
+    current_user.registrar_casino('dados', apuesta, [ganancia_neta])
     
     # Registrar juego
     juego = CasinoGame(
@@ -208,5 +259,101 @@ def jugar_dados_post():
         'resultado': resultado,
         'ganancia': ganancia,
         'ganancia_neta': ganancia_neta,
-        'puntos_actuales': current_user.puntos_totales
-    })
\ No newline at end of file
+        'puntos_actuales': saldo
+    })
+
+
+@casino_bp.route('/<juego>/autoplay', methods=['POST'])
+@login_required
+def autoplay(juego):
+    """
+    Juega hasta N rondas con la misma apuesta en una sola petición. Se detiene
+    antes si la pérdida neta llega a stop_loss, la ganancia neta a stop_win o
+    el saldo no alcanza. Un solo INSERT de juegos, un UPDATE de saldo y un commit.
+    """
+    if juego not in JUEGOS:
+        abort(404)
+    data = request.get_json(silent=True) or {}
+    if not isinstance(data, dict):
+        return jsonify({'error': 'Parámetros de autoplay no válidos'}), 400
+    
+    apuesta = data.get('apuesta', 0)
+    rondas = data.get('rondas', 10)
+    stop_loss = data.get('stop_loss')
+    stop_win = data.get('stop_win')
+    if not (es_entero(apuesta) and es_entero(rondas)):
+        return jsonify({'error': 'Parámetros de autoplay no válidos'}), 400
+    if any(limite is not None and not (es_entero(limite) and limite > 0) for limite in (stop_loss, stop_win)):
+        return jsonify({'error': 'stop_loss y stop_win deben ser enteros positivos'}), 400
+    
+    # Validaciones (una vez, con el saldo inicial)
+    if not 1 <= rondas <= Config.CASINO_AUTOPLAY_MAX_RONDAS:
+        return jsonify({'error': f'Puedes jugar entre 1 y {Config.CASINO_AUTOPLAY_MAX_RONDAS} rondas'}), 400
+    
+    if not _apuesta_valida(juego, data):
+        return jsonify({'error': 'Tipo o valor de apuesta no válido'}), 400
+    
+    if apuesta < Config.CASINO_MIN_BET:
+        return jsonify({'error': f'La apuesta mínima es {Config.CASINO_MIN_BET} puntos'}), 400
+    
+    saldo_inicial = current_user.puntos_totales
+    max_apuesta = int(saldo_inicial * Config.CASINO_MAX_BET_PERCENT)
+    if apuesta > max_apuesta:
+        return jsonify({'error': f'Solo puedes apostar hasta {max_apuesta} puntos (30% de tu saldo)'}), 400
+    
+    if apuesta > saldo_inicial:
+        return jsonify({'error': 'No tienes suficientes puntos'}), 400
+    
+    # Jugar
+    jugar, texto_resultado = JUEGOS[juego]
+    neto = 0
+    peor_neto = 0  # peor saldo relativo antes de una ronda, para exigirlo en el UPDATE
+    juegos = []
+    resultados = []
+    motivo = 'rondas'
+    fecha = get_current_time()
+    for _ in range(rondas):
+        if saldo_inicial + neto < apuesta:
+            motivo = 'saldo'
+            break
+        peor_neto = min(peor_neto, neto)
+        
+        resultado = jugar(data)
+        ganancia = apuesta * resultado['multiplicador'] if resultado['gano'] else 0
+        ganancia_neta = ganancia - apuesta
+        neto += ganancia_neta
+        juegos.append({
+            'user_id': current_user.id,
+            'tipo_juego': juego,
+            'apuesta': apuesta,
+            'resultado': texto_resultado(resultado),
+            'ganancia': ganancia_neta,
+            'detalles': json.dumps(resultado),
+            'fecha': fecha
+        })
+        resultados.append({'resultado': resultado, 'ganancia_neta': ganancia_neta})
+        
+        if stop_loss is not None and -neto >= stop_loss:
+            motivo = 'stop_loss'
+            break
+        if stop_win is not None and neto >= stop_win:
+            motivo = 'stop_win'
+            break
+    
+    # El saldo en la base debe cubrir cada ronda: al menos apuesta - peor_neto
+    saldo = mover_saldo(current_user, neto, minimo=apuesta - peor_neto)
+    if saldo is None:
+        db.session.rollback()
+        return jsonify({'error': 'No tienes suficientes puntos'}), 400
+    current_user.registrar_casino(juego, apuesta * len(juegos), [j['ganancia'] for j in juegos])
+    db.session.execute(insert(CasinoGame), juegos)
+    db.session.commit()
+    
+    return jsonify({
+        'success': True,
+        'rondas_jugadas': len(juegos),
+        'motivo_fin': motivo,
+        'ganancia_neta': neto,
+        'resultados': resultados,
+        'puntos_actuales': saldo
+    })
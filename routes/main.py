@@ -1,9 +1,12 @@
 from flask import Blueprint, render_template, redirect, url_for, session, request, flash
 from flask_login import login_required, current_user
-from models import Transaction, UserAchievement, Achievement, UserMision, db
-from utils import calcular_impacto_ambiental, obtener_ranking_estudiantes, estadisticas_globales, asignar_misiones
+from sqlalchemy.orm import joinedload
+from database import solo_lectura
+from models import Transaction, UserAchievement, Achievement, db
+from utils import calcular_impacto_ambiental, obtener_estadisticas_globales, misiones_activas
+from ranking import obtener_servicio_ranking
+from progresion import obtener_niveles
 from config import Config
-from datetime import date, timedelta
 from forms import RegistroForm, LoginForm, RequestResetForm, ResetPasswordForm, ChangePasswordForm
 from flask_babel import gettext as _
 
@@ -21,52 +24,23 @@ def index():
 @login_required
 def dashboard():
     """Dashboard principal del estudiante"""
-    # Actualizar racha y asignar misiones
-    current_user.actualizar_racha()
-    asignar_misiones(current_user)
-    
-    # Obtener misiones activas
-    today = date.today()
-    start_of_week = today - timedelta(days=today.weekday())
-    misiones_activas = UserMision.query.filter(
-        UserMision.user_id == current_user.id,
-        UserMision.completada == False,
-        UserMision.fecha_asignacion >= start_of_week
-    ).order_by(UserMision.fecha_asignacion.desc()).all()
+    # Actualizar racha: solo escribe en la primera visita del día
+    if current_user.registrar_actividad():
+        db.session.commit()
+    
+    # Misiones del periodo: se calculan a partir del usuario y la fecha, sin escribir
+    misiones = misiones_activas(current_user)
     
     # Calcular progreso al siguiente nivel
-    niveles = Config.NIVELES
-    nivel_actual = current_user.nivel
+    niveles = obtener_niveles()
     puntos_actuales = current_user.puntos_totales
-    
-    # Encontrar siguiente nivel
-    siguiente_nivel = None
-    puntos_siguiente = None
-    for nivel, puntos_min in sorted(niveles.items(), key=lambda x: x[1]):
-        if puntos_min > puntos_actuales:
-            siguiente_nivel = nivel
-            puntos_siguiente = puntos_min
-            break
-    
-    # Si ya es Eco Maestro
-    if not siguiente_nivel:
-        siguiente_nivel = "Eco Maestro"
-        puntos_siguiente = puntos_actuales
-    
-    # Calcular porcentaje de progreso
-    nivel_keys = list(niveles.keys())
-    if nivel_actual in nivel_keys:
-        idx_actual = nivel_keys.index(nivel_actual)
-        puntos_nivel_actual = niveles[nivel_actual]
-        
-        if idx_actual < len(nivel_keys) - 1:
-            puntos_siguiente_nivel = niveles[nivel_keys[idx_actual + 1]]
-            rango = puntos_siguiente_nivel - puntos_nivel_actual
-            progreso = ((puntos_actuales - puntos_nivel_actual) / rango) * 100
-        else:
-            progreso = 100
+    siguiente = niveles.siguiente(puntos_actuales)
+    if siguiente:
+        siguiente_nivel, puntos_siguiente = siguiente
     else:
-        progreso = 0
+        # Ya está en el último nivel
+        siguiente_nivel, puntos_siguiente = niveles.nivel(puntos_actuales), puntos_actuales
+    progreso = niveles.progreso(puntos_actuales)
     
     # Obtener últimas transacciones
     ultimas_transacciones = Transaction.query.filter_by(user_id=current_user.id)\
@@ -76,6 +50,7 @@ def dashboard():
     
     # Obtener logros recientes
     logros_recientes = UserAchievement.query.filter_by(user_id=current_user.id)\
+        .options(joinedload(UserAchievement.logro))\
         .order_by(UserAchievement.fecha_obtencion.desc())\
         .limit(3)\
         .all()
@@ -83,9 +58,10 @@ def dashboard():
     # Calcular impacto ambiental
     impacto = calcular_impacto_ambiental(current_user.id)
     
-    # Obtener ranking
-    ranking = obtener_ranking_estudiantes(10)
-    posicion_usuario = next((i+1 for i, u in enumerate(ranking) if u.id == current_user.id), None)
+    # Obtener ranking y posición exacta del usuario
+    servicio_ranking = obtener_servicio_ranking()
+    ranking = servicio_ranking.estudiantes(10)
+    posicion_usuario, total_estudiantes = servicio_ranking.posicion(current_user)
     
     return render_template('index.html',
                          progreso=min(progreso, 100),
@@ -96,7 +72,8 @@ def dashboard():
                          impacto=impacto,
                          ranking=ranking[:5],
                          posicion_usuario=posicion_usuario,
-                         misiones_activas=misiones_activas)
+                         total_estudiantes=total_estudiantes,
+                         misiones_activas=misiones)
 
 
 @main_bp.route('/profile', methods=['GET', 'POST'])
@@ -127,9 +104,16 @@ def profile():
     except Exception:
         impacto = {'co2': 0, 'agua': 0, 'energia': 0}
     
-    total_reciclajes = Transaction.query.filter_by(user_id=current_user.id, tipo='reciclaje').count()
-    total_quizzes = Transaction.query.filter_by(user_id=current_user.id, tipo='quiz').count()
-    total_canjes = Transaction.query.filter_by(user_id=current_user.id, tipo='canje').count()
+    # Contadores de actividad mantenidos en user_stats (sin contar el historial)
+    stats = current_user.stats
+    total_reciclajes = stats.reciclajes if stats else 0
+    total_quizzes = stats.quizzes if stats else 0
+    total_canjes = stats.canjes if stats else 0
+    
+    # Posición en el ranking y estudiantes cercanos
+    servicio_ranking = obtener_servicio_ranking()
+    posicion_usuario, total_estudiantes = servicio_ranking.posicion(current_user)
+    vecinos_arriba, vecinos_abajo = servicio_ranking.vecinos(current_user, 5)
     
     return render_template('profile/profile.html', 
                            title=_('Mi Perfil'), 
@@ -140,21 +124,26 @@ def profile():
                            impacto=impacto,
                            total_reciclajes=total_reciclajes,
                            total_quizzes=total_quizzes,
-                           total_canjes=total_canjes)
+                           total_canjes=total_canjes,
+                           posicion_usuario=posicion_usuario,
+                           total_estudiantes=total_estudiantes,
+                           vecinos_arriba=vecinos_arriba,
+                           vecinos_abajo=vecinos_abajo)
     
 
 
 
 @main_bp.route('/rankings')
 @login_required
+@solo_lectura
 def rankings():
     """Página de rankings"""
-    from utils import obtener_ranking_facultades, obtener_ranking_carreras
+    servicio = obtener_servicio_ranking()
     
-    ranking_estudiantes = obtener_ranking_estudiantes(20)
-    ranking_facultades = obtener_ranking_facultades()
-    ranking_carreras = obtener_ranking_carreras()
-    stats = estadisticas_globales()
+    ranking_estudiantes = servicio.estudiantes(20)
+    ranking_facultades = servicio.facultades()
+    ranking_carreras = servicio.carreras()
+    stats = obtener_estadisticas_globales()
     
     return render_template('rankings/rankings.html',
                          ranking_estudiantes=ranking_estudiantes,
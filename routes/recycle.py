@@ -1,10 +1,11 @@
-from flask import Blueprint, render_template, redirect, url_for, flash, request
+from flask import Blueprint, render_template, redirect, url_for, flash, request, jsonify
 from flask_login import login_required, current_user
+from database import solo_lectura
 from models import db, Material, Transaction, Quiz, QuizQuestion, UserQuiz
-from forms import ReciclajeForm
+from forms import ReciclajeForm, ReciclajeLoteForm
+from utils import registrar_reciclaje, es_entero
+from config import Config
 import json
-from utils import verificar_logros, actualizar_progreso_mision
-from flask_babel import gettext as _
 
 recycle_bp = Blueprint('recycle', __name__, url_prefix='/recycle')
 
@@ -13,53 +14,26 @@ recycle_bp = Blueprint('recycle', __name__, url_prefix='/recycle')
 def index():
     """Página principal de reciclaje"""
     form = ReciclajeForm()
+    # La entrega con varios materiales se envía a recycle.lote
+    form_lote = ReciclajeLoteForm(formdata=None)
     
     # Cargar materiales activos
     materiales = Material.query.filter_by(activo=True).all()
-    form.material_id.choices = [(m.id, f"{m.nombre} - {m.puntos_valor} pts") for m in materiales]
+    opciones = _opciones_materiales(materiales)
+    form.material_id.choices = opciones
+    for linea in form_lote.lineas:
+        linea.material_id.choices = opciones
     
     if form.validate_on_submit():
         material = Material.query.get(form.material_id.data)
         cantidad = form.cantidad.data
         
         if material:
-            puntos_ganados = material.puntos_valor * cantidad
-            metadata = json.dumps({
-                'material_id': material.id,
-                'material_nombre': material.nombre,
-                'cantidad': cantidad,
-                'puntos_unitarios': material.puntos_valor
-            })
-            
-            current_user.agregar_puntos(
-                puntos_ganados,
-                'reciclaje',
-                f"Reciclaje de {cantidad} {material.nombre}"
-            )
-            
-            ultima_transaccion = Transaction.query.filter_by(user_id=current_user.id)\
-                .order_by(Transaction.fecha.desc()).first()
-            if ultima_transaccion:
-                ultima_transaccion.metadata_json = metadata
-            
-            db.session.commit()
-
-            # Actualizar misiones de tipo 'reciclaje'
-            misiones_completadas = actualizar_progreso_mision(current_user, 'reciclaje', cantidad)
-            if misiones_completadas:
-                for mision in misiones_completadas:
-                    flash(_('¡Misión cumplida: %(nombre)s! Recompensa: %(puntos)s puntos.',
-                            nombre=mision.nombre, puntos=mision.recompensa_puntos), 'success')
-            
-            # Verificar logros
-            logros = verificar_logros(current_user)
-            if logros:
-                for logro in logros:
-                    flash(f'🏆 ¡Nuevo logro desbloqueado: {logro.nombre}!', 'success')
-
+            # Transacción, línea de reciclaje, impacto y evento en un solo commit
+            transaccion = registrar_reciclaje(current_user, [(material, cantidad)])
             db.session.commit()
             
-            flash(f'¡Excelente! Has ganado {puntos_ganados} puntos por reciclar {cantidad} {material.nombre}. 🌱', 'success')
+            flash(f'¡Excelente! Has ganado {transaccion.puntos} puntos por reciclar {cantidad} {material.nombre}. 🌱', 'success')
             return redirect(url_for('recycle.index'))
     
     historial = Transaction.query.filter_by(user_id=current_user.id, tipo='reciclaje')\
@@ -67,11 +41,85 @@ def index():
         .limit(10)\
         .all()
     
-    return render_template('recycle/recycle.html', form=form, materiales=materiales, historial=historial)
+    return render_template('recycle/recycle.html', form=form, form_lote=form_lote,
+                           materiales=materiales, historial=historial)
+
+
+def _opciones_materiales(materiales):
+    return [(m.id, f"{m.nombre} - {m.puntos_valor} pts") for m in materiales]
+
+
+def _lineas_desde_json(datos):
+    """([(material, cantidad)], None) a partir de las líneas del JSON, o (None, error)"""
+    if not isinstance(datos, list) or not datos:
+        return None, 'La entrega no tiene materiales'
+    if len(datos) > Config.RECICLAJE_MAX_LINEAS:
+        return None, f'Máximo {Config.RECICLAJE_MAX_LINEAS} materiales por entrega'
+    try:
+        pares = [(d['material_id'], d['cantidad']) for d in datos]
+    except (KeyError, TypeError, IndexError):
+        return None, 'Cada línea necesita material_id y cantidad'
+    if not all(es_entero(material_id) and es_entero(cantidad) for material_id, cantidad in pares):
+        return None, 'material_id y cantidad deben ser números enteros'
+    if any(not 1 <= cantidad <= Config.RECICLAJE_MAX_CANTIDAD for _, cantidad in pares):
+        return None, f'La cantidad debe estar entre 1 y {Config.RECICLAJE_MAX_CANTIDAD}'
+    
+    ids = {material_id for material_id, _ in pares}
+    materiales = {m.id: m for m in Material.query.filter(Material.id.in_(ids), Material.activo == True)}
+    if len(materiales) != len(ids):
+        return None, 'Material no válido'
+    return [(materiales[material_id], cantidad) for material_id, cantidad in pares], None
+
+
+@recycle_bp.route('/lote', methods=['POST'])
+@login_required
+def lote():
+    """Registrar una entrega con varios materiales"""
+    form = ReciclajeLoteForm()
+    materiales = {m.id: m for m in Material.query.filter_by(activo=True)}
+    opciones = _opciones_materiales(materiales.values())
+    for linea in form.lineas:
+        linea.material_id.choices = opciones
+    
+    if not form.validate_on_submit():
+        flash('Revisa los materiales y cantidades de la entrega.', 'danger')
+        return redirect(url_for('recycle.index'))
+    
+    lineas = [(materiales[linea.material_id.data], linea.cantidad.data) for linea in form.lineas]
+    transaccion = registrar_reciclaje(current_user, lineas)
+    db.session.commit()
+    
+    items = sum(cantidad for _, cantidad in lineas)
+    flash(f'¡Excelente! Has ganado {transaccion.puntos} puntos por reciclar {items} ítems. 🌱', 'success')
+    return redirect(url_for('recycle.index'))
+
+
+@recycle_bp.route('/api/reciclaje', methods=['POST'])
+@login_required
+def api_reciclaje():
+    """Registrar una entrega por JSON: {"lineas": [{"material_id": 1, "cantidad": 3}, ...]}"""
+    data = request.get_json(silent=True) or {}
+    if not isinstance(data, dict):
+        return jsonify({'error': 'La entrega no tiene materiales'}), 400
+    lineas, error = _lineas_desde_json(data.get('lineas'))
+    if error:
+        return jsonify({'error': error}), 400
+    
+    transaccion = registrar_reciclaje(current_user, lineas)
+    db.session.commit()
+    
+    return jsonify({
+        'success': True,
+        'transaccion_id': transaccion.id,
+        'puntos': transaccion.puntos,
+        'items': sum(cantidad for _, cantidad in lineas),
+        'puntos_actuales': current_user.puntos_totales
+    })
 
 
 @recycle_bp.route('/history')
 @login_required
+@solo_lectura
 def history():
     """Historial completo de reciclaje"""
     page = request.args.get('page', 1, type=int)
@@ -128,17 +176,8 @@ def quiz(quiz_id):
         db.session.add(user_quiz)
         
         if puntos > 0:
-            current_user.agregar_puntos(puntos, 'quiz', f'Quiz completado: {quiz.titulo}')
-
-            # Actualizar misiones de tipo 'quiz'
-            misiones_completadas = actualizar_progreso_mision(current_user, 'quiz')
-            for mision in misiones_completadas:
-                 flash(_('¡Misión cumplida: %(nombre)s! Recompensa: %(puntos)s puntos.',
-                            nombre=mision.nombre, puntos=mision.recompensa_puntos), 'success')
-
-            # Verificar logros
-            logros = verificar_logros(current_user)
-
+            current_user.agregar_puntos(puntos, 'quiz', f'Quiz completado: {quiz.titulo}',
+                                        datos_evento={'quiz_id': quiz.id})
             db.session.commit()
             
             flash(f'¡Perfecto! Has ganado {puntos} puntos. 🎓', 'success')
@@ -174,14 +213,8 @@ def registrar_evento(tipo):
     
     if tipo in eventos_puntos:
         puntos, nombre = eventos_puntos[tipo]
-        current_user.agregar_puntos(puntos, 'evento', f'Participación en: {nombre}')
-
-        # Actualizar misiones de tipo 'evento'
-        misiones_completadas = actualizar_progreso_mision(current_user, 'evento')
-        for mision in misiones_completadas:
-             flash(_('¡Misión cumplida: %(nombre)s! Recompensa: %(puntos)s puntos.',
-                        nombre=mision.nombre, puntos=mision.recompensa_puntos), 'success')
-
+        current_user.agregar_puntos(puntos, 'evento', f'Participación en: {nombre}',
+                                    datos_evento={'evento': tipo})
         db.session.commit()
         
         flash(f'¡Gracias por participar en {nombre}! Has ganado {puntos} puntos. 🌍', 'success')
@@ -1,8 +1,11 @@
 import string
-import random
 from flask import Blueprint, render_template, redirect, url_for, flash, request
 from flask_login import login_required, current_user
+from database import solo_lectura
+from sqlalchemy.orm import joinedload
 from models import db, Reward, UserReward, Transaction
+from saldos import descontar_stock
+from aleatorio import obtener_rng
 
 rewards_bp = Blueprint('rewards', __name__, url_prefix='/rewards')
 
@@ -10,11 +13,12 @@ def generar_codigo_canje():
     """Genera un código único tipo UCA-A1B2C3"""
     chars = string.ascii_uppercase + string.digits
     # Generamos 6 caracteres aleatorios
-    random_str = ''.join(random.choices(chars, k=6))
+    random_str = ''.join(obtener_rng('cupones').choices(chars, k=6))
     return f"UCA-{random_str}"
 
 @rewards_bp.route('/')
 @login_required
+@solo_lectura
 def index():
     """Catálogo de recompensas"""
     categoria = request.args.get('categoria', 'todas')
@@ -52,29 +56,34 @@ def canjear(reward_id):
         flash('Esta recompensa no tiene stock disponible.', 'warning')
         return redirect(url_for('rewards.index'))
     
-    # Restar puntos (esto ya genera la transacción)
-    if current_user.restar_puntos(recompensa.puntos_costo, 'canje', f'Canje: {recompensa.nombre}'):
-        
-        # === CORRECCIÓN AQUÍ: Generamos el código antes de guardar ===
-        codigo_generado = generar_codigo_canje()
-        
-        # Crear registro de canje con el código
-        user_reward = UserReward(
-            user_id=current_user.id,
-            reward_id=recompensa.id,
-            estado='pendiente',
-            codigo=codigo_generado  # <--- ASIGNAMOS EL CÓDIGO AQUÍ
-        )
-        
-        # Reducir stock
-        recompensa.stock_disponible -= 1
-        
-        db.session.add(user_reward)
-        db.session.commit()
-        
-        flash(f'¡Felicitaciones! Has canjeado: {recompensa.nombre}. Tu código es {codigo_generado}. 🎁', 'success')
-    else:
-        flash('Error al procesar el canje.', 'danger')
+    # Restar puntos (esto ya genera la transacción). Puntos y stock se descuentan
+    # con UPDATE condicionales: si otra petición se adelantó, no se canjea
+    if not current_user.restar_puntos(recompensa.puntos_costo, 'canje', f'Canje: {recompensa.nombre}',
+                                      metadata={'reward_id': recompensa.id}):
+        db.session.rollback()
+        flash('No tienes suficientes puntos para canjear esta recompensa.', 'danger')
+        return redirect(url_for('rewards.index'))
+    
+    if descontar_stock(recompensa) is None:
+        db.session.rollback()
+        flash('Esta recompensa no tiene stock disponible.', 'warning')
+        return redirect(url_for('rewards.index'))
+    
+    # === CORRECCIÓN AQUÍ: Generamos el código antes de guardar ===
+    codigo_generado = generar_codigo_canje()
+    
+    # Crear registro de canje con el código
+    user_reward = UserReward(
+        user_id=current_user.id,
+        reward_id=recompensa.id,
+        estado='pendiente',
+        codigo=codigo_generado  # <--- ASIGNAMOS EL CÓDIGO AQUÍ
+    )
+    
+    db.session.add(user_reward)
+    db.session.commit()
+    
+    flash(f'¡Felicitaciones! Has canjeado: {recompensa.nombre}. Tu código es {codigo_generado}. 🎁', 'success')
     
     return redirect(url_for('rewards.index'))
 
@@ -84,6 +93,7 @@ def canjear(reward_id):
 def mis_recompensas():
     """Recompensas canjeadas por el usuario"""
     canjes = UserReward.query.filter_by(user_id=current_user.id)\
+        .options(joinedload(UserReward.recompensa))\
         .order_by(UserReward.fecha_canje.desc())\
         .all()
     
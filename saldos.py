@@ -0,0 +1,122 @@
+"""
+Motor de saldos.
+
+Los débitos y créditos de puntos se aplican con un único UPDATE condicional
+
+    UPDATE users SET puntos_totales = puntos_totales + :delta
+    WHERE id = :id AND puntos_totales >= :minimo
+
+(con RETURNING del saldo nuevo si el motor lo soporta), en lugar de leer el
+saldo en Python y escribir el resultado. Dos peticiones paralelas del mismo
+usuario no pueden pisarse ni gastar de más: la segunda ve el saldo ya
+descontado. El stock de recompensas usa el mismo patrón.
+"""
+import threading
+import time
+from flask import current_app, has_app_context
+from sqlalchemy import inspect, select, update
+from sqlalchemy.orm.attributes import set_committed_value
+from models import db
+
+
+class MetricasSaldos:
+    """Contadores de contención del motor de saldos (uno por aplicación)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.operaciones = 0
+        self.rechazos = 0  # la condición del UPDATE no se cumplió
+        self.carreras = 0  # rechazos que el saldo leído en la petición no anticipaba
+        self.segundos_en_update = 0.0  # incluye la espera por el bloqueo de la fila / base
+
+    def registrar(self, segundos, aplicado, carrera=False):
+        with self._lock:
+            self.operaciones += 1
+            self.segundos_en_update += segundos
+            if not aplicado:
+                self.rechazos += 1
+                if carrera:
+                    self.carreras += 1
+
+    def metricas(self):
+        """Totales y espera media por operación"""
+        return {
+            'operaciones': self.operaciones,
+            'rechazos': self.rechazos,
+            'carreras': self.carreras,
+            'espera_media_ms': round(self.segundos_en_update * 1000 / self.operaciones, 3)
+                               if self.operaciones else None
+        }
+
+
+def obtener_metricas_saldos():
+    """Métricas de la aplicación actual, o None fuera de una aplicación"""
+    if has_app_context():
+        return current_app.extensions.get('saldos')
+    return None
+
+
+def _actualizar_condicional(modelo, id_, columna, delta, minimo):
+    """Ejecuta el UPDATE; devuelve (valor nuevo o None, segundos)"""
+    sentencia = update(modelo)\
+        .where(modelo.id == id_)\
+        .values({columna: getattr(modelo, columna) + delta})\
+        .execution_options(synchronize_session=False)
+    if minimo is not None:
+        sentencia = sentencia.where(getattr(modelo, columna) >= minimo)
+
+    inicio = time.perf_counter()
+    if db.session.get_bind().dialect.update_returning:
+        nuevo = db.session.execute(sentencia.returning(getattr(modelo, columna))).scalar()
+    elif db.session.execute(sentencia).rowcount:
+        nuevo = db.session.execute(select(getattr(modelo, columna)).where(modelo.id == id_)).scalar()
+    else:
+        nuevo = None
+    return nuevo, time.perf_counter() - inicio
+
+
+def _mover(objeto, columna, delta, minimo):
+    if hasattr(objeto, '_get_current_object'):
+        objeto = objeto._get_current_object()  # current_user
+    estado = inspect(objeto)
+    if not estado.persistent:
+        # Aún sin fila en la base: no hay con quién competir
+        actual = getattr(objeto, columna) or 0
+        if minimo is not None and actual < minimo:
+            return None
+        setattr(objeto, columna, actual + delta)
+        return actual + delta
+
+    # Valor que la petición cree vigente (sin provocar una recarga)
+    leido = objeto.__dict__.get(columna)
+    nuevo, segundos = _actualizar_condicional(type(objeto), objeto.id, columna, delta, minimo)
+    metricas = obtener_metricas_saldos()
+    if metricas is not None:
+        carrera = nuevo is None and minimo is not None and isinstance(leido, int) and leido >= minimo
+        metricas.registrar(segundos, nuevo is not None, carrera)
+
+    if nuevo is None:
+        # Que la siguiente lectura traiga el valor real
+        db.session.expire(objeto, [columna])
+    else:
+        set_committed_value(objeto, columna, nuevo)
+    return nuevo
+
+
+def mover_saldo(user, delta, minimo=None):
+    """
+    Suma delta (negativo para débitos) a puntos_totales en la base. Con minimo,
+    solo se aplica si el saldo vigente es >= minimo. Devuelve el saldo nuevo, o
+    None si la condición no se cumplió. No hace commit.
+    """
+    return _mover(user, 'puntos_totales', delta, minimo)
+
+
+def debitar(user, cantidad):
+    """Descuenta cantidad solo si el saldo alcanza. Devuelve el saldo nuevo o None"""
+    return mover_saldo(user, -cantidad, minimo=cantidad)
+
+
+def descontar_stock(recompensa, cantidad=1):
+    """Descuenta stock_disponible solo si queda suficiente. Devuelve el stock nuevo o None"""
+    return _mover(recompensa, 'stock_disponible', -cantidad, minimo=cantidad)
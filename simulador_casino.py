@@ -0,0 +1,142 @@
+"""
+Simulador Monte Carlo del casino (vectorizado con NumPy).
+
+Evalúa las tablas de pago de pagos.py sobre arreglos de resultados aleatorios
+para estimar, por tipo de apuesta, el RTP (retorno esperado por punto
+apostado), la varianza del resultado neto y la curva de ruina de jugadores que
+apuestan siempre el máximo permitido (CASINO_MAX_BET_PERCENT del saldo).
+
+NumPy es una dependencia opcional: solo la necesita este script.
+
+Uso: python simulador_casino.py [--rondas 10000000] [--juego dados]
+                                [--jugadores 10000] [--saldo 500] [--semilla 1]
+"""
+import argparse
+import sys
+import time
+import pagos
+from config import Config
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None
+
+LOTE = 2_000_000  # resultados por arreglo, para acotar la memoria
+
+# (juego, tipo_apuesta, valor_apostado) que se simulan por defecto
+APUESTAS = (
+    [('ruleta', 'numero', 7)] +
+    [('ruleta', tipo, None) for tipo in ('par', 'impar', 'alto', 'bajo')] +
+    [('ruleta', 'docena', 0), ('slots', None, None)] +
+    [('dados', 'suma', suma) for suma in range(2, 13)] +
+    [('dados', tipo, None) for tipo in ('par', 'impar', 'mayor7', 'menor7', 'dobles')]
+)
+
+
+# --- Pagos sobre arreglos de resultados ---
+
+def _aplicar(apuesta, resultado, valor):
+    return np.where(apuesta.gana(*resultado, valor=valor), apuesta.multiplicador(valor), 0)
+
+
+def pagos_ruleta(numeros, tipo, valor):
+    """Multiplicadores de una apuesta de ruleta para un arreglo de números ganadores"""
+    return _aplicar(pagos.RULETA[tipo], (numeros,), valor)
+
+
+def pagos_slots(a, b, c):
+    """Multiplicadores para arreglos de índices de símbolo de los tres rodillos"""
+    condiciones = [apuesta.gana(a, b, c) for apuesta in pagos.SLOTS]
+    return np.select(condiciones, [apuesta.multiplicador() for apuesta in pagos.SLOTS], 0)
+
+
+def pagos_dados(d1, d2, tipo, valor):
+    """Multiplicadores de una apuesta de dados para arreglos de dados"""
+    return _aplicar(pagos.DADOS[tipo], (d1, d2), valor)
+
+
+def muestrear(rng, juego, tipo, valor, n):
+    """Multiplicadores de n rondas aleatorias"""
+    if juego == 'ruleta':
+        return pagos_ruleta(rng.integers(0, pagos.RULETA_NUMEROS, n), tipo, valor)
+    if juego == 'slots':
+        a, b, c = rng.integers(0, len(pagos.SLOTS_SIMBOLOS), (3, n))
+        return pagos_slots(a, b, c)
+    d1, d2 = rng.integers(1, pagos.DADOS_CARAS + 1, (2, n))
+    return pagos_dados(d1, d2, tipo, valor)
+
+
+# --- Métricas ---
+
+def rtp(rng, juego, tipo, valor, rondas):
+    """(RTP, varianza del neto por punto apostado) estimados con 'rondas' tiradas"""
+    suma = suma_cuadrados = 0.0
+    restantes = rondas
+    while restantes:
+        n = min(LOTE, restantes)
+        multiplicadores = muestrear(rng, juego, tipo, valor, n).astype(np.float64)
+        suma += multiplicadores.sum()
+        suma_cuadrados += np.square(multiplicadores).sum()
+        restantes -= n
+    media = suma / rondas
+    # El neto es multiplicador - 1: misma varianza que el multiplicador
+    return media, suma_cuadrados / rondas - media ** 2
+
+
+def curva_de_ruina(rng, juego, tipo, valor, jugadores, saldo_inicial, rondas, cortes):
+    """
+    Fracción de jugadores arruinados tras cada ronda de 'cortes' apostando
+    siempre el máximo (int(saldo * CASINO_MAX_BET_PERCENT)). Un jugador queda
+    arruinado cuando ese máximo es menor que CASINO_MIN_BET.
+    """
+    saldos = np.full(jugadores, saldo_inicial, dtype=np.int64)
+    curva = {}
+    for ronda in range(1, rondas + 1):
+        apuestas = (saldos * Config.CASINO_MAX_BET_PERCENT).astype(np.int64)
+        activos = apuestas >= Config.CASINO_MIN_BET
+        multiplicadores = muestrear(rng, juego, tipo, valor, jugadores)
+        saldos += np.where(activos, apuestas * (multiplicadores - 1), 0)
+        if ronda in cortes:
+            arruinados = (saldos * Config.CASINO_MAX_BET_PERCENT).astype(np.int64) < Config.CASINO_MIN_BET
+            curva[ronda] = arruinados.mean()
+    return curva
+
+
+def _nombre(juego, tipo, valor):
+    return ' '.join(str(parte) for parte in (juego, tipo, valor) if parte is not None)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Simulador Monte Carlo de las tablas de pago del casino')
+    parser.add_argument('--rondas', type=int, default=10_000_000, help='Rondas por tipo de apuesta para el RTP')
+    parser.add_argument('--juego', choices=('ruleta', 'slots', 'dados'), default=None,
+                        help='Simular solo este juego')
+    parser.add_argument('--jugadores', type=int, default=10_000, help='Jugadores en la curva de ruina')
+    parser.add_argument('--saldo', type=int, default=500, help='Saldo inicial de cada jugador')
+    parser.add_argument('--semilla', type=int, default=None)
+    args = parser.parse_args()
+
+    if np is None:
+        sys.exit('El simulador requiere NumPy: pip install numpy')
+
+    rng = np.random.default_rng(args.semilla)
+    cortes = (10, 50, 100, 250)
+    apuestas = [a for a in APUESTAS if args.juego in (None, a[0])]
+
+    print(f'{args.rondas:,} rondas por apuesta; ruina con {args.jugadores:,} jugadores, '
+          f'saldo {args.saldo} y apuesta máxima del {Config.CASINO_MAX_BET_PERCENT:.0%}\n')
+    print(f'{"Apuesta":<18}{"RTP":>8}{"Ventaja":>9}{"Varianza":>10}'
+          + ''.join(f'{"Ruina@" + str(c):>11}' for c in cortes) + f'{"Seg.":>7}')
+    for juego, tipo, valor in apuestas:
+        inicio = time.perf_counter()
+        retorno, varianza = rtp(rng, juego, tipo, valor, args.rondas)
+        curva = curva_de_ruina(rng, juego, tipo, valor, args.jugadores, args.saldo, max(cortes), cortes)
+        segundos = time.perf_counter() - inicio
+        # Ventaja de la casa negativa = cada ronda crea puntos en promedio
+        print(f'{_nombre(juego, tipo, valor):<18}{retorno:>8.4f}{1 - retorno:>9.4f}{varianza:>10.3f}'
+              + ''.join(f'{curva[c]:>11.3f}' for c in cortes) + f'{segundos:>7.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -72,4 +72,60 @@ function validarApuesta(cantidad, saldoActual) {
     }
     
     return { valido: true };
-}
\ No newline at end of file
+}
+
+// Autoplay: juega varias rondas en una sola petición al servidor
+async function autoJugar(juego, obtenerDatos) {
+    const datos = obtenerDatos();
+    const saldoActual = parseInt(document.getElementById('saldo-actual').textContent);
+    
+    const validacion = validarApuesta(datos.apuesta, saldoActual);
+    if (!validacion.valido) {
+        mostrarMensajeJuego(validacion.mensaje, 'error');
+        return;
+    }
+    
+    const leerLimite = id => {
+        const valor = parseInt(document.getElementById(id).value);
+        return isNaN(valor) ? null : valor;
+    };
+    datos.rondas = leerLimite('autoplay-rondas') || 10;
+    datos.stop_loss = leerLimite('autoplay-stop-loss');
+    datos.stop_win = leerLimite('autoplay-stop-win');
+    
+    deshabilitarBoton('btn-autoplay', 3);
+    
+    try {
+        const response = await fetch(`/casino/${juego}/autoplay`, {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+            },
+            body: JSON.stringify(datos)
+        });
+        
+        const resultado = await response.json();
+        
+        if (!response.ok) {
+            throw new Error(resultado.error || 'Error en el autoplay');
+        }
+        
+        const motivos = {
+            rondas: 'rondas completadas',
+            stop_loss: 'límite de pérdida alcanzado',
+            stop_win: 'límite de ganancia alcanzado',
+            saldo: 'saldo insuficiente'
+        };
+        const neto = resultado.ganancia_neta;
+        mostrarMensajeJuego(
+            `${resultado.rondas_jugadas} rondas (${motivos[resultado.motivo_fin]}). Ganancia neta: ${neto > 0 ? '+' : ''}${neto} pts`,
+            neto > 0 ? 'win' : 'info'
+        );
+        
+        actualizarSaldo(resultado.puntos_actuales);
+        
+    } catch (error) {
+        mostrarMensajeJuego(error.message, 'error');
+        console.error('Error:', error);
+    }
+}
@@ -16,10 +16,17 @@ document.addEventListener('DOMContentLoaded', function() {
     }
 });
 
+function datosDados() {
+    const tipoApuesta = document.getElementById('tipo-apuesta').value;
+    return {
+        apuesta: parseInt(document.getElementById('cantidad-apuesta').value),
+        tipo: tipoApuesta,
+        valor: tipoApuesta === 'suma' ? parseInt(document.getElementById('suma-elegida').value) : null
+    };
+}
+
 async function lanzarDados() {
     const cantidadInput = document.getElementById('cantidad-apuesta');
-    const tipoApuesta = document.getElementById('tipo-apuesta').value;
-    const sumaElegida = document.getElementById('suma-elegida').value;
     const saldoActual = parseInt(document.getElementById('saldo-actual').textContent);
     
     const cantidad = parseInt(cantidadInput.value);
@@ -35,11 +42,7 @@ async function lanzarDados() {
     deshabilitarBoton('btn-lanzar', 4);
     
     // Preparar datos
-    const data = {
-        apuesta: cantidad,
-        tipo: tipoApuesta,
-        valor: tipoApuesta === 'suma' ? parseInt(sumaElegida) : null
-    };
+    const data = datosDados();
     
     const dado1 = document.getElementById('dado-1');
     const dado2 = document.getElementById('dado-2');
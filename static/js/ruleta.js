@@ -16,10 +16,17 @@ document.addEventListener('DOMContentLoaded', function() {
     }
 });
 
+function datosRuleta() {
+    const tipoApuesta = document.getElementById('tipo-apuesta').value;
+    return {
+        apuesta: parseInt(document.getElementById('cantidad-apuesta').value),
+        tipo: tipoApuesta,
+        valor: tipoApuesta === 'numero' ? parseInt(document.getElementById('numero-elegido').value) : null
+    };
+}
+
 async function girarRuleta() {
     const cantidadInput = document.getElementById('cantidad-apuesta');
-    const tipoApuesta = document.getElementById('tipo-apuesta').value;
-    const numeroElegido = document.getElementById('numero-elegido').value;
     const saldoActual = parseInt(document.getElementById('saldo-actual').textContent);
     
     const cantidad = parseInt(cantidadInput.value);
@@ -35,11 +42,7 @@ async function girarRuleta() {
     deshabilitarBoton('btn-girar', 5);
     
     // Preparar datos
-    const data = {
-        apuesta: cantidad,
-        tipo: tipoApuesta,
-        valor: tipoApuesta === 'numero' ? parseInt(numeroElegido) : null
-    };
+    const data = datosRuleta();
     
     try {
         // Animar ruleta
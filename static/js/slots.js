@@ -6,6 +6,10 @@ function obtenerSimboloAleatorio() {
     return SIMBOLOS[Math.floor(Math.random() * SIMBOLOS.length)];
 }
 
+function datosSlots() {
+    return { apuesta: parseInt(document.getElementById('cantidad-apuesta').value) };
+}
+
 async function girarSlots() {
     const cantidadInput = document.getElementById('cantidad-apuesta');
     const saldoActual = parseInt(document.getElementById('saldo-actual').textContent);
@@ -0,0 +1,55 @@
+import os
+import secrets
+import threading
+import unittest
+from app import create_app
+from config import Config
+from aleatorio import ProveedorAleatorio, obtener_rng
+from utils import jugar_dados
+
+class TestConfig(Config):
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = os.environ.get('TEST_DATABASE_URL') or 'sqlite:///:memory:'
+    WTF_CSRF_ENABLED = False
+    ALEATORIO_MODO = 'semilla'
+    ALEATORIO_SEMILLA = 42
+
+class AleatorioTestCase(unittest.TestCase):
+    def _tiradas(self, app, n=20):
+        with app.app_context():
+            return [(r['dado1'], r['dado2']) for r in (jugar_dados('par') for _ in range(n))]
+
+    def test_modo_semilla_reproducible(self):
+        primera = self._tiradas(create_app(TestConfig))
+        self.assertEqual(primera, self._tiradas(create_app(TestConfig)))
+
+        class OtraSemilla(TestConfig):
+            ALEATORIO_SEMILLA = 7
+        self.assertNotEqual(primera, self._tiradas(create_app(OtraSemilla)))
+
+    def test_cupones_siempre_csprng(self):
+        app = create_app(TestConfig)
+        with app.app_context():
+            self.assertIsInstance(obtener_rng('cupones'), secrets.SystemRandom)
+            self.assertNotIsInstance(obtener_rng('casino'), secrets.SystemRandom)
+
+    def test_un_generador_por_hilo(self):
+        proveedor = ProveedorAleatorio(modo='semilla', semilla=1)
+        generadores = []
+        hilo = threading.Thread(target=lambda: generadores.append(proveedor.generador('casino')))
+        hilo.start()
+        hilo.join()
+        self.assertIs(proveedor.generador('casino'), proveedor.generador('casino'))
+        self.assertIsNot(proveedor.generador('casino'), generadores[0])
+
+        # Tras reiniciar, el primer hilo vuelve a recibir la misma secuencia
+        proveedor.reiniciar()
+        otro = ProveedorAleatorio(modo='semilla', semilla=1)
+        self.assertEqual(proveedor.generador('casino').random(), otro.generador('casino').random())
+
+    def test_modo_invalido(self):
+        with self.assertRaises(ValueError):
+            ProveedorAleatorio(modo='cuantico')
+
+if __name__ == '__main__':
+    unittest.main()
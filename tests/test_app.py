@@ -1,3 +1,4 @@
+import os
 import unittest
 from app import create_app
 from config import Config
@@ -5,7 +6,7 @@ from models import db, User
 
 class TestConfig(Config):
     TESTING = True
-    SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    SQLALCHEMY_DATABASE_URI = os.environ.get('TEST_DATABASE_URL') or 'sqlite:///:memory:'
     WTF_CSRF_ENABLED = False
 
 class UserModelCase(unittest.TestCase):
@@ -1,10 +1,11 @@
+import os
 import pytest
 from app import create_app
 from config import Config
 
 class TestConfig(Config):
     TESTING = True
-    SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    SQLALCHEMY_DATABASE_URI = os.environ.get('TEST_DATABASE_URL') or 'sqlite:///:memory:'
     WTF_CSRF_ENABLED = False
 
 @pytest.fixture
@@ -21,3 +22,27 @@ def test_home_page(client):
     response = client.get('/', follow_redirects=True)
     assert response.status_code == 200
     assert b'Log In' in response.data
+
+def test_sqlite_produccion_pragmas(tmp_path):
+    """El perfil de producción aplica WAL y busy_timeout en cada conexión."""
+    from config import SQLiteProduccionConfig
+    from models import db
+
+    class ProdTestConfig(SQLiteProduccionConfig):
+        TESTING = True
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'prod.db'}"
+
+    app = create_app(ProdTestConfig)
+    with app.app_context():
+        assert db.session.execute(db.text('PRAGMA journal_mode')).scalar() == 'wal'
+        assert db.session.execute(db.text('PRAGMA busy_timeout')).scalar() == 10000
+        assert db.session.execute(db.text('PRAGMA foreign_keys')).scalar() == 1
+        db.session.remove()
+        db.engine.dispose()
+
+def test_cambiar_idioma(client):
+    """Cambiar de idioma guarda la preferencia y redirige."""
+    response = client.get('/language/en')
+    assert response.status_code == 302
+    with client.session_transaction() as sesion:
+        assert sesion['language'] == 'en'
@@ -0,0 +1,66 @@
+import os
+import unittest
+import threading
+import time
+from app import create_app
+from config import Config
+from cache import CacheTTL
+
+class TestConfig(Config):
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = os.environ.get('TEST_DATABASE_URL') or 'sqlite:///:memory:'
+    WTF_CSRF_ENABLED = False
+
+class CacheTTLTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app(TestConfig)
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        self.llamadas = 0
+
+    def tearDown(self):
+        self.app_context.pop()
+
+    def calcular_lento(self):
+        self.llamadas += 1
+        time.sleep(0.05)
+        return self.llamadas
+
+    def test_single_flight(self):
+        cache = CacheTTL(self.calcular_lento, ttl=60, stale=0)
+        resultados = []
+
+        def leer():
+            with self.app.app_context():
+                resultados.append(cache.obtener())
+
+        hilos = [threading.Thread(target=leer) for _ in range(10)]
+        for h in hilos:
+            h.start()
+        for h in hilos:
+            h.join()
+
+        self.assertEqual(self.llamadas, 1)
+        self.assertEqual(resultados, [1] * 10)
+
+    def test_stale_while_revalidate(self):
+        cache = CacheTTL(self.calcular_lento, ttl=0, stale=60)
+        self.assertEqual(cache.obtener(), 1)
+
+        # Vencido: se sirve el valor viejo y se refresca en segundo plano
+        self.assertEqual(cache.obtener(), 1)
+        with cache._lock:
+            pass
+        self.assertEqual(self.llamadas, 2)
+        self.assertEqual(cache._valor, 2)
+
+    def test_invalidar(self):
+        cache = CacheTTL(self.calcular_lento, ttl=60, stale=60)
+        self.assertEqual(cache.obtener(), 1)
+        self.assertEqual(cache.obtener(), 1)
+
+        cache.invalidar()
+        self.assertEqual(cache.obtener(), 2)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,149 @@
+import os
+import unittest
+from unittest import mock
+from sqlalchemy import func, insert, delete
+from app import create_app
+from config import Config
+from models import db, User, CasinoGame, UserStats, UserCasino
+from utils import reconstruir_casino
+import routes.casino
+
+class TestConfig(Config):
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = os.environ.get('TEST_DATABASE_URL') or 'sqlite:///:memory:'
+    WTF_CSRF_ENABLED = False
+
+# Slots que siempre pierden, para que los límites sean deterministas
+SLOTS_PERDEDOR = (lambda datos: {'rodillos': ['🌱', '🌿', '🍃'], 'gano': False, 'multiplicador': 0},
+                  lambda resultado: ''.join(resultado['rodillos']))
+
+class AutoplayTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app(TestConfig)
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+        user = User(username='jugador', email='jugador@uca.edu.ni', nombre_completo='Jugador',
+                    puntos_totales=1000)
+        user.set_password('password')
+        db.session.add(user)
+        db.session.commit()
+        self.user_id = user.id
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def autoplay(self, juego, **datos):
+        return self.peticion('post', f'/casino/{juego}/autoplay', json=datos)
+
+    def peticion(self, metodo, url, **kwargs):
+        client = self.app.test_client()
+        with client.session_transaction() as sesion:
+            sesion['_user_id'] = str(self.user_id)
+            sesion['_fresh'] = True
+        db.session.remove()
+        self.app_context.pop()
+        try:
+            return getattr(client, metodo)(url, **kwargs)
+        finally:
+            self.app_context.push()
+
+    def test_varias_rondas_en_una_peticion(self):
+        respuesta = self.autoplay('dados', apuesta=10, rondas=25, tipo='suma', valor=7)
+        datos = respuesta.get_json()
+
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual((datos['rondas_jugadas'], datos['motivo_fin']), (25, 'rondas'))
+        juegos, neto = db.session.query(func.count(CasinoGame.id), func.sum(CasinoGame.ganancia)).one()
+        self.assertEqual((juegos, neto), (25, datos['ganancia_neta']))
+        self.assertEqual(db.session.get(User, self.user_id).puntos_totales, 1000 + neto)
+        self.assertEqual(db.session.get(UserStats, self.user_id).apuestas_casino, 25)
+
+    def test_limites_de_perdida_y_saldo(self):
+        with mock.patch.dict(routes.casino.JUEGOS, {'slots': SLOTS_PERDEDOR}):
+            datos = self.autoplay('slots', apuesta=100, rondas=50, stop_loss=250).get_json()
+            self.assertEqual((datos['rondas_jugadas'], datos['motivo_fin']), (3, 'stop_loss'))
+
+            # Quedan 700: con apuestas de 200 solo alcanza para 3 rondas
+            datos = self.autoplay('slots', apuesta=200, rondas=50).get_json()
+            self.assertEqual((datos['rondas_jugadas'], datos['motivo_fin']), (3, 'saldo'))
+        self.assertEqual(db.session.get(User, self.user_id).puntos_totales, 100)
+
+    def test_parametros_no_validos(self):
+        self.assertEqual(self.autoplay('poker', apuesta=10).status_code, 404)
+        self.assertEqual(self.autoplay('slots', apuesta=10, rondas=0).status_code, 400)
+        self.assertEqual(self.autoplay('slots', apuesta=10, rondas=1000).status_code, 400)
+        self.assertEqual(self.autoplay('slots', apuesta=500).status_code, 400)
+        self.assertEqual(self.autoplay('dados', apuesta=10, tipo='bogus').status_code, 400)
+        self.assertEqual(self.autoplay('dados', apuesta=10, tipo='suma', valor={}).status_code, 400)
+        self.assertEqual(self.autoplay('dados', apuesta=10, tipo='suma', valor=13).status_code, 400)
+        self.assertEqual(self.autoplay('ruleta', apuesta=10, tipo='numero', valor=[1]).status_code, 400)
+        self.assertEqual(self.autoplay('ruleta', apuesta=10, tipo='docena', valor=True).status_code, 400)
+        self.assertEqual(self.peticion('post', '/casino/slots/autoplay', json=[1, 2]).status_code, 400)
+        self.assertEqual(self.autoplay('slots', apuesta=10.9, rondas=5).status_code, 400)
+        self.assertEqual(self.autoplay('slots', apuesta='10', rondas=5).status_code, 400)
+        self.assertEqual(self.autoplay('slots', apuesta=10, rondas=True).status_code, 400)
+        self.assertEqual(self.autoplay('slots', apuesta=10, rondas=5, stop_win=-5).status_code, 400)
+        self.assertEqual(self.autoplay('slots', apuesta=10, rondas=5, stop_loss=2.5).status_code, 400)
+        self.assertEqual(CasinoGame.query.count(), 0)
+
+    def test_resumen_por_usuario(self):
+        self.autoplay('dados', apuesta=10, rondas=20, tipo='suma', valor=7)
+        self.peticion('post', '/casino/ruleta/jugar', json={'apuesta': 10, 'tipo': 'numero', 'valor': 7})
+        with mock.patch.dict(routes.casino.JUEGOS, {'slots': SLOTS_PERDEDOR}):
+            self.autoplay('slots', apuesta=10, rondas=5)
+
+        resumen = db.session.get(UserCasino, self.user_id)
+        fila = (resumen.juegos_ruleta, resumen.juegos_slots, resumen.juegos_dados,
+                resumen.total_apostado, resumen.ganancia_neta, resumen.mayor_ganancia)
+        apostado, neto, mayor = db.session.query(
+            func.sum(CasinoGame.apuesta), func.sum(CasinoGame.ganancia), func.max(CasinoGame.ganancia)).one()
+        self.assertEqual(fila, (1, 5, 20, apostado, neto, max(mayor, 0)))
+        self.assertEqual(resumen.juegos, db.session.get(UserStats, self.user_id).apuestas_casino)
+
+        # La reconstrucción desde el historial da los mismos totales
+        self.assertEqual(reconstruir_casino(), 1)
+        resumen = db.session.get(UserCasino, self.user_id)
+        self.assertEqual((resumen.juegos_ruleta, resumen.juegos_slots, resumen.juegos_dados,
+                          resumen.total_apostado, resumen.ganancia_neta, resumen.mayor_ganancia), fila)
+
+        respuesta = self.peticion('get', '/casino/')
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertIn(f'>{apostado}<'.encode(), respuesta.data)
+
+    def test_resumen_nuevo_parte_del_historial(self):
+        # Juegos anteriores al resumen (p. ej. antes de la migración)
+        db.session.add_all([
+            CasinoGame(user_id=self.user_id, tipo_juego='ruleta', apuesta=10, ganancia=340),
+            CasinoGame(user_id=self.user_id, tipo_juego='dados', apuesta=20, ganancia=-20),
+        ])
+        db.session.commit()
+
+        user = db.session.get(User, self.user_id)
+        self.assertIsNone(user.casino)
+        # Otra petición crea la fila entre la lectura y la jugada: no debe chocar
+        db.session.execute(insert(UserCasino).values(
+            user_id=self.user_id, juegos_ruleta=1, juegos_slots=0, juegos_dados=1,
+            total_apostado=30, ganancia_neta=320, mayor_ganancia=340))
+        user.registrar_casino('slots', 10, [-10])
+        db.session.add(CasinoGame(user_id=self.user_id, tipo_juego='slots', apuesta=10, ganancia=-10))
+        db.session.commit()
+
+        resumen = db.session.get(UserCasino, self.user_id)
+        self.assertEqual((resumen.juegos, resumen.total_apostado, resumen.ganancia_neta, resumen.mayor_ganancia),
+                         (3, 40, 310, 340))
+
+        # Sin fila previa, la primera jugada la crea desde el historial
+        db.session.execute(delete(UserCasino))
+        db.session.commit()
+        user = db.session.get(User, self.user_id)
+        user.registrar_casino('dados', 5, [25])
+        db.session.commit()
+        resumen = db.session.get(UserCasino, self.user_id)
+        self.assertEqual((resumen.juegos, resumen.total_apostado, resumen.ganancia_neta), (4, 45, 335))
+
+if __name__ == '__main__':
+    unittest.main()
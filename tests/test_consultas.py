@@ -0,0 +1,130 @@
+import os
+import unittest
+from datetime import timedelta
+from sqlalchemy import event
+from app import create_app
+from config import Config
+from models import (db, get_current_time, User, Transaction, Reward, UserReward, Mision, UserMision,
+                    Achievement, UserAchievement)
+
+class TestConfig(Config):
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = os.environ.get('TEST_DATABASE_URL') or 'sqlite:///:memory:'
+    WTF_CSRF_ENABLED = False
+
+# Máximo de consultas permitidas por página (incluye cargar al usuario de la sesión)
+MAXIMO_CONSULTAS = {
+    '/dashboard': 12,
+    '/rewards/mis-recompensas': 3,
+    '/admin/': 4,
+    '/admin/recompensas': 3,
+    '/admin/cupones': 3,
+}
+
+class ConsultasPorPaginaTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app(TestConfig)
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+        admin = self._crear_usuario('admin', is_admin=True)
+        estudiante = self._crear_usuario('estudiante')
+        db.session.commit()
+        self.admin_id, self.estudiante_id = admin.id, estudiante.id
+        self.creados = 0
+
+        self.consultas = 0
+        event.listen(db.engine, 'before_cursor_execute', self._contar)
+
+    def tearDown(self):
+        event.remove(db.engine, 'before_cursor_execute', self._contar)
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def _contar(self, *args):
+        self.consultas += 1
+
+    def _crear_usuario(self, nombre, is_admin=False):
+        u = User(username=nombre, email=f'{nombre}@uca.edu.ni', nombre_completo=nombre.title(),
+                 is_admin=is_admin)
+        u.set_password('password')
+        db.session.add(u)
+        return u
+
+    def poblar(self, n):
+        """Agrega n filas de cada tipo que las páginas muestran en bucle"""
+        for _ in range(n):
+            self.creados += 1
+            i = self.creados
+            otro = self._crear_usuario(f'otro{i}')
+            recompensa = Reward(nombre=f'Recompensa {i}', puntos_costo=10, stock_disponible=5)
+            mision = Mision(nombre=f'Misión {i}', tipo='quiz', recompensa_puntos=5,
+                            frecuencia='semanal', objetivo=3, activo=False)
+            logro = Achievement(nombre=f'Logro {i}', icono='🏅')
+            db.session.add_all([recompensa, mision, logro])
+            db.session.flush()
+            db.session.add_all([
+                Transaction(user_id=otro.id, tipo='reciclaje', puntos=5),
+                UserReward(user_id=self.estudiante_id, reward_id=recompensa.id, codigo=f'UCA-E{i:05d}'),
+                UserReward(user_id=otro.id, reward_id=recompensa.id, codigo=f'UCA-O{i:05d}'),
+                UserMision(user_id=self.estudiante_id, mision_id=mision.id),
+                UserAchievement(user_id=self.estudiante_id, achievement_id=logro.id),
+            ])
+        db.session.commit()
+
+    def contar_consultas(self, url, user_id):
+        client = self.app.test_client()
+        with client.session_transaction() as sesion:
+            sesion['_user_id'] = str(user_id)
+            sesion['_fresh'] = True
+        # Cada petición en su propio contexto (sin sesión ni usuario en caché del test)
+        db.session.remove()
+        self.app_context.pop()
+        self.consultas = 0
+        try:
+            response = client.get(url)
+        finally:
+            self.app_context.push()
+        self.assertEqual(response.status_code, 200, url)
+        return self.consultas
+
+    def test_consultas_constantes_por_pagina(self):
+        for url, maximo in MAXIMO_CONSULTAS.items():
+            user_id = self.admin_id if url.startswith('/admin') else self.estudiante_id
+            self.poblar(2)
+            # Primera visita: calienta las cachés en memoria (ranking, estadísticas)
+            self.contar_consultas(url, user_id)
+            pocas = self.contar_consultas(url, user_id)
+
+            self.poblar(8)
+            muchas = self.contar_consultas(url, user_id)
+
+            self.assertEqual(pocas, muchas, f'{url}: N+1 ({pocas} -> {muchas} consultas)')
+            self.assertLessEqual(muchas, maximo, url)
+
+    def test_dashboard_escribe_racha_una_vez_al_dia(self):
+        estudiante = db.session.get(User, self.estudiante_id)
+        estudiante.racha_actual = 3
+        estudiante.ultima_actividad = get_current_time() - timedelta(days=1)
+        db.session.commit()
+
+        escrituras = []
+        def contar_updates(conn, cursor, sql, *args):
+            if sql.startswith('UPDATE users'):
+                escrituras.append(sql)
+        event.listen(db.engine, 'before_cursor_execute', contar_updates)
+        try:
+            self.contar_consultas('/dashboard', self.estudiante_id)
+            self.contar_consultas('/dashboard', self.estudiante_id)
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', contar_updates)
+
+        self.assertEqual(len(escrituras), 1)
+        estudiante = db.session.get(User, self.estudiante_id)
+        self.assertEqual(estudiante.racha_actual, 4)
+        self.assertEqual(estudiante.ultima_actividad.date(), get_current_time().date())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,122 @@
+import os
+import unittest
+from unittest import mock
+from datetime import timedelta
+from app import create_app
+from config import Config
+from models import db, User, Material, Mision, Achievement, UserAchievement, EventoDominio, get_current_time
+from eventos import procesar_pendientes, limpiar_procesados
+
+class TestConfig(Config):
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = os.environ.get('TEST_DATABASE_URL') or 'sqlite:///:memory:'
+    WTF_CSRF_ENABLED = False
+
+class WorkerConfig(TestConfig):
+    EVENTOS_MODO = 'worker'
+
+class EventosBase(unittest.TestCase):
+    config = TestConfig
+
+    def setUp(self):
+        self.app = create_app(self.config)
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+        user = User(username='eventos', email='eventos@uca.edu.ni', nombre_completo='Eventos')
+        user.set_password('password')
+        material = Material(nombre='Lata', puntos_valor=5, impacto_co2=0.1, impacto_agua=1)
+        db.session.add_all([
+            user, material,
+            Mision(nombre='Recicla 3', tipo='reciclaje', recompensa_puntos=20, frecuencia='semanal', objetivo=3),
+            Achievement(nombre='Primer reciclaje', criterio='reciclaje_1')
+        ])
+        db.session.commit()
+        self.user_id, self.material_id = user.id, material.id
+        self.client = self.app.test_client()
+        with self.client.session_transaction() as sesion:
+            sesion['_user_id'] = str(user.id)
+            sesion['_fresh'] = True
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def reciclar(self, cantidad):
+        # La petición corre en su propio contexto, como en producción
+        db.session.remove()
+        self.app_context.pop()
+        try:
+            return self.client.post('/recycle/', data={'material_id': self.material_id, 'cantidad': cantidad},
+                                    follow_redirects=True)
+        finally:
+            self.app_context.push()
+
+class EventosPeticionTestCase(EventosBase):
+    def test_eventos_al_final_de_la_peticion(self):
+        response = self.reciclar(3)
+        html = response.get_data(as_text=True)
+        self.assertIn('Recicla 3', html)
+        self.assertIn('Primer reciclaje', html)
+
+        user = db.session.get(User, self.user_id)
+        self.assertEqual(user.puntos_totales, 15 + 20)
+        self.assertEqual(UserAchievement.query.filter_by(user_id=self.user_id).count(), 1)
+        self.assertEqual(EventoDominio.query.filter_by(procesado=False).count(), 0)
+
+    def test_fallo_deja_el_evento_pendiente(self):
+        with mock.patch('eventos.procesar_evento', side_effect=RuntimeError('caído')):
+            self.reciclar(1)
+
+        evento = EventoDominio.query.filter_by(tipo='reciclaje').one()
+        self.assertFalse(evento.procesado)
+        self.assertEqual(evento.intentos, 1)
+        self.assertIn('caído', evento.error)
+
+        # Se reintenta y se entrega
+        resultados = procesar_pendientes()
+        self.assertEqual([e.id for e, _, _ in resultados], [evento.id])
+        self.assertTrue(evento.procesado)
+
+class EventosWorkerTestCase(EventosBase):
+    config = WorkerConfig
+
+    def test_worker_procesa_pendientes(self):
+        self.reciclar(3)
+        # La petición solo dejó el evento en la bandeja de salida
+        self.assertEqual(EventoDominio.query.filter_by(procesado=False).count(), 1)
+        self.assertEqual(UserAchievement.query.count(), 0)
+
+        resultados = procesar_pendientes()
+        tipos = [e.tipo for e, _, _ in resultados]
+        # La recompensa de la misión genera su propio evento, atendido en la misma pasada
+        self.assertEqual(tipos, ['reciclaje', 'mision'])
+        self.assertEqual(UserAchievement.query.count(), 1)
+        self.assertEqual(procesar_pendientes(), [])
+
+    def test_limpiar_eventos_procesados(self):
+        ahora = get_current_time()
+        db.session.add_all([
+            EventoDominio(user_id=self.user_id, tipo='login', procesado=True,
+                          fecha_procesado=ahora - timedelta(days=40)),
+            EventoDominio(user_id=self.user_id, tipo='login', procesado=True,
+                          fecha_procesado=ahora - timedelta(days=40)),
+            EventoDominio(user_id=self.user_id, tipo='login', procesado=True,
+                          fecha_procesado=ahora - timedelta(days=2)),
+            # Pendiente o fallido: se conserva aunque sea viejo
+            EventoDominio(user_id=self.user_id, tipo='login', fecha=ahora - timedelta(days=90), intentos=5),
+        ])
+        db.session.commit()
+
+        self.assertEqual(limpiar_procesados(lote=1), 2)
+        self.assertEqual(EventoDominio.query.count(), 2)
+        self.assertEqual(limpiar_procesados(dias=1), 1)
+        self.assertEqual(EventoDominio.query.filter_by(procesado=False).count(), 1)
+
+        resultado = self.app.test_cli_runner().invoke(args=['limpiar-eventos'])
+        self.assertIn('0 eventos', resultado.output)
+
+if __name__ == '__main__':
+    unittest.main()
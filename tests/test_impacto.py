@@ -0,0 +1,128 @@
+import os
+import unittest
+import warnings
+from sqlalchemy.exc import SAWarning
+from app import create_app
+from config import Config
+from models import db, User, Material, Transaction, RecyclingEntry, UserImpact, UserStats, EventoDominio
+from utils import calcular_impacto_ambiental, reconstruir_impactos, estadisticas_globales, material_en_uso
+
+class TestConfig(Config):
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = os.environ.get('TEST_DATABASE_URL') or 'sqlite:///:memory:'
+    WTF_CSRF_ENABLED = False
+
+class ImpactoTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app(TestConfig)
+        self.client = self.app.test_client()
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+        self.user = User(username='eco', email='eco@test.com', nombre_completo='Eco Tester')
+        self.user.set_password('password')
+        self.lata = Material(nombre='Lata', puntos_valor=15, impacto_co2=0.5, impacto_agua=2.0)
+        db.session.add_all([self.user, self.lata])
+        db.session.commit()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def login(self):
+        return self.client.post('/auth/login', data={
+            'username': 'eco',
+            'password': 'password'
+        })
+
+    def test_usuario_sin_reciclajes(self):
+        impacto = calcular_impacto_ambiental(self.user.id)
+        self.assertEqual(impacto['co2_evitado'], 0)
+        self.assertEqual(impacto['items_reciclados'], 0)
+
+    def test_reciclaje_actualiza_resumen(self):
+        self.login()
+        self.client.post('/recycle/', data={'material_id': self.lata.id, 'cantidad': 4})
+        self.client.post('/recycle/', data={'material_id': self.lata.id, 'cantidad': 2})
+
+        impacto = calcular_impacto_ambiental(self.user.id)
+        self.assertEqual(impacto['co2_evitado'], 3.0)
+        self.assertEqual(impacto['agua_ahorrada'], 12.0)
+        self.assertEqual(impacto['items_reciclados'], 6)
+
+    def test_reconstruir_desde_historial(self):
+        for cantidad in (1, 3):
+            trans = Transaction(user_id=self.user.id, tipo='reciclaje', puntos=15 * cantidad)
+            db.session.add(RecyclingEntry(
+                transaccion=trans, user_id=self.user.id, material_id=self.lata.id,
+                cantidad=cantidad, puntos=15 * cantidad
+            ))
+        db.session.commit()
+
+        self.assertEqual(reconstruir_impactos(), 1)
+        impacto = db.session.get(UserImpact, self.user.id)
+        self.assertAlmostEqual(impacto.co2_evitado, 2.0)
+        self.assertEqual(impacto.items_reciclados, 4)
+
+        # Con la fila ya cargada en la sesión, reconstruir de nuevo no choca con ella
+        with warnings.catch_warnings():
+            warnings.simplefilter('error', SAWarning)
+            self.assertEqual(reconstruir_impactos(), 1)
+        self.assertEqual(db.session.get(UserImpact, self.user.id).items_reciclados, 4)
+
+    def test_lineas_de_reciclaje(self):
+        self.assertFalse(material_en_uso(self.lata.id))
+
+        self.login()
+        self.client.post('/recycle/', data={'material_id': self.lata.id, 'cantidad': 4})
+
+        entrada = RecyclingEntry.query.filter_by(user_id=self.user.id).one()
+        self.assertEqual(entrada.cantidad, 4)
+        self.assertEqual(entrada.transaccion.tipo, 'reciclaje')
+        self.assertTrue(material_en_uso(self.lata.id))
+        self.assertEqual(estadisticas_globales()['co2_evitado'], 2.0)
+
+    def test_entrega_con_varios_materiales(self):
+        carton = Material(nombre='Cartón', puntos_valor=5, impacto_co2=1.0, impacto_agua=0)
+        db.session.add(carton)
+        db.session.commit()
+        self.login()
+
+        self.client.post('/recycle/lote', data={
+            'lineas-0-material_id': self.lata.id, 'lineas-0-cantidad': 4,
+            'lineas-1-material_id': carton.id, 'lineas-1-cantidad': 2,
+            'lineas-2-material_id': self.lata.id, 'lineas-2-cantidad': 1,
+        })
+        respuesta = self.client.post('/recycle/api/reciclaje', json={'lineas': [
+            {'material_id': carton.id, 'cantidad': 3},
+        ]})
+        self.assertEqual(respuesta.get_json()['puntos'], 15)
+
+        # Una transacción por entrega, con una línea por material
+        transacciones = Transaction.query.filter_by(tipo='reciclaje').order_by(Transaction.id).all()
+        self.assertEqual([t.puntos for t in transacciones], [85, 15])
+        lineas = {(e.material_id, e.cantidad) for e in transacciones[0].entradas_reciclaje}
+        self.assertEqual(lineas, {(self.lata.id, 5), (carton.id, 2)})
+
+        # Un evento (misiones y logros se evalúan una vez) con el total de ítems
+        eventos = EventoDominio.query.filter_by(tipo='reciclaje').order_by(EventoDominio.id)
+        self.assertEqual([e.cantidad for e in eventos], [7, 3])
+        stats = db.session.get(UserStats, self.user.id)
+        self.assertEqual((stats.reciclajes, stats.items_reciclados), (2, 10))
+        self.assertEqual(calcular_impacto_ambiental(self.user.id)['co2_evitado'], 7.5)
+
+    def test_entrega_json_invalida(self):
+        self.login()
+        for lineas in ([], [{'material_id': self.lata.id, 'cantidad': 0}],
+                       [{'material_id': 999, 'cantidad': 1}], [{'cantidad': 1}],
+                       [{'material_id': self.lata.id, 'cantidad': 2.9}],
+                       [{'material_id': self.lata.id, 'cantidad': True}]):
+            respuesta = self.client.post('/recycle/api/reciclaje', json={'lineas': lineas})
+            self.assertEqual(respuesta.status_code, 400, lineas)
+        self.assertEqual(self.client.post('/recycle/api/reciclaje', json=[1]).status_code, 400)
+        self.assertEqual(Transaction.query.count(), 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,112 @@
+import os
+import unittest
+from sqlalchemy import event
+from app import create_app
+from config import Config
+from models import db, User, Achievement, UserAchievement
+from logros import verificar_logros, otorgar_en_bloque, REGLAS
+
+class TestConfig(Config):
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = os.environ.get('TEST_DATABASE_URL') or 'sqlite:///:memory:'
+    WTF_CSRF_ENABLED = False
+
+class LogrosTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app(TestConfig)
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+        self.user = User(username='logros', email='logros@uca.edu.ni', nombre_completo='Logros')
+        self.user.set_password('password')
+        db.session.add(self.user)
+        for criterio in ('reciclaje_1', 'reciclaje_100', 'quiz_perfect_5', 'racha_7'):
+            db.session.add(Achievement(nombre=criterio, criterio=criterio))
+        db.session.commit()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def contar_consultas(self, funcion):
+        db.session.refresh(self.user)  # que la recarga tras el commit no cuente
+        consultas = []
+        contar = lambda *args: consultas.append(1)
+        event.listen(db.engine, 'before_cursor_execute', contar)
+        try:
+            resultado = funcion()
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', contar)
+        return resultado, len(consultas)
+
+    def test_solo_reglas_del_evento(self):
+        self.user.agregar_puntos(5, 'reciclaje', 'Reciclaje de prueba')
+        self.user.racha_actual = 7
+        db.session.commit()
+
+        # Un evento de quiz no evalúa las reglas de reciclaje
+        nombres = [l.criterio for l in verificar_logros(self.user, 'quiz')]
+        self.assertEqual(nombres, ['racha_7'])
+
+        nombres = [l.criterio for l in verificar_logros(self.user, 'reciclaje')]
+        self.assertEqual(nombres, ['reciclaje_1'])
+        db.session.commit()
+
+        # Ya obtenidos: no se vuelven a otorgar
+        self.assertEqual(verificar_logros(self.user), [])
+        self.assertEqual(UserAchievement.query.count(), 2)
+
+    def test_consultas_constantes(self):
+        self.user.agregar_puntos(5, 'reciclaje', 'Reciclaje de prueba')
+        db.session.commit()
+        _, pocas = self.contar_consultas(lambda: verificar_logros(self.user))
+        db.session.rollback()
+
+        # Muchos logros más con criterios ya registrados no agregan consultas
+        for i in range(30):
+            criterio = list(REGLAS)[i % len(REGLAS)]
+            db.session.add(Achievement(nombre=f'Extra {i}', criterio=criterio))
+        db.session.commit()
+        _, muchas = self.contar_consultas(lambda: verificar_logros(self.user))
+
+        self.assertEqual(pocas, muchas)
+        self.assertLessEqual(muchas, 3)
+
+    def test_otorgar_en_bloque(self):
+        usuarios = [self.user]
+        for i in range(6):
+            u = User(username=f'bloque{i}', email=f'bloque{i}@uca.edu.ni', nombre_completo='Bloque')
+            u.set_password('password')
+            db.session.add(u)
+            usuarios.append(u)
+        db.session.commit()
+        # Reciclan los de índice par; uno ya tenía el logro
+        for u in usuarios[::2]:
+            u.agregar_puntos(5, 'reciclaje', 'Reciclaje de prueba')
+        db.session.commit()
+        self.assertEqual(len(verificar_logros(self.user, 'reciclaje')), 1)
+        db.session.commit()
+
+        avances = []
+        logro = Achievement.query.filter_by(criterio='reciclaje_1').one()
+        simulado = otorgar_en_bloque(['reciclaje_1'], tamano_lote=3, simular=True,
+                                     al_avanzar=lambda *args: avances.append(args))
+        self.assertEqual(simulado, {logro.id: 3})
+        self.assertEqual(len(avances), 3)  # 7 usuarios en ventanas de 3
+        self.assertEqual(UserAchievement.query.count(), 1)
+
+        self.assertEqual(otorgar_en_bloque(['reciclaje_1'], tamano_lote=3), {logro.id: 3})
+        self.assertEqual(UserAchievement.query.count(), 4)
+        # Repetir no duplica
+        self.assertEqual(otorgar_en_bloque(['reciclaje_1'], tamano_lote=3), {logro.id: 0})
+
+        # Dos logros con el mismo nombre se cuentan por separado
+        homonimo = Achievement(nombre=logro.nombre, criterio='reciclaje_1')
+        db.session.add(homonimo)
+        db.session.commit()
+        self.assertEqual(otorgar_en_bloque(['reciclaje_1'], simular=True), {logro.id: 0, homonimo.id: 4})
+
+if __name__ == '__main__':
+    unittest.main()
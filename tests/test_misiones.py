@@ -1,13 +1,16 @@
+import os
 import unittest
 from app import create_app
 from config import Config
 from models import db, User, Mision, UserMision
-from utils import asignar_misiones, actualizar_progreso_mision
+from utils import (asignar_misiones, asignar_misiones_lote, actualizar_progreso_mision,
+                   misiones_activas, elegir_mision, invalidar_catalogo_misiones)
 from datetime import date
+from sqlalchemy import update
 
 class TestConfig(Config):
     TESTING = True
-    SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    SQLALCHEMY_DATABASE_URI = os.environ.get('TEST_DATABASE_URL') or 'sqlite:///:memory:'
     WTF_CSRF_ENABLED = False
 
 class MisionesTestCase(unittest.TestCase):
@@ -49,6 +52,50 @@ class MisionesTestCase(unittest.TestCase):
         asignar_misiones(self.user)
         self.assertEqual(self.user.misiones.count(), 2)
 
+    def test_asignar_misiones_lote(self):
+        otro = User(username='otromision', email='otromision@test.com', nombre_completo='Otro')
+        inactivo = User(username='inactivo', email='inactivo@test.com', nombre_completo='Inactivo', activo=False)
+        for u in (otro, inactivo):
+            u.set_password('password')
+            db.session.add(u)
+        asignar_misiones(self.user)
+        db.session.commit()
+
+        # Solo el usuario activo sin misiones recibe la diaria y la semanal
+        self.assertEqual(asignar_misiones_lote(), 2)
+        db.session.commit()
+        self.assertEqual(otro.misiones.count(), 2)
+        self.assertEqual(inactivo.misiones.count(), 0)
+        self.assertEqual(self.user.misiones.count(), 2)
+
+        # Volver a ejecutar el job no duplica
+        self.assertEqual(asignar_misiones_lote(), 0)
+
+    def test_eleccion_determinista(self):
+        extra = [Mision(nombre=f'Diaria {i}', tipo='quiz', recompensa_puntos=5, frecuencia='diaria',
+                        objetivo=1, activo=True) for i in range(4)]
+        db.session.add_all(extra)
+        db.session.commit()
+        invalidar_catalogo_misiones()
+
+        candidatas = [self.mision_login_diaria] + extra
+        hoy = date.today()
+        elegida = elegir_mision(7, 'diaria', hoy, candidatas)
+        self.assertIs(elegir_mision(7, 'diaria', hoy, candidatas), elegida)
+        # Distintos usuarios reciben misiones distintas
+        self.assertGreater(len({elegir_mision(uid, 'diaria', hoy, candidatas).id for uid in range(50)}), 1)
+
+    def test_misiones_activas_sin_escribir(self):
+        activas = misiones_activas(self.user)
+        self.assertEqual({a.mision.frecuencia for a in activas}, {'diaria', 'semanal'})
+        self.assertEqual(self.user.misiones.count(), 0)
+
+        # La fila se materializa con el primer progreso
+        actualizar_progreso_mision(self.user, 'reciclaje', cantidad=3)
+        self.assertEqual(self.user.misiones.count(), 1)
+        semanal = [a for a in misiones_activas(self.user) if a.mision.frecuencia == 'semanal'][0]
+        self.assertEqual(semanal.progreso, 3)
+
     def test_actualizar_progreso_mision(self):
         asignar_misiones(self.user)
         
@@ -72,5 +119,19 @@ class MisionesTestCase(unittest.TestCase):
         self.assertTrue(mision_reciclaje.completada)
         self.assertEqual(self.user.puntos_totales, 5 + 50) # Recompensa de misión semanal
 
+    def test_progreso_relee_filas_de_otro_proceso(self):
+        actualizar_progreso_mision(self.user, 'reciclaje', cantidad=1)
+        mision_reciclaje = self.user.misiones.filter(UserMision.mision.has(tipo='reciclaje')).one()
+
+        # Otro worker avanzó la misma fila; esta sesión aún tiene el valor viejo cargado
+        db.session.execute(update(UserMision).where(UserMision.id == mision_reciclaje.id)
+                           .values(progreso=9).execution_options(synchronize_session=False))
+        self.assertEqual(mision_reciclaje.progreso, 1)
+
+        completadas = actualizar_progreso_mision(self.user, 'reciclaje', cantidad=1)
+        self.assertEqual([m.id for m in completadas], [self.mision_reciclaje_semanal.id])
+        self.assertEqual(UserMision.query.filter_by(mision_id=self.mision_reciclaje_semanal.id).count(), 1)
+        self.assertEqual(mision_reciclaje.progreso, 10)
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,76 @@
+import itertools
+import unittest
+from unittest import mock
+import pagos
+from aleatorio import obtener_rng
+from utils import jugar_ruleta, jugar_slots, jugar_dados
+
+try:
+    import numpy as np
+    import simulador_casino
+except ImportError:
+    np = None
+
+RULETA = list(range(pagos.RULETA_NUMEROS))
+SLOTS = list(itertools.product(range(len(pagos.SLOTS_SIMBOLOS)), repeat=3))
+DADOS = list(itertools.product(range(1, pagos.DADOS_CARAS + 1), repeat=2))
+
+# (tipo_apuesta, valores apostados) a comprobar
+APUESTAS_RULETA = [('numero', [None, 0, 7, 36]), ('par', [None]), ('impar', [None]), ('alto', [None]),
+                   ('bajo', [None]), ('docena', [-1, 0, 1, 2])]
+APUESTAS_DADOS = [('suma', list(range(1, 14))), ('par', [None]), ('impar', [None]),
+                  ('mayor7', [None]), ('menor7', [None]), ('dobles', [None])]
+
+class TablaDePagosTestCase(unittest.TestCase):
+    def test_rtp_exacto(self):
+        pleno = pagos.RULETA['numero']
+        ganadores = [n for n in RULETA if pleno.gana(n, valor=7)]
+        self.assertEqual(ganadores, [7])
+        self.assertEqual(pleno.multiplicador(7), 35)
+
+        self.assertEqual(sum(pagos.pago_slots(*r) for r in SLOTS if r == (pagos.SLOTS_JACKPOT,) * 3), 50)
+        dobles = pagos.DADOS['dobles']
+        self.assertEqual(sum(dobles.multiplicador() for d in DADOS if dobles.gana(*d)) / len(DADOS), 8 / 6)
+        self.assertEqual(pagos.DADOS['suma'].multiplicador(12), 30)
+
+@unittest.skipIf(np is None, 'el simulador requiere NumPy')
+class ParidadSimuladorTestCase(unittest.TestCase):
+    """Cada resultado posible paga lo mismo en la función de juego y en el simulador"""
+
+    def test_ruleta(self):
+        numeros = np.array(RULETA)
+        for tipo, valores in APUESTAS_RULETA:
+            for valor in valores:
+                vectorizado = simulador_casino.pagos_ruleta(numeros, tipo, valor)
+                for n in RULETA:
+                    with mock.patch.object(obtener_rng('casino'), 'randint', return_value=n):
+                        escalar = jugar_ruleta(numero_apostado=valor, tipo_apuesta=tipo)
+                    self.assertEqual(escalar['multiplicador'], vectorizado[n], (tipo, valor, n))
+
+    def test_slots(self):
+        a, b, c = np.array(SLOTS).T
+        vectorizado = simulador_casino.pagos_slots(a, b, c)
+        for i, rodillos in enumerate(SLOTS):
+            with mock.patch.object(obtener_rng('casino'), 'randrange', side_effect=list(rodillos)):
+                escalar = jugar_slots()
+            self.assertEqual(escalar['multiplicador'], vectorizado[i], rodillos)
+            self.assertEqual(escalar['gano'], vectorizado[i] > 0)
+
+    def test_dados(self):
+        d1, d2 = np.array(DADOS).T
+        for tipo, valores in APUESTAS_DADOS:
+            for valor in valores:
+                vectorizado = simulador_casino.pagos_dados(d1, d2, tipo, valor)
+                for i, dados in enumerate(DADOS):
+                    with mock.patch.object(obtener_rng('casino'), 'randint', side_effect=list(dados)):
+                        escalar = jugar_dados(tipo_apuesta=tipo, valor_apostado=valor)
+                    self.assertEqual(escalar['multiplicador'], vectorizado[i], (tipo, valor, dados))
+
+    def test_rtp_simulado_cerca_del_exacto(self):
+        rng = np.random.default_rng(1)
+        exacto = sum(pagos.pago_slots(*r) for r in SLOTS) / len(SLOTS)
+        simulado, _ = simulador_casino.rtp(rng, 'slots', None, None, 1_000_000)
+        self.assertAlmostEqual(simulado, exacto, delta=0.02)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,63 @@
+import os
+import unittest
+from app import create_app
+from config import Config
+from models import db, User, Nivel
+from progresion import TablaNiveles, obtener_niveles, recalcular_niveles
+
+class TestConfig(Config):
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = os.environ.get('TEST_DATABASE_URL') or 'sqlite:///:memory:'
+    WTF_CSRF_ENABLED = False
+
+class TablaNivelesTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tabla = TablaNiveles(Config.NIVELES.items())
+
+    def test_nivel_por_umbral(self):
+        self.assertEqual(self.tabla.nivel(0), 'Semilla Verde')
+        self.assertEqual(self.tabla.nivel(100), 'Semilla Verde')
+        self.assertEqual(self.tabla.nivel(101), 'Brote Ecológico')
+        self.assertEqual(self.tabla.nivel(5000), 'Eco Maestro')
+        self.assertEqual(self.tabla.nivel(None), 'Semilla Verde')
+
+    def test_siguiente_y_progreso(self):
+        self.assertEqual(self.tabla.siguiente(200), ('Alumno Verde', 301))
+        self.assertEqual(self.tabla.progreso(201), 50)
+        self.assertIsNone(self.tabla.siguiente(1501))
+        self.assertEqual(self.tabla.progreso(1501), 100)
+
+class NivelesBDTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app(TestConfig)
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def test_recalcular_con_umbrales_de_la_tabla(self):
+        for i, puntos in enumerate((0, 50, 500)):
+            u = User(username=f'nivel{i}', email=f'nivel{i}@uca.edu.ni', nombre_completo='Nivel',
+                     puntos_totales=puntos)
+            u.set_password('password')
+            db.session.add(u)
+        db.session.commit()
+        self.assertEqual(obtener_niveles().nivel(50), 'Semilla Verde')
+
+        db.session.add_all([Nivel(nombre='Novato', puntos_min=0),
+                            Nivel(nombre='Experto', puntos_min=40)])
+        db.session.commit()
+        # Hasta recalcular se sigue usando la tabla en caché
+        self.assertEqual(obtener_niveles().nivel(50), 'Semilla Verde')
+
+        self.assertEqual(recalcular_niveles(), 3)
+        niveles = dict(db.session.query(User.puntos_totales, User.nivel))
+        self.assertEqual(niveles, {0: 'Novato', 50: 'Experto', 500: 'Experto'})
+        self.assertEqual(recalcular_niveles(), 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,115 @@
+import os
+import unittest
+from app import create_app
+from config import Config
+from models import db, User
+from ranking import obtener_servicio_ranking
+
+class TestConfig(Config):
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = os.environ.get('TEST_DATABASE_URL') or 'sqlite:///:memory:'
+    WTF_CSRF_ENABLED = False
+
+class RankingTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app(TestConfig)
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+        self.usuarios = []
+        for i, puntos in enumerate([300, 200, 100]):
+            u = User(username=f'u{i}', email=f'u{i}@test.com', nombre_completo=f'Usuario {i}',
+                     facultad='Ingeniería', carrera='ing_informatica' if i else 'ing_civil',
+                     puntos_historicos=puntos)
+            u.set_password('password')
+            self.usuarios.append(u)
+        admin = User(username='admin', email='admin@test.com', nombre_completo='Admin',
+                     is_admin=True, puntos_historicos=10000)
+        admin.set_password('password')
+        db.session.add_all(self.usuarios + [admin])
+        db.session.commit()
+        self.servicio = obtener_servicio_ranking()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def test_lectura_desde_memoria(self):
+        top = self.servicio.estudiantes(10)
+        self.assertEqual([e.username for e in top], ['u0', 'u1', 'u2'])
+        self.servicio.estudiantes(10)
+
+        metricas = self.servicio.metricas()
+        self.assertEqual(metricas['fallos'], 1)
+        self.assertEqual(metricas['aciertos'], 1)
+
+    def test_actualizacion_incremental(self):
+        self.servicio.estudiantes(10)
+
+        ultimo = self.usuarios[2]
+        ultimo.agregar_puntos(250, 'evento', 'Evento de prueba')
+        db.session.commit()
+
+        top = self.servicio.estudiantes(10)
+        self.assertEqual([e.username for e in top], ['u2', 'u0', 'u1'])
+        self.assertEqual(top[0].puntos_historicos, 350)
+        self.assertEqual(self.servicio.facultades()[0]['puntos'], 850)
+        self.assertEqual(self.servicio.carreras()[0],
+                         {'carrera': 'ing_informatica', 'facultad': 'Ingeniería', 'puntos': 550, 'estudiantes': 2})
+        self.assertEqual(self.servicio.metricas()['refrescos_completos'], 1)
+
+    def test_rollback_no_modifica_ranking(self):
+        self.servicio.estudiantes(10)
+
+        self.usuarios[2].agregar_puntos(500, 'evento', 'Evento de prueba')
+        db.session.rollback()
+        db.session.commit()
+
+        self.assertEqual(self.servicio.estudiantes(1)[0].username, 'u0')
+
+    def test_facultad_nueva_fuerza_refresco(self):
+        self.servicio.estudiantes(10)
+
+        nuevo = User(username='nuevo', email='nuevo@test.com', nombre_completo='Nuevo',
+                     facultad='Derecho', puntos_historicos=0)
+        nuevo.set_password('password')
+        db.session.add(nuevo)
+        db.session.commit()
+        nuevo.agregar_puntos(50, 'evento', 'Evento de prueba')
+        db.session.commit()
+
+        facultades = [f['facultad'] for f in self.servicio.facultades()]
+        self.assertEqual(facultades, ['Ingeniería', 'Derecho'])
+        self.assertEqual(self.servicio.metricas()['refrescos_completos'], 2)
+
+    def test_posicion_y_vecinos(self):
+        extra = []
+        for i in range(10):
+            u = User(username=f'x{i}', email=f'x{i}@test.com', nombre_completo=f'Extra {i}',
+                     puntos_historicos=i * 10)
+            u.set_password('password')
+            extra.append(u)
+        db.session.add_all(extra)
+        db.session.commit()
+
+        self.assertEqual(self.servicio.posicion(self.usuarios[0]), (1, 13))
+        self.assertEqual(self.servicio.posicion(extra[5]), (8, 13))
+        self.assertEqual(self.servicio.posicion(User.query.filter_by(is_admin=True).first()), (None, None))
+
+        arriba, abajo = self.servicio.vecinos(extra[5], 2)
+        self.assertEqual([(p, u.username) for p, u in arriba], [(6, 'x7'), (7, 'x6')])
+        self.assertEqual([(p, u.username) for p, u in abajo], [(9, 'x4'), (10, 'x3')])
+
+        # Subir de posición sin recalcular el ranking completo
+        extra[5].agregar_puntos(1000, 'evento', 'Evento de prueba')
+        db.session.commit()
+        self.assertEqual(self.servicio.posicion(extra[5]), (1, 13))
+        arriba, abajo = self.servicio.vecinos(extra[5], 2)
+        self.assertEqual(arriba, [])
+        self.assertEqual([u.username for _, u in abajo], ['u0', 'u1'])
+        self.assertEqual(self.servicio.metricas()['refrescos_completos'], 1)
+
+if __name__ == '__main__':
+    unittest.main()
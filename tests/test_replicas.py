@@ -0,0 +1,85 @@
+import os
+import shutil
+import tempfile
+import unittest
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+from app import create_app
+from config import Config
+from database import solo_lectura, sincronizar_replicas
+from models import db, User
+
+class TestConfig(Config):
+    TESTING = True
+    WTF_CSRF_ENABLED = False
+
+class ReplicasTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        primaria = os.path.join(self.tmp, 'primaria.db')
+        replica = os.path.join(self.tmp, 'replica.db')
+
+        class ReplicaConfig(TestConfig):
+            SQLALCHEMY_DATABASE_URI = 'sqlite:///' + primaria
+            SQLALCHEMY_BINDS = {'replica_1': 'sqlite:///' + replica}
+            DB_REPLICAS = ['replica_1']
+
+        self.app = create_app(ReplicaConfig)
+
+        @self.app.route('/_contar')
+        @solo_lectura
+        def contar():
+            return str(User.query.count())
+
+        @self.app.route('/_escribir', methods=['POST'])
+        def escribir():
+            n = User.query.count()
+            u = User(username=f'nuevo{n}', email=f'nuevo{n}@uca.edu.ni', nombre_completo='Nuevo')
+            u.set_password('password')
+            db.session.add(u)
+            db.session.commit()
+            return 'ok'
+
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        sincronizar_replicas(self.app)
+
+    def tearDown(self):
+        db.session.remove()
+        for engine in db.engines.values():
+            engine.dispose()
+        self.app_context.pop()
+        # init_app registra metadatos por bind en el objeto db global; no deben
+        # afectar a las aplicaciones de otras pruebas
+        db.metadatas.pop('replica_1', None)
+        shutil.rmtree(self.tmp)
+
+    def crear_usuario_directo(self):
+        u = User(username='directo', email='directo@uca.edu.ni', nombre_completo='Directo')
+        u.set_password('password')
+        db.session.add(u)
+        db.session.commit()
+
+    def test_lecturas_van_a_replica(self):
+        self.crear_usuario_directo()
+        client = self.app.test_client()
+        self.assertEqual(client.get('/_contar').text, '0')
+
+        sincronizar_replicas(self.app)
+        self.assertEqual(client.get('/_contar').text, '1')
+
+    def test_lee_sus_propias_escrituras(self):
+        client = self.app.test_client()
+        client.post('/_escribir')
+        # Quien escribió lee de la primaria aunque la réplica no se haya copiado
+        self.assertEqual(client.get('/_contar').text, '1')
+        # Otro usuario sigue leyendo de la réplica
+        self.assertEqual(self.app.test_client().get('/_contar').text, '0')
+
+    def test_replica_no_acepta_escrituras(self):
+        with db.engines['replica_1'].connect() as conn:
+            with self.assertRaises(OperationalError):
+                conn.execute(text("DELETE FROM users"))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,126 @@
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+from collections import Counter
+from sqlalchemy import func
+from app import create_app
+from config import Config
+from models import db, User, Reward, UserReward, CasinoGame, UserStats
+from saldos import mover_saldo, debitar, descontar_stock
+
+class TestConfig(Config):
+    TESTING = True
+    WTF_CSRF_ENABLED = False
+    # Varios hilos escribiendo: hace falta un archivo y esperar el bloqueo
+    SQLITE_PRAGMAS = {'journal_mode': 'WAL', 'busy_timeout': 30000}
+
+class SaldosTestCase(unittest.TestCase):
+    HILOS = 8
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+
+        class SaldosConfig(TestConfig):
+            SQLALCHEMY_DATABASE_URI = os.environ.get('TEST_DATABASE_URL') or \
+                'sqlite:///' + os.path.join(self.tmp, 'saldos.db')
+
+        self.app = create_app(SaldosConfig)
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        db.engine.dispose()
+        self.app_context.pop()
+        shutil.rmtree(self.tmp)
+
+    def crear_usuario(self, nombre, puntos):
+        u = User(username=nombre, email=f'{nombre}@uca.edu.ni', nombre_completo=nombre.title(),
+                 puntos_totales=puntos)
+        u.set_password('password')
+        db.session.add(u)
+        db.session.commit()
+        return u.id
+
+    def en_paralelo(self, peticiones):
+        """Ejecuta (user_id, metodo, url, json) repartidas entre HILOS clientes"""
+        respuestas = []
+        lock = threading.Lock()
+
+        def trabajador(lote):
+            clientes = {}
+            for user_id, metodo, url, cuerpo in lote:
+                if user_id not in clientes:
+                    clientes[user_id] = self.app.test_client()
+                    with clientes[user_id].session_transaction() as sesion:
+                        sesion['_user_id'] = str(user_id)
+                        sesion['_fresh'] = True
+                respuesta = clientes[user_id].open(url, method=metodo, json=cuerpo)
+                with lock:
+                    respuestas.append((user_id, respuesta.status_code, respuesta.get_json(silent=True)))
+
+        hilos = [threading.Thread(target=trabajador, args=(peticiones[i::self.HILOS],))
+                 for i in range(self.HILOS)]
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+        db.session.remove()
+        return respuestas
+
+    def test_canjes_concurrentes(self):
+        # 5 usuarios que pueden pagar 3 canjes cada uno; solo hay stock para 12
+        user_ids = [self.crear_usuario(f'canje{i}', 300) for i in range(5)]
+        recompensa = Reward(nombre='Termo', puntos_costo=100, stock_disponible=12)
+        db.session.add(recompensa)
+        db.session.commit()
+        url = f'/rewards/canjear/{recompensa.id}'
+
+        self.en_paralelo([(user_ids[i % 5], 'POST', url, None) for i in range(200)])
+
+        self.assertEqual(db.session.get(Reward, recompensa.id).stock_disponible, 0)
+        canjes = Counter(uid for uid, in db.session.query(UserReward.user_id))
+        self.assertEqual(sum(canjes.values()), 12)
+        for user_id in user_ids:
+            user = db.session.get(User, user_id)
+            self.assertLessEqual(canjes[user_id], 3)
+            self.assertEqual(user.puntos_totales, 300 - 100 * canjes[user_id])
+
+    def test_apuestas_concurrentes_del_mismo_usuario(self):
+        user_id = self.crear_usuario('apostador', 100000)
+
+        respuestas = self.en_paralelo([(user_id, 'POST', '/casino/slots/jugar', {'apuesta': 10})] * 200)
+
+        self.assertTrue(all(codigo == 200 for _, codigo, _ in respuestas))
+        juegos, neto = db.session.query(func.count(CasinoGame.id), func.sum(CasinoGame.ganancia)).one()
+        self.assertEqual(juegos, 200)
+        # Ninguna actualización perdida: el saldo es el inicial más el neto de todos los juegos
+        self.assertEqual(db.session.get(User, user_id).puntos_totales, 100000 + neto)
+        self.assertEqual(db.session.get(UserStats, user_id).apuestas_casino, 200)
+
+        metricas = self.app.extensions['saldos'].metricas()
+        self.assertEqual((metricas['operaciones'], metricas['rechazos']), (200, 0))
+
+    def test_debito_condicional(self):
+        user = db.session.get(User, self.crear_usuario('debito', 50))
+        self.assertEqual(debitar(user, 30), 20)
+        self.assertIsNone(debitar(user, 30))
+        self.assertEqual(user.puntos_totales, 20)
+        self.assertEqual(mover_saldo(user, 5), 25)
+        db.session.commit()
+
+        recompensa = Reward(nombre='Gorra', puntos_costo=10, stock_disponible=1)
+        db.session.add(recompensa)
+        db.session.commit()
+        self.assertEqual(descontar_stock(recompensa), 0)
+        self.assertIsNone(descontar_stock(recompensa))
+
+        metricas = self.app.extensions['saldos'].metricas()
+        self.assertEqual((metricas['operaciones'], metricas['rechazos']), (5, 2))
+
+if __name__ == '__main__':
+    unittest.main()
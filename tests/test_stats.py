@@ -0,0 +1,93 @@
+import os
+import unittest
+from app import create_app
+from config import Config
+from models import db, User, Material, RecyclingEntry, CasinoGame, UserStats
+from utils import reconstruir_stats
+
+class TestConfig(Config):
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = os.environ.get('TEST_DATABASE_URL') or 'sqlite:///:memory:'
+    WTF_CSRF_ENABLED = False
+
+class UserStatsTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app(TestConfig)
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+        self.user = User(username='stats', email='stats@uca.edu.ni', nombre_completo='Stats')
+        self.user.set_password('password')
+        self.material = Material(nombre='Botella', puntos_valor=10)
+        db.session.add_all([self.user, self.material])
+        db.session.commit()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def reciclar(self, cantidad):
+        transaccion = self.user.agregar_puntos(10 * cantidad, 'reciclaje', 'Reciclaje', cantidad_evento=cantidad)
+        db.session.add(RecyclingEntry(transaccion=transaccion, user_id=self.user.id,
+                                      material_id=self.material.id, cantidad=cantidad, puntos=10 * cantidad))
+
+    def jugar(self, ganancia):
+        self.user.incrementar_stats(apuestas_casino=1, victorias_casino=int(ganancia > 0))
+        db.session.add(CasinoGame(user_id=self.user.id, tipo_juego='slots', apuesta=10, ganancia=ganancia))
+
+    def test_contadores_en_cada_escritura(self):
+        self.reciclar(3)
+        db.session.commit()
+        self.reciclar(2)
+        self.user.agregar_puntos(20, 'quiz', 'Quiz')
+        self.user.restar_puntos(30, 'canje', 'Canje')
+        # Dos incrementos antes del flush se acumulan
+        self.jugar(20)
+        self.jugar(-10)
+        db.session.commit()
+
+        stats = db.session.get(UserStats, self.user.id)
+        self.assertEqual((stats.reciclajes, stats.items_reciclados), (2, 5))
+        self.assertEqual((stats.quizzes, stats.canjes, stats.eventos), (1, 1, 0))
+        self.assertEqual((stats.apuestas_casino, stats.victorias_casino), (2, 1))
+
+    def test_reconstruir_coincide(self):
+        self.reciclar(4)
+        self.user.agregar_puntos(50, 'evento', 'Evento')
+        self.jugar(30)
+        db.session.commit()
+        incremental = db.session.get(UserStats, self.user.id)
+        esperado = (incremental.reciclajes, incremental.items_reciclados, incremental.eventos,
+                    incremental.apuestas_casino, incremental.victorias_casino)
+
+        self.assertEqual(reconstruir_stats(), 1)
+        db.session.expire_all()
+        stats = db.session.get(UserStats, self.user.id)
+        self.assertEqual((stats.reciclajes, stats.items_reciclados, stats.eventos,
+                          stats.apuestas_casino, stats.victorias_casino), esperado)
+
+    def test_lote_devuelve_transacciones(self):
+        transacciones = self.user.agregar_puntos_lote([
+            dict(cantidad=30, tipo='reciclaje', descripcion='Botellas', cantidad_evento=3,
+                 metadata={'material_id': self.material.id}),
+            dict(cantidad=20, tipo='reciclaje', descripcion='Latas', cantidad_evento=2),
+            dict(cantidad=15, tipo='quiz', descripcion='Quiz'),
+        ])
+        db.session.commit()
+
+        self.assertEqual([t.puntos for t in transacciones], [30, 20, 15])
+        self.assertTrue(all(t.id for t in transacciones))
+        self.assertEqual(transacciones[0].metadata_json, '{"material_id": %d}' % self.material.id)
+        self.assertIsNone(transacciones[1].metadata_json)
+        self.assertEqual((self.user.puntos_totales, self.user.puntos_historicos), (65, 65))
+        stats = db.session.get(UserStats, self.user.id)
+        self.assertEqual((stats.reciclajes, stats.items_reciclados, stats.quizzes), (2, 5, 1))
+
+        canje = self.user.restar_puntos(40, 'canje', 'Canje', metadata={'reward_id': 1})
+        self.assertEqual(canje.puntos, -40)
+        self.assertIsNone(self.user.restar_puntos(1000, 'canje', 'Canje'))
+
+if __name__ == '__main__':
+    unittest.main()
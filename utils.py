@@ -1,50 +1,188 @@
-import random
-import json
-from datetime import datetime, timedelta, date
-from models import User, Transaction, Mision, UserMision, db, Material
-from sqlalchemy import func, and_
+import hashlib
+from datetime import datetime, timedelta, date, time
+from models import (User, Transaction, Mision, UserMision, UserImpact, UserStats, RecyclingEntry,
+                    CasinoGame, CONTADOR_POR_TIPO, db, Material, UserCasino,
+                    COLUMNAS_RESUMEN_CASINO, agregados_casino)
+from sqlalchemy import func, and_, insert, case, select
+from flask import current_app
 from flask_wtf.csrf import generate_csrf
 from config import Config
+import pagos
+from aleatorio import obtener_rng
 
 def inject_csrf_token():
     """Inyecta el token CSRF para usar en formularios Jinja2"""
     return dict(csrf_token=generate_csrf)
 
+def es_entero(valor):
+    """Indica si un valor de JSON es un entero de verdad (ni bool, ni float, ni cadena)"""
+    return isinstance(valor, int) and not isinstance(valor, bool)
+
 def calcular_impacto_ambiental(user_id):
-    """Calcula el impacto ambiental total de un usuario"""
-    # Importar Material internamente si es necesario, pero ya está en la cabecera
+    """Obtiene el impacto ambiental total de un usuario desde su resumen acumulado"""
+    impacto = db.session.get(UserImpact, user_id)
     
-    transacciones = Transaction.query.filter_by(
-        user_id=user_id,
-        tipo='reciclaje'
-    ).all()
+    if impacto is None:
+        return {
+            'co2_evitado': 0,
+            'agua_ahorrada': 0,
+            'arboles_salvados': 0,
+            'items_reciclados': 0
+        }
     
-    co2_total = 0
-    agua_total = 0
+    return {
+        'co2_evitado': round(impacto.co2_evitado, 2),
+        'agua_ahorrada': round(impacto.agua_ahorrada, 2),
+        'arboles_salvados': impacto.arboles_salvados,
+        'items_reciclados': impacto.items_reciclados
+    }
+
+
+def _reemplazar_resumenes(modelo, filas, user_id=None):
+    """
+    Reemplaza las filas de un resumen por usuario (user_impacts, user_stats,
+    user_casino) por 'filas' ({user_id: valores}) y hace commit. El borrado
+    sincroniza la sesión: las filas viejas ya cargadas salen del mapa de
+    identidad antes de insertar las nuevas con la misma clave.
+    """
+    borrar = modelo.query
+    if user_id is not None:
+        borrar = borrar.filter_by(user_id=user_id)
+    borrar.delete(synchronize_session='fetch')
     
-    for trans in transacciones:
-        # Parsear metadata para obtener material_id
-        if trans.metadata_json:
-            try:
-                meta = json.loads(trans.metadata_json)
-                material_id = meta.get('material_id')
-                cantidad = meta.get('cantidad', 1)
-                
-                material = Material.query.get(material_id)
-                if material:
-                    co2_total += material.impacto_co2 * cantidad
-                    agua_total += material.impacto_agua * cantidad
-            except:
-                pass
+    for uid, valores in filas.items():
+        db.session.add(modelo(user_id=uid, **valores))
     
-    # Calcular árboles equivalentes (1 árbol absorbe aprox 22kg CO2/año)
-    arboles_equivalentes = round(co2_total / 22, 2)
+    db.session.commit()
+    return len(filas)
+
+
+def reconstruir_impactos(user_id=None):
+    """
+    Recalcula los resúmenes de impacto ambiental a partir de las líneas
+    de reciclaje. Si no se indica user_id, reconstruye todos los usuarios.
+    Devuelve la cantidad de usuarios procesados.
+    """
+    query = db.session.query(
+        RecyclingEntry.user_id,
+        func.sum(RecyclingEntry.cantidad * Material.impacto_co2),
+        func.sum(RecyclingEntry.cantidad * Material.impacto_agua),
+        func.sum(RecyclingEntry.cantidad)
+    ).join(Material, RecyclingEntry.material_id == Material.id)\
+     .group_by(RecyclingEntry.user_id)
     
-    return {
-        'co2_evitado': round(co2_total, 2),
-        'agua_ahorrada': round(agua_total, 2),
-        'arboles_salvados': arboles_equivalentes
+    if user_id is not None:
+        query = query.filter(RecyclingEntry.user_id == user_id)
+    
+    resumenes = {
+        uid: dict(co2_evitado=co2 or 0, agua_ahorrada=agua or 0, items_reciclados=items or 0)
+        for uid, co2, agua, items in query
     }
+    return _reemplazar_resumenes(UserImpact, resumenes, user_id)
+
+
+def reconstruir_stats(user_id=None):
+    """
+    Recalcula los contadores de actividad (user_stats) desde el historial de
+    transacciones, líneas de reciclaje y juegos de casino. Si no se indica
+    user_id, reconstruye todos los usuarios. Devuelve la cantidad de usuarios.
+    """
+    por_tipo = db.session.query(Transaction.user_id, Transaction.tipo, func.count(Transaction.id))\
+        .filter(Transaction.tipo.in_(list(CONTADOR_POR_TIPO)))\
+        .group_by(Transaction.user_id, Transaction.tipo)
+    items = db.session.query(RecyclingEntry.user_id, func.sum(RecyclingEntry.cantidad))\
+        .group_by(RecyclingEntry.user_id)
+    casino = db.session.query(
+        CasinoGame.user_id,
+        func.count(CasinoGame.id),
+        func.sum(case((CasinoGame.ganancia > 0, 1), else_=0))
+    ).group_by(CasinoGame.user_id)
+    
+    if user_id is not None:
+        por_tipo = por_tipo.filter(Transaction.user_id == user_id)
+        items = items.filter(RecyclingEntry.user_id == user_id)
+        casino = casino.filter(CasinoGame.user_id == user_id)
+    
+    contadores = {}
+    for uid, tipo, total in por_tipo:
+        contadores.setdefault(uid, {})[CONTADOR_POR_TIPO[tipo]] = total
+    for uid, total in items:
+        contadores.setdefault(uid, {})['items_reciclados'] = total or 0
+    for uid, apuestas, victorias in casino:
+        fila = contadores.setdefault(uid, {})
+        fila['apuestas_casino'] = apuestas
+        fila['victorias_casino'] = victorias or 0
+    
+    return _reemplazar_resumenes(UserStats, contadores, user_id)
+
+
+def reconstruir_casino(user_id=None):
+    """
+    Recalcula los totales de casino (user_casino) desde el historial de
+    juegos. Si no se indica user_id, reconstruye todos los usuarios.
+    Devuelve la cantidad de usuarios procesados.
+    """
+    query = db.session.query(CasinoGame.user_id, *agregados_casino()).group_by(CasinoGame.user_id)
+    if user_id is not None:
+        query = query.filter(CasinoGame.user_id == user_id)
+    
+    resumenes = {uid: dict(zip(COLUMNAS_RESUMEN_CASINO, valores)) for uid, *valores in query}
+    return _reemplazar_resumenes(UserCasino, resumenes, user_id)
+
+
+def registrar_reciclaje(user, lineas):
+    """
+    Registra una entrega de reciclaje con una o varias líneas [(material, cantidad)]:
+    una sola transacción con una RecyclingEntry por material y un solo evento con
+    el total de ítems, así que misiones y logros se evalúan una vez. Acumula el
+    impacto ambiental. No hace commit. Devuelve la transacción.
+    """
+    # Un mismo material repetido se suma en una línea
+    por_material = {}
+    for material, cantidad in lineas:
+        _, previa = por_material.get(material.id, (material, 0))
+        por_material[material.id] = (material, previa + cantidad)
+    lineas = list(por_material.values())
+
+    puntos = sum(material.puntos_valor * cantidad for material, cantidad in lineas)
+    items = sum(cantidad for _, cantidad in lineas)
+    if len(lineas) == 1:
+        material, cantidad = lineas[0]
+        descripcion = f"Reciclaje de {cantidad} {material.nombre}"
+    else:
+        nombres = ', '.join(material.nombre for material, _ in lineas)
+        descripcion = f"Reciclaje de {items} ítems ({nombres})"[:255]
+
+    transaccion = user.agregar_puntos(
+        puntos,
+        'reciclaje',
+        descripcion,
+        cantidad_evento=items,
+        datos_evento={'material_ids': [material.id for material, _ in lineas]},
+        metadata={'lineas': [{
+            'material_id': material.id,
+            'material_nombre': material.nombre,
+            'cantidad': cantidad,
+            'puntos_unitarios': material.puntos_valor
+        } for material, cantidad in lineas]}
+    )
+    for material, cantidad in lineas:
+        db.session.add(RecyclingEntry(
+            transaccion=transaccion,
+            user_id=user.id,
+            material_id=material.id,
+            cantidad=cantidad,
+            puntos=material.puntos_valor * cantidad
+        ))
+        user.registrar_impacto(material, cantidad)
+    return transaccion
+
+
+def material_en_uso(material_id):
+    """Indica si un material ya tiene entregas de reciclaje registradas"""
+    return db.session.query(
+        RecyclingEntry.query.filter_by(material_id=material_id).exists()
+    ).scalar()
 
 
 def obtener_ranking_estudiantes(limite=10):
@@ -74,9 +212,9 @@ def obtener_ranking_facultades():
     return [{'facultad': r[0], 'puntos': r[1], 'estudiantes': r[2]} for r in resultado]
 
 
-def obtener_ranking_carreras():
+def obtener_ranking_carreras(limite=20):
     """Obtiene el ranking de carreras por puntos históricos totales"""
-    resultado = db.session.query(
+    query = db.session.query(
         User.carrera,
         User.facultad,
         func.sum(User.puntos_historicos).label('puntos_historicos'),
@@ -89,8 +227,10 @@ def obtener_ranking_carreras():
      .order_by(
          # CORRECCIÓN: Ordenar por el campo agregado (puntos_historicos)
          func.sum(User.puntos_historicos).desc()
-     ).limit(20)\
-     .all()
+     )
+    if limite:
+        query = query.limit(limite)
+    resultado = query.all()
     
     return [{'carrera': r[0], 'facultad': r[1], 'puntos': r[2], 'estudiantes': r[3]} for r in resultado]
 
@@ -103,24 +243,10 @@ def estadisticas_globales():
     total_transacciones = Transaction.query.count()
     
     # Calcular impacto total
-    transacciones_reciclaje = Transaction.query.filter_by(tipo='reciclaje').all()
-    
-    co2_total = 0
-    agua_total = 0
-    
-    for trans in transacciones_reciclaje:
-        if trans.metadata_json:
-            try:
-                meta = json.loads(trans.metadata_json)
-                material_id = meta.get('material_id')
-                cantidad = meta.get('cantidad', 1)
-                
-                material = Material.query.get(material_id)
-                if material:
-                    co2_total += material.impacto_co2 * cantidad
-                    agua_total += material.impacto_agua * cantidad
-            except:
-                pass
+    co2_total, agua_total = db.session.query(
+        func.coalesce(func.sum(RecyclingEntry.cantidad * Material.impacto_co2), 0),
+        func.coalesce(func.sum(RecyclingEntry.cantidad * Material.impacto_agua), 0)
+    ).join(Material, RecyclingEntry.material_id == Material.id).one()
     
     return {
         'total_usuarios': total_usuarios,
@@ -132,6 +258,16 @@ def estadisticas_globales():
     }
 
 
+def obtener_estadisticas_globales():
+    """Devuelve las estadísticas globales desde la caché de la aplicación"""
+    return current_app.extensions['cache_estadisticas'].obtener()
+
+
+def invalidar_estadisticas():
+    """Descarta las estadísticas cacheadas (ej: al cambiar factores de impacto)"""
+    current_app.extensions['cache_estadisticas'].invalidar()
+
+
 def obtener_nombre_carrera(codigo_carrera):
     """
     Traduce el código de carrera (ej: 'ing_inf') a su nombre real 
@@ -148,74 +284,194 @@ def obtener_nombre_carrera(codigo_carrera):
 
 # --- Funciones de Misiones ---
 
-def asignar_misiones(user):
-    """Asigna misiones diarias y semanales a un usuario si no las tiene."""
-    today = date.today()
-    start_of_week = today - timedelta(days=today.weekday())
-
-    # Verificar misiones diarias
-    mision_diaria_existente = UserMision.query.filter(
-        UserMision.user_id == user.id,
-        UserMision.mision.has(frecuencia='diaria'),
-        func.date(UserMision.fecha_asignacion) == today
-    ).first()
-
-    if not mision_diaria_existente:
-        # Asignar una nueva misión diaria aleatoria
-        misiones_diarias = Mision.query.filter_by(frecuencia='diaria', activo=True).all()
-        if misiones_diarias:
-            nueva_mision = random.choice(misiones_diarias)
-            um = UserMision(user_id=user.id, mision_id=nueva_mision.id)
-            db.session.add(um)
+def periodos_misiones(hoy=None):
+    """
+    Devuelve (inicio_dia, inicio_semana) como datetimes para filtrar
+    fecha_asignacion por rango. Así la consulta funciona igual en SQLite
+    y PostgreSQL y puede usar el índice (a diferencia de func.date()).
+    """
+    hoy = hoy or date.today()
+    inicio_dia = datetime.combine(hoy, time.min)
+    inicio_semana = inicio_dia - timedelta(days=hoy.weekday())
+    return inicio_dia, inicio_semana
 
-    # Verificar misiones semanales
-    mision_semanal_existente = UserMision.query.filter(
-        UserMision.user_id == user.id,
-        UserMision.mision.has(frecuencia='semanal'),
-        func.date(UserMision.fecha_asignacion) >= start_of_week
-    ).first()
-
-    if not mision_semanal_existente:
-        # Asignar una nueva misión semanal aleatoria
-        misiones_semanales = Mision.query.filter_by(frecuencia='semanal', activo=True).all()
-        if misiones_semanales:
-            nueva_mision = random.choice(misiones_semanales)
-            um = UserMision(user_id=user.id, mision_id=nueva_mision.id)
-            db.session.add(um)
-    
-    db.session.commit()
 
+class MisionCatalogo:
+    """Copia de una misión activa que puede vivir en caché fuera de la sesión"""
+    __slots__ = ('id', 'nombre', 'descripcion', 'tipo', 'recompensa_puntos', 'frecuencia', 'objetivo')
+
+    def __init__(self, mision):
+        for campo in self.__slots__:
+            setattr(self, campo, getattr(mision, campo))
+
+
+class MisionActiva:
+    """Misión del periodo con el progreso del usuario (exista o no su UserMision)"""
+    __slots__ = ('mision', 'progreso', 'completada')
+
+    def __init__(self, mision, progreso=0, completada=False):
+        self.mision = mision
+        self.progreso = progreso or 0
+        self.completada = bool(completada)
 
-def actualizar_progreso_mision(user, tipo_accion, cantidad=1):
+
+def cargar_catalogo_misiones():
+    """{frecuencia: [MisionCatalogo]} de las misiones activas, ordenadas por id"""
+    catalogo = {'diaria': [], 'semanal': []}
+    for mision in Mision.query.filter_by(activo=True).order_by(Mision.id):
+        catalogo.setdefault(mision.frecuencia, []).append(MisionCatalogo(mision))
+    return catalogo
+
+
+def obtener_catalogo_misiones():
+    """Catálogo de misiones desde la caché de la aplicación"""
+    return current_app.extensions['catalogo_misiones'].obtener()
+
+
+def invalidar_catalogo_misiones():
+    """Descarta el catálogo en caché (llamar tras crear o editar misiones)"""
+    current_app.extensions['catalogo_misiones'].invalidar()
+
+
+def elegir_mision(user_id, frecuencia, periodo, candidatas):
     """
-    Actualiza el progreso de las misiones activas de un usuario.
+    Elige una misión de forma determinista a partir de (usuario, periodo,
+    versión del catálogo). La versión son los ids activos: si el catálogo
+    cambia, la elección puede cambiar; si no, siempre es la misma.
+    """
+    version = ','.join(str(m.id) for m in candidatas)
+    clave = f'{user_id}:{frecuencia}:{periodo.isoformat()}:{version}'
+    resumen = hashlib.sha256(clave.encode()).digest()
+    return candidatas[int.from_bytes(resumen[:8], 'big') % len(candidatas)]
+
+
+def misiones_del_periodo(user_id):
+    """
+    Lista de (MisionCatalogo, inicio_periodo) que le tocan al usuario hoy:
+    la diaria y la semanal. No consulta la base de datos.
+    """
+    inicio_dia, inicio_semana = periodos_misiones()
+    catalogo = obtener_catalogo_misiones()
+    elegidas = []
+    for frecuencia, desde in (('diaria', inicio_dia), ('semanal', inicio_semana)):
+        candidatas = catalogo.get(frecuencia)
+        if candidatas:
+            elegidas.append((elegir_mision(user_id, frecuencia, desde.date(), candidatas), desde))
+    return elegidas
+
+
+def _progreso_guardado(user_id, elegidas, bloquear=False):
+    """
+    {mision_id: UserMision} materializadas en el periodo de cada misión elegida.
+    Con bloquear=True toma antes la fila del usuario (SELECT ... FOR UPDATE) y
+    relee el progreso: dos procesos que actualizan las misiones del mismo
+    usuario se turnan, y el segundo ve las filas que creó el primero.
+    """
+    if not elegidas:
+        return {}
+    if bloquear:
+        db.session.execute(select(User.id).where(User.id == user_id).with_for_update())
+    desde_minimo = min(desde for _, desde in elegidas)
+    periodo = {m.id: desde for m, desde in elegidas}
+    filas = UserMision.query.filter(
+        UserMision.user_id == user_id,
+        UserMision.mision_id.in_(list(periodo)),
+        UserMision.fecha_asignacion >= desde_minimo
+    )
+    if bloquear:
+        filas = filas.populate_existing()
+    filas = filas.all()
+    return {um.mision_id: um for um in filas if _sin_zona(um.fecha_asignacion) >= periodo[um.mision_id]}
+
+
+def _sin_zona(fecha):
+    return fecha.replace(tzinfo=None) if fecha.tzinfo else fecha
+
+
+def misiones_activas(user):
+    """Misiones del periodo aún sin completar, con su progreso (una sola lectura)"""
+    elegidas = misiones_del_periodo(user.id)
+    guardadas = _progreso_guardado(user.id, elegidas)
+    activas = []
+    for mision, _ in elegidas:
+        um = guardadas.get(mision.id)
+        activa = MisionActiva(mision, um.progreso, um.completada) if um else MisionActiva(mision)
+        if not activa.completada:
+            activas.append(activa)
+    return activas
+
+
+def asignar_misiones_lote(user_ids=None, tamano_lote=1000):
+    """
+    Materializa en UserMision la misión diaria y la semanal del periodo para
+    los usuarios activos que aún no la tienen (o solo para user_ids). Ya no es
+    necesario para jugar: sirve para reportes sobre user_misiones.
+    No hace commit; devuelve el número de filas creadas.
+    """
+    inicio_dia, inicio_semana = periodos_misiones()
+    catalogo = obtener_catalogo_misiones()
+    creadas = 0
+
+    for frecuencia, desde in (('diaria', inicio_dia), ('semanal', inicio_semana)):
+        candidatas = catalogo.get(frecuencia)
+        if not candidatas:
+            continue
+        ya_asignada = db.session.query(UserMision.id).join(Mision).filter(
+            UserMision.user_id == User.id,
+            Mision.frecuencia == frecuencia,
+            UserMision.fecha_asignacion >= desde
+        ).exists()
+        pendientes = db.session.query(User.id).filter(User.activo == True, ~ya_asignada)
+        if user_ids is not None:
+            pendientes = pendientes.filter(User.id.in_(user_ids))
+
+        filas = [{'user_id': uid, 'mision_id': elegir_mision(uid, frecuencia, desde.date(), candidatas).id}
+                 for uid, in pendientes]
+        for i in range(0, len(filas), tamano_lote):
+            db.session.execute(insert(UserMision), filas[i:i + tamano_lote])
+        creadas += len(filas)
+
+    return creadas
+
+
+def asignar_misiones(user):
+    """Materializa las misiones del periodo de un usuario si aún no existen."""
+    if asignar_misiones_lote(user_ids=[user.id]):
+        db.session.commit()
+
+
+def actualizar_progreso_mision(user, tipo_accion, cantidad=1, commit=True):
+    """
+    Actualiza el progreso de las misiones del periodo de un usuario.
     tipo_accion: 'reciclaje', 'quiz', 'login', etc.
+    La fila UserMision se crea la primera vez que hay progreso, con la fila
+    del usuario bloqueada hasta el commit para no duplicarla ni pagar dos
+    veces la recompensa. Con commit=False el llamador decide cuándo confirmar (despachador de eventos).
     """
-    today = date.today()
-    start_of_week = today - timedelta(days=today.weekday())
-
-    misiones_activas = UserMision.query.join(Mision).filter(
-        UserMision.user_id == user.id,
-        UserMision.completada == False,
-        Mision.tipo == tipo_accion,
-        # Filtrar para misiones de hoy o de esta semana
-        ((Mision.frecuencia == 'diaria') & (func.date(UserMision.fecha_asignacion) == today)) |
-        ((Mision.frecuencia == 'semanal') & (func.date(UserMision.fecha_asignacion) >= start_of_week))
-    ).all()
+    elegidas = [(m, desde) for m, desde in misiones_del_periodo(user.id) if m.tipo == tipo_accion]
+    guardadas = _progreso_guardado(user.id, elegidas, bloquear=True)
 
     misiones_completadas = []
-    for um in misiones_activas:
+    for mision, _ in elegidas:
+        um = guardadas.get(mision.id)
+        if um is None:
+            um = UserMision(user_id=user.id, mision_id=mision.id, progreso=0, completada=False)
+            db.session.add(um)
+        if um.completada:
+            continue
+
         um.progreso += cantidad
-        if um.progreso >= um.mision.objetivo:
+        if um.progreso >= mision.objetivo:
             um.completada = True
             user.agregar_puntos(
-                cantidad=um.mision.recompensa_puntos,
+                cantidad=mision.recompensa_puntos,
                 tipo='mision',
-                descripcion=f"Recompensa por misión: {um.mision.nombre}"
+                descripcion=f"Recompensa por misión: {mision.nombre}"
             )
-            misiones_completadas.append(um.mision)
+            misiones_completadas.append(mision)
     
-    db.session.commit()
+    if commit:
+        db.session.commit()
     return misiones_completadas
 
 
@@ -226,7 +482,7 @@ def jugar_ruleta(numero_apostado=None, tipo_apuesta='numero'):
     Simula un juego de ruleta
     tipo_apuesta: 'numero', 'par', 'impar', 'alto', 'bajo', 'docena'
     """
-    numero_ganador = random.randint(0, 36)
+    numero_ganador = obtener_rng('casino').randint(0, pagos.RULETA_NUMEROS - 1)
     
     resultado = {
         'numero': numero_ganador,
@@ -235,60 +491,25 @@ def jugar_ruleta(numero_apostado=None, tipo_apuesta='numero'):
         'multiplicador': 0
     }
     
-    if tipo_apuesta == 'numero' and numero_apostado == numero_ganador:
+    apuesta = pagos.RULETA.get(tipo_apuesta)
+    if apuesta and apuesta.gana(numero_ganador, valor=numero_apostado):
         resultado['gano'] = True
-        resultado['multiplicador'] = 35
-    elif tipo_apuesta == 'par' and numero_ganador != 0 and numero_ganador % 2 == 0:
-        resultado['gano'] = True
-        resultado['multiplicador'] = 2
-    elif tipo_apuesta == 'impar' and numero_ganador != 0 and numero_ganador % 2 == 1:
-        resultado['gano'] = True
-        resultado['multiplicador'] = 2
-    elif tipo_apuesta == 'alto' and numero_ganador >= 19:
-        resultado['gano'] = True
-        resultado['multiplicador'] = 2
-    elif tipo_apuesta == 'bajo' and 1 <= numero_ganador <= 18:
-        resultado['gano'] = True
-        resultado['multiplicador'] = 2
-    elif tipo_apuesta == 'docena':
-        docena = (numero_ganador - 1) // 12 if numero_ganador > 0 else -1
-        if docena == numero_apostado:
-            resultado['gano'] = True
-            resultado['multiplicador'] = 3
+        resultado['multiplicador'] = apuesta.multiplicador(numero_apostado)
     
     return resultado
 
 
 def jugar_slots():
     """Simula un juego de slots con 3 rodillos"""
-    simbolos = ['🌱', '🌿', '🍃', '♻️', '🌍', '💚', '🌳', '🌲']
+    rng = obtener_rng('casino')
+    indices = [rng.randrange(len(pagos.SLOTS_SIMBOLOS)) for _ in range(3)]
     
-    rodillos = [
-        random.choice(simbolos),
-        random.choice(simbolos),
-        random.choice(simbolos)
-    ]
-    
-    resultado = {
-        'rodillos': rodillos,
-        'gano': False,
-        'multiplicador': 0
+    multiplicador = pagos.pago_slots(*indices)
+    return {
+        'rodillos': [pagos.SLOTS_SIMBOLOS[i] for i in indices],
+        'gano': multiplicador > 0,
+        'multiplicador': multiplicador
     }
-    
-    # Jackpot: 3 símbolos de reciclaje
-    if rodillos[0] == '♻️' and rodillos[1] == '♻️' and rodillos[2] == '♻️':
-        resultado['gano'] = True
-        resultado['multiplicador'] = 50
-    # 3 iguales
-    elif rodillos[0] == rodillos[1] == rodillos[2]:
-        resultado['gano'] = True
-        resultado['multiplicador'] = 10
-    # 2 iguales
-    elif rodillos[0] == rodillos[1] or rodillos[1] == rodillos[2] or rodillos[0] == rodillos[2]:
-        resultado['gano'] = True
-        resultado['multiplicador'] = 3
-    
-    return resultado
 
 
 def jugar_dados(tipo_apuesta='suma', valor_apostado=7):
@@ -296,96 +517,21 @@ def jugar_dados(tipo_apuesta='suma', valor_apostado=7):
     Simula un juego de dados
     tipo_apuesta: 'suma', 'par', 'impar', 'mayor7', 'menor7', 'dobles'
     """
-    dado1 = random.randint(1, 6)
-    dado2 = random.randint(1, 6)
-    suma = dado1 + dado2
+    rng = obtener_rng('casino')
+    dado1 = rng.randint(1, pagos.DADOS_CARAS)
+    dado2 = rng.randint(1, pagos.DADOS_CARAS)
     
     resultado = {
         'dado1': dado1,
         'dado2': dado2,
-        'suma': suma,
+        'suma': dado1 + dado2,
         'gano': False,
         'multiplicador': 0
     }
     
-    if tipo_apuesta == 'suma' and suma == valor_apostado:
-        resultado['gano'] = True
-        # Multiplicadores según probabilidad
-        multiplicadores_suma = {2: 30, 3: 15, 4: 10, 5: 8, 6: 6, 7: 5, 8: 6, 9: 8, 10: 10, 11: 15, 12: 30}
-        resultado['multiplicador'] = multiplicadores_suma.get(suma, 5)
-    elif tipo_apuesta == 'par' and suma % 2 == 0:
-        resultado['gano'] = True
-        resultado['multiplicador'] = 2
-    elif tipo_apuesta == 'impar' and suma % 2 == 1:
-        resultado['gano'] = True
-        resultado['multiplicador'] = 2
-    elif tipo_apuesta == 'mayor7' and suma > 7:
-        resultado['gano'] = True
-        resultado['multiplicador'] = 2
-    elif tipo_apuesta == 'menor7' and suma < 7:
-        resultado['gano'] = True
-        resultado['multiplicador'] = 2
-    elif tipo_apuesta == 'dobles' and dado1 == dado2:
+    apuesta = pagos.DADOS.get(tipo_apuesta)
+    if apuesta and apuesta.gana(dado1, dado2, valor=valor_apostado):
         resultado['gano'] = True
-        resultado['multiplicador'] = 8
+        resultado['multiplicador'] = apuesta.multiplicador(valor_apostado)
     
     return resultado
-
-
-def verificar_logros(user):
-    """Verifica y otorga logros al usuario"""
-    from models import Achievement, UserAchievement
-    
-    logros_obtenidos = []
-    
-    # Verificar cada logro
-    logros = Achievement.query.all()
-    for logro in logros:
-        # Verificar si ya tiene el logro
-        ya_tiene = UserAchievement.query.filter_by(
-            user_id=user.id,
-            achievement_id=logro.id
-        ).first()
-        
-        if not ya_tiene:
-            cumple = False
-            
-            # Verificar criterios
-            # Verificar criterios
-            if logro.criterio == 'reciclaje_1':
-                total_reciclajes = Transaction.query.filter_by(
-                    user_id=user.id,
-                    tipo='reciclaje'
-                ).count()
-                cumple = total_reciclajes >= 1
-            
-            elif logro.criterio == 'racha_7':
-                cumple = user.racha_actual >= 7
-            
-            elif logro.criterio == 'reciclaje_100':
-                total = Transaction.query.filter_by(
-                    user_id=user.id,
-                    tipo='reciclaje'
-                ).count()
-                cumple = total >= 100
-
-            elif logro.criterio == 'quiz_perfect_5':
-                # Contar quizzes con puntaje perfecto (asumiendo que se guarda en metadata o historial)
-                # Por ahora, simplificaremos verificando total de quizzes > 5 ya que no tenemos el puntaje exacto en Transaction fácilmente accesible sin parsear JSON
-                # TODO: Mejorar esto parseando metadata_json de transacciones tipo 'quiz'
-                total_quizzes = Transaction.query.filter_by(
-                    user_id=user.id,
-                    tipo='quiz'
-                ).count()
-                cumple = total_quizzes >= 5
-            
-            if cumple:
-                nuevo_logro = UserAchievement(
-                    user_id=user.id,
-                    achievement_id=logro.id,
-                    progreso=100
-                )
-                db.session.add(nuevo_logro)
-                logros_obtenidos.append(logro)
-    
-    return logros_obtenidos
\ No newline at end of file